@@ -1,19 +1,14 @@
-import os.path
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.urls import path, reverse
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.core.management import call_command
 from django.utils.safestring import mark_safe
 from api.models import *
-from api.odk.importers.form_submissions.form_submission_importer import FromSubmissionImporter
-from api.odk.exporters.entity_lists.entity_list_exporter import EntityListExporter
+from api.jobs import JobRunner, AdminImportFileJob, OdkImportFormSubmissionsJob, OdkExportEntityListsJob
 from .forms import AdminImportFileForm
 import html
 import traceback
-import tempfile
-import io
 import re
 
 
@@ -41,6 +36,11 @@ class AdminImportFileBaseAdmin(admin.ModelAdmin):
                 self.admin_site.admin_view(self.import_file),
                 name=f"{app_label}_{model_name}_import_file",
             ),
+            path(
+                "import-file/<int:job_id>/",
+                self.admin_site.admin_view(self.import_file_job),
+                name=f"{app_label}_{model_name}_import_file_job",
+            ),
         ]
         return custom_urls + urls
 
@@ -49,8 +49,8 @@ class AdminImportFileBaseAdmin(admin.ModelAdmin):
         return ansi_escape.sub('', text)
 
     def __format_command_output(self, stdout, stderr):
-        output = self.__strip_ansi_codes(stdout.getvalue().strip())
-        error = self.__strip_ansi_codes(stderr.getvalue().strip())
+        output = self.__strip_ansi_codes(stdout.strip())
+        error = self.__strip_ansi_codes(stderr.strip())
 
         output = mark_safe(html.escape(output).replace('\n', '<br>'))
         error_output = mark_safe(html.escape(error).replace('\n', '<br>'))
@@ -62,32 +62,18 @@ class AdminImportFileBaseAdmin(admin.ModelAdmin):
             if form.is_valid():
                 import_file = form.cleaned_data['file']
                 try:
-                    with tempfile.NamedTemporaryFile(suffix=f"_{os.path.basename(import_file.name)}",
-                                                     mode="wb",
-                                                     delete=False) as temp_file:
-                        for chunk in import_file.chunks():
-                            temp_file.write(chunk)
-
-                    stdout = io.StringIO()
-                    stderr = io.StringIO()
-                    call_command(
+                    job = AdminImportFileJob.create(
+                        import_file,
                         self.__import_command,
-                        temp_file.name,
-                        stdout=stdout,
-                        stderr=stderr,
-                        **self.__import_kwargs
+                        command_kwargs=self.__import_kwargs,
+                        name=f"Import {self.model._meta.verbose_name_plural}: {import_file.name}",
+                        user=request.user
+                    )
+                    JobRunner.start(job)
+                    return redirect(
+                        f"admin:{self.model._meta.app_label}_{self.model._meta.model_name}_import_file_job",
+                        job_id=job.id
                     )
-                    output, error_output = self.__format_command_output(stdout, stderr)
-
-                    if output:
-                        messages.add_message(request, messages.SUCCESS if not error_output else messages.ERROR, output)
-                    if error_output:
-                        messages.add_message(request, messages.ERROR, error_output)
-
-                    if os.path.exists(temp_file.name):
-                        os.remove(temp_file.name)
-
-                    return redirect(f"admin:{self.model._meta.app_label}_{self.model._meta.model_name}_changelist")
                 except Exception as ex:
                     ex_trace = traceback.format_exc()
                     self.message_user(request, f"Error: {ex_trace}", level=messages.ERROR)
@@ -103,6 +89,21 @@ class AdminImportFileBaseAdmin(admin.ModelAdmin):
             }
         )
 
+    def import_file_job(self, request, job_id):
+        job = get_object_or_404(BackgroundJob, id=job_id, job_type=BackgroundJob.JOB_TYPE_ADMIN_IMPORT_FILE)
+        output, error_output = self.__format_command_output(job.output, job.error_output)
+        return render(
+            request,
+            "admin/import_file_job.html",
+            {
+                "job": job,
+                "output": output,
+                "error_output": error_output,
+                "changelist_url": get_admin_changelist_url(self.model),
+                "title": job.name
+            }
+        )
+
 
 @admin.register(User)
 class UserAdmin(UserAdmin):
@@ -168,67 +169,22 @@ class OdkProjectAdmin(AdminImportFileBaseAdmin):
         return custom_urls + urls
 
     def import_form_submissions(self, request, project_id):
-        try:
-            odk_import_result = FromSubmissionImporter(odk_projects=project_id, ).execute()
-
-            if not odk_import_result.has_errors:
-                messages.add_message(
-                    request,
-                    messages.SUCCESS,
-                    mark_safe(
-                        f"ODK Import finished successfully.<br>{"<br>".join(odk_import_result.info_log)}"
-                    )
-                )
-            else:
-                messages.add_message(
-                    request,
-                    messages.ERROR,
-                    mark_safe(
-                        f"ODK Import finished with errors.<br>{"<br>".join(odk_import_result.info_log)}"
-                    )
-                )
-                messages.add_message(
-                    request,
-                    messages.ERROR,
-                    mark_safe(
-                        f"Errors:<br>{"<br>".join(odk_import_result.errors)}"
-                    )
-                )
-        except Exception as e:
-            messages.add_message(request, messages.ERROR, f"ODK Import did not finish: {str(e)}")
-
-        return redirect('..')
+        return self.__start_odk_job(request, project_id, OdkImportFormSubmissionsJob, "ODK Import")
 
     def export_entity_lists(self, request, project_id):
+        return self.__start_odk_job(request, project_id, OdkExportEntityListsJob, "ODK Export")
+
+    def __start_odk_job(self, request, project_id, odk_job, description):
+        odk_project = get_object_or_404(OdkProject, id=project_id)
         try:
-            odk_export_result = EntityListExporter(odk_projects=project_id).execute()
-
-            if not odk_export_result.has_errors:
-                messages.add_message(
-                    request,
-                    messages.SUCCESS,
-                    mark_safe(
-                        f"ODK Export finished successfully.<br>{"<br>".join(odk_export_result.info_log)}"
-                    )
-                )
+            job = JobRunner.start(odk_job.create(odk_project, user=request.user))
+            if job.is_queued and JobRunner.is_run_by_workers():
+                messages.add_message(request, messages.INFO, f"{description} queued for the background job workers.")
             else:
-                messages.add_message(
-                    request,
-                    messages.ERROR,
-                    mark_safe(
-                        f"ODK Export finished with errors.<br>{"<br>".join(odk_export_result.info_log)}"
-                    )
-                )
-                messages.add_message(
-                    request,
-                    messages.ERROR,
-                    mark_safe(
-                        f"Errors:<br>{"<br>".join(odk_export_result.errors)}"
-                    )
-                )
+                messages.add_message(request, messages.INFO, f"{description} started.")
+            return redirect('admin:api_backgroundjob_change', job.id)
         except Exception as e:
-            messages.add_message(request, messages.ERROR, f"ODK Export did not finish: {str(e)}")
-
+            messages.add_message(request, messages.ERROR, f"{description} did not start: {str(e)}")
         return redirect('..')
 
     list_display = (
@@ -354,6 +310,7 @@ class OdkEntityListExporterAdmin(admin.ModelAdmin):
         'id',
         'exporter',
         'odk_entity_list__name',
+        'source_model',
         'etl_document__name',
         'etl_document__version',
     )
@@ -403,6 +360,26 @@ class OdkEntityListExporterJobAdmin(admin.ModelAdmin):
         return odk_entity_list_exporter_job.odk_entity_list_exporter.odk_entity_list.odk_project.name
 
 
+@admin.register(OdkEntity)
+class OdkEntityAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'label',
+        'uuid',
+        'odk_entity_list',
+        'odk_entity_list_exporter_job',
+        'updated_at',
+    )
+    list_filter = (
+        'odk_entity_list__name',
+        'odk_entity_list__odk_project__name',
+    )
+    search_fields = (
+        'label',
+        'uuid',
+    )
+
+
 # ETL
 @admin.register(EtlDocument)
 class EtlDocumentAdmin(AdminImportFileBaseAdmin):
@@ -701,3 +678,75 @@ class StaffAdmin(AdminImportFileBaseAdmin):
         'province__name',
         'cluster__name',
     )
+
+
+# Background Jobs
+class OdkFormImporterJobInline(admin.TabularInline):
+    model = OdkFormImporterJob
+    fields = ('odk_form_importer', 'status', 'import_start_date', 'import_end_date', 'result')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class OdkEntityListExporterJobInline(admin.TabularInline):
+    model = OdkEntityListExporterJob
+    fields = ('odk_entity_list_exporter', 'status', 'export_date', 'result')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    change_form_template = "admin/background_job/change_form.html"
+    inlines = [OdkFormImporterJobInline, OdkEntityListExporterJobInline]
+    list_display = (
+        'id',
+        'name',
+        'job_type',
+        'status',
+        'progress',
+        'worker',
+        'created_by',
+        'created_at',
+        'started_at',
+        'ended_at',
+    )
+    list_filter = (
+        'job_type',
+        'status',
+        'created_at',
+    )
+    search_fields = (
+        'name',
+        'status',
+        'worker',
+        'concurrency_key',
+    )
+    readonly_fields = (
+        'job_type',
+        'name',
+        'status',
+        'progress',
+        'args',
+        'concurrency_key',
+        'worker',
+        'created_by',
+        'started_at',
+        'ended_at',
+        'heartbeat_at',
+        'output',
+        'error_output',
+    )
+
+    def has_add_permission(self, request):
+        return False
@@ -1,3 +1,5 @@
 from .utils import Utils
 from .type_caster import TypeCaster
 from .permissions import Permissions
+from .field_path import FieldPath
+from .csv_bulk_loader import CsvBulkLoader
@@ -0,0 +1,129 @@
+import time
+from django.db import transaction
+from django.utils import timezone
+
+
+class CsvBulkLoader:
+    """
+    Loads models identified by their code from CSV rows in chunks.
+
+    For each chunk the existing models and the referenced models are found with one code__in query per model,
+    the new models are inserted with bulk_create and the changed models are updated with bulk_update.
+    The whole load runs in one transaction.
+    """
+
+    def __init__(self, model_class, build, references=None, update_fields=None, validate=None, chunk_size=5000):
+        """
+        Args:
+            model_class: The model to load.
+            build: Function(row, references) that builds a new model from a row.
+            references: Dict of field name to (CSV column, model class) of the foreign keys to resolve by code.
+            update_fields: The foreign key fields to update on existing models when they differ from the row.
+            validate: Function(row, references) that returns an error message if the row cannot be loaded.
+            chunk_size: The number of rows to load per chunk.
+        """
+        self.model_class = model_class
+        self.build = build
+        self.references = references or {}
+        self.update_fields = update_fields or []
+        self.validate = validate
+        self.chunk_size = max(1, chunk_size)
+        self.row_count = 0
+        self.created_count = 0
+        self.updated_count = 0
+        self.errors = []
+        self.seconds = 0
+
+    @property
+    def loaded_count(self):
+        return self.created_count + self.updated_count
+
+    @property
+    def rows_per_second(self):
+        return self.row_count / self.seconds if self.seconds else 0
+
+    def summary(self, name):
+        return "Loaded {} {} ({} created, {} updated) from {} rows in {:.2f}s ({:.0f} rows/sec).".format(
+            self.loaded_count, name, self.created_count, self.updated_count, self.row_count, self.seconds,
+            self.rows_per_second)
+
+    def load(self, rows):
+        """
+        Loads the rows.
+
+        Args:
+            rows: Iterable of CSV row dicts.
+
+        Returns:
+            self
+        """
+        started_at = time.perf_counter()
+        # Models loaded by earlier chunks, so repeated codes update the same model.
+        self._loaded = {}
+        with transaction.atomic():
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    self._load_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self._load_chunk(chunk)
+        self.seconds = time.perf_counter() - started_at
+        return self
+
+    def _load_chunk(self, rows):
+        self.row_count += len(rows)
+        existing = self._find_by_codes(self.model_class, [row.get('code') for row in rows])
+        existing.update(self._loaded)
+        references = {
+            field_name: self._find_by_codes(ref_model_class, [row.get(column) for row in rows])
+            for field_name, (column, ref_model_class) in self.references.items()
+        }
+
+        new_models = {}
+        changed_models = {}
+        for row in rows:
+            code = row.get('code')
+            row_references = {
+                field_name: references[field_name].get(row.get(column))
+                for field_name, (column, _) in self.references.items()
+            }
+            if self.validate:
+                error = self.validate(row, row_references)
+                if error:
+                    self.errors.append(error)
+                    continue
+
+            model = new_models.get(code) or existing.get(code)
+            if model is None:
+                new_models[code] = self.build(row, row_references)
+            else:
+                for field_name in self.update_fields:
+                    reference = row_references[field_name]
+                    if getattr(model, f'{field_name}_id') != (reference.pk if reference else None):
+                        setattr(model, field_name, reference)
+                        if model.pk is not None:
+                            changed_models[code] = model
+
+        if new_models:
+            self.model_class.objects.bulk_create(new_models.values(), batch_size=self.chunk_size)
+            self.created_count += len(new_models)
+            self._loaded.update(new_models)
+        if changed_models:
+            now = timezone.now()
+            for model in changed_models.values():
+                model.updated_at = now
+            self.model_class.objects.bulk_update(changed_models.values(), self.update_fields + ['updated_at'],
+                                                 batch_size=self.chunk_size)
+            self.updated_count += len(changed_models)
+            self._loaded.update(changed_models)
+
+    def _find_by_codes(self, model_class, codes):
+        codes = set(c for c in codes if c)
+        models_by_code = {}
+        if codes:
+            # Keep the first model for each code like find_by.
+            for model in model_class.objects.filter(code__in=codes).order_by('-id'):
+                models_by_code[model.code] = model
+        return models_by_code
@@ -0,0 +1,128 @@
+import re
+import functools
+from api.common.utils import Utils
+
+
+class FieldPath:
+    """
+    Pre-parsed form of a field path string used by Utils.get_field and Utils.has_field.
+
+    The path is split, indexed and method-parsed once so it can be resolved against many objects
+    without re-parsing the path for every object.
+
+    Formats:
+        1. Simple Path: "parent.child.property_name"
+        2. List Path: "parent.child.list_property_name[0]"
+                      "parent.child.list_property_name[0].list_obj.property_name"
+        3. Method Path: "parent.child.method_name()"
+                        "parent.method_name('arg', kwarg=1)"
+    """
+    _MISSING = object()
+    _INDEX_REGEX = re.compile(r'\[(\d+)\]')
+
+    def __init__(self, path):
+        if not path:
+            raise Exception('At least one key must be provided.')
+        self.path = path
+        self.segments = tuple(self._parse_segment(key) for key in path.split('.'))
+
+    @classmethod
+    @functools.lru_cache(maxsize=1024)
+    def get(cls, path):
+        """
+        Gets a cached FieldPath for a path string.
+
+        Args:
+            path: The path string to parse.
+
+        Returns:
+            FieldPath
+        """
+        return cls(path)
+
+    @classmethod
+    def _parse_segment(cls, key):
+        """
+        Parses a single path segment.
+
+        Returns:
+            Tuple (key, index, method) where method is (method_name, positional_args, keyword_args) or None.
+        """
+        index = None
+        if key.endswith(']'):
+            match = cls._INDEX_REGEX.search(key)
+            if match:
+                index = int(match.group(1))
+                key = key.rsplit('[', 1)[0]
+
+        method = None
+        if key.endswith(')'):
+            method = Utils.parse_str_method(key)
+        return key, index, method
+
+    def resolve(self, obj, default=None):
+        """
+        Resolves the path against an object.
+
+        Args:
+            obj: The dictionary or object to resolve the path against.
+            default: The default value to return if the path does not exist.
+
+        Returns:
+            Tuple (has_field, value). has_field is False and value is default if any part of the path does not exist.
+        """
+        missing = self._MISSING
+        current_obj = obj
+        for key, index, method in self.segments:
+            if isinstance(current_obj, dict):
+                current_obj = current_obj.get(key, missing)
+                if current_obj is missing:
+                    return False, default
+            else:
+                value = getattr(current_obj, key, missing)
+                if value is not missing:
+                    current_obj = value
+                elif method is not None:
+                    method_name, method_pos_args, method_kw_args = method
+                    if method_name is None:
+                        return False, default
+                    bound_method = getattr(current_obj, method_name, None)
+                    if bound_method and callable(bound_method):
+                        current_obj = bound_method(*method_pos_args, **method_kw_args) or default
+                    else:
+                        current_obj = default
+                    continue
+                else:
+                    return False, default
+
+            if index is not None and isinstance(current_obj, list):
+                current_obj = current_obj[index] if len(current_obj) > index else default
+        return True, current_obj
+
+    def get_value(self, obj, default=None):
+        """
+        Gets the value at the path, or returns a default value.
+
+        Args:
+            obj: The dictionary or object to get the value from.
+            default: The default value to return if the path does not exist.
+
+        Returns:
+            The value at the path or the default value.
+        """
+        return self.resolve(obj, default=default)[1]
+
+    def has_value(self, obj):
+        """
+        Gets if the dictionary or object has the path.
+
+        Args:
+            obj: The dictionary or object to check.
+
+        Returns:
+            True if the path exists, otherwise False.
+        """
+        return self.resolve(obj)[0]
+
+    def __str__(self):
+        return self.path
@@ -1,4 +1,7 @@
+import time
 from argparse import ArgumentError
+from django.conf import settings
+from django.core.cache import cache
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import Group, Permission
 from django.http import HttpRequest
@@ -11,15 +14,90 @@ class Permissions:
         VIEW_ASSIGNED_PROVINCES = 'auth.view_assigned_provinces'
         VIEW_ALL_PROVINCES = 'auth.view_all_provinces'
 
+    SCOPE_CACHE_KEY = 'permissions:scope'
+    SCOPE_VERSION_CACHE_KEY = 'permissions:scope:version'
+    # Caches that are not shared by the processes. The invalidations would only reach the process that made them.
+    LOCAL_CACHE_BACKENDS = [
+        'django.core.cache.backends.locmem.LocMemCache',
+        'django.core.cache.backends.dummy.DummyCache',
+    ]
+
     @classmethod
     def has_permission(cls, user_or_request, permission_code):
+        user = cls._get_user(user_or_request)
+        if user.is_active and user.is_superuser:
+            return True
+        return permission_code in cls.get_scope(user)['permission_codes']
+
+    @classmethod
+    def get_scope(cls, user_or_request):
+        """
+        Gets the permission codes and the IDs of the provinces a user is allowed to view.
+
+        The scope is resolved once and kept on the user for the request. When the default cache is shared by
+        the processes it is also kept in the cache for the following requests. See: is_scope_cache_enabled
+        The cached scopes are invalidated when users, groups, permissions or province assignments change.
+
+        Returns:
+            Dict with:
+                permission_codes: Set of the user's permission codes. This is empty for superusers.
+                province_ids: List of the allowed province IDs or None if the user can view all provinces.
+        """
+        user = cls._get_user(user_or_request)
+        scope = getattr(user, '_permissions_scope', None)
+        if scope is None:
+            if cls.is_scope_cache_enabled():
+                version = cache.get_or_set(cls.SCOPE_VERSION_CACHE_KEY, time.time_ns, timeout=None)
+                cache_key = '{}:{}:{}'.format(cls.SCOPE_CACHE_KEY, version, user.pk)
+                scope = cache.get(cache_key)
+                if scope is None:
+                    scope = cls._resolve_scope(user)
+                    cache.set(cache_key, scope, timeout=settings.PERMISSIONS_SCOPE_CACHE_SECONDS)
+            else:
+                scope = cls._resolve_scope(user)
+            user._permissions_scope = scope
+        return scope
+
+    @classmethod
+    def is_scope_cache_enabled(cls):
+        """
+        Gets if the scopes are cached across requests.
+        This requires PERMISSIONS_SCOPE_CACHE_SECONDS and a default cache that is shared by the processes
+        (e.g., the database or Redis), otherwise the invalidations would not reach the other processes.
+        """
+        return (settings.PERMISSIONS_SCOPE_CACHE_SECONDS > 0 and
+                settings.CACHES['default']['BACKEND'] not in cls.LOCAL_CACHE_BACKENDS)
+
+    @classmethod
+    def invalidate_scopes(cls):
+        """
+        Invalidates all the cached scopes.
+        """
+        cache.set(cls.SCOPE_VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+
+    @classmethod
+    def _resolve_scope(cls, user):
+        # Active superusers have every permission so their permissions are not loaded. See: has_permission
+        if user.is_active and not user.is_superuser:
+            permission_codes = set(user.get_all_permissions())
+        else:
+            permission_codes = set()
+        if user.is_superuser or (user.is_active and cls.Codes.VIEW_ALL_PROVINCES in permission_codes):
+            province_ids = None
+        elif user.is_active and cls.Codes.VIEW_ASSIGNED_PROVINCES in permission_codes:
+            province_ids = list(user.provinces.values_list('id', flat=True))
+        else:
+            province_ids = []
+        return {'permission_codes': permission_codes, 'province_ids': province_ids}
+
+    @classmethod
+    def _get_user(cls, user_or_request):
         if isinstance(user_or_request, HttpRequest):
-            user = user_or_request.user
+            return user_or_request.user
         elif isinstance(user_or_request, get_user_model()):
-            user = user_or_request
+            return user_or_request
         else:
             raise ArgumentError('user_or_request must be either a HttpRequest or {}'.format(get_user_model()))
-        return user.has_perm(permission_code)
 
     @classmethod
     def _create(cls, verbose=False):
@@ -0,0 +1,6 @@
+from .job_output import JobOutput
+from .job_runner import JobRunner
+from .job_worker import JobWorker
+from .admin_import_file_job import AdminImportFileJob
+from .odk_import_form_submissions_job import OdkImportFormSubmissionsJob
+from .odk_export_entity_lists_job import OdkExportEntityListsJob
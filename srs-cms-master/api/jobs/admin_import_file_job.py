@@ -0,0 +1,85 @@
+import os
+import shutil
+import uuid
+from django.conf import settings
+from django.core.management import call_command, get_commands, load_command_class
+from django.core.management.base import OutputWrapper
+from api.common import Utils
+from api.models import BackgroundJob
+from .job_runner import JobRunner
+
+
+class AdminImportFileJob:
+    """
+    Imports a file uploaded in the admin with a load management command.
+
+    Commands with a load(file, **kwargs) method are streamed the file one line at a time and the progress
+    is recorded as the file is read. Other commands are called with the path to the file.
+    """
+
+    @classmethod
+    def create(cls, import_file, command, command_kwargs=None, name=None, user=None):
+        """
+        Stores an uploaded file and creates the job to import it.
+
+        Args:
+            import_file: The UploadedFile.
+            command: Name of the management command to import the file with.
+            command_kwargs: Keyword arguments for the command.
+            name: Description of the job.
+            user: The user that uploaded the file.
+
+        Returns:
+            The queued BackgroundJob.
+        """
+        Utils.ensure_dirs(settings.BACKGROUND_JOBS_FILES_DIR)
+        file_path = os.path.join(settings.BACKGROUND_JOBS_FILES_DIR,
+                                 f"{uuid.uuid4().hex}_{os.path.basename(import_file.name)}")
+        if hasattr(import_file, 'temporary_file_path'):
+            # Large uploads are already on disk.
+            shutil.move(import_file.temporary_file_path(), file_path)
+        else:
+            with open(file_path, 'wb') as file:
+                for chunk in import_file.chunks():
+                    file.write(chunk)
+
+        return BackgroundJob.objects.create(
+            job_type=BackgroundJob.JOB_TYPE_ADMIN_IMPORT_FILE,
+            name=name or f"Import: {import_file.name}",
+            args={
+                'command': command,
+                'command_kwargs': command_kwargs or {},
+                'file_name': import_file.name,
+                'file_path': file_path,
+            },
+            created_by=user
+        )
+
+    @classmethod
+    def run(cls, job, stdout, stderr):
+        command_name = job.args['command']
+        command_kwargs = job.args['command_kwargs']
+        file_path = job.args['file_path']
+        try:
+            command = load_command_class(get_commands()[command_name], command_name)
+            if hasattr(command, 'load'):
+                command.stdout = OutputWrapper(stdout)
+                command.stderr = OutputWrapper(stderr)
+                command.load(cls._read_lines(job, file_path), **command_kwargs)
+            else:
+                call_command(command, file_path, stdout=stdout, stderr=stderr, **command_kwargs)
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    @classmethod
+    def _read_lines(cls, job, file_path):
+        file_size = os.path.getsize(file_path) or 1
+        with open(file_path, 'rb') as file:
+            for line in file:
+                yield line.decode('utf-8')
+                JobRunner.update_progress(job, file.tell() / file_size)
+        JobRunner.update_progress(job, 1, force=True)
+
+
+JobRunner.register(BackgroundJob.JOB_TYPE_ADMIN_IMPORT_FILE, AdminImportFileJob)
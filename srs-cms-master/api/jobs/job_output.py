@@ -0,0 +1,42 @@
+import io
+import time
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from api.models import BackgroundJob
+
+
+class JobOutput(io.TextIOBase):
+    """
+    File-like object that appends the text written to it to an output field of a BackgroundJob.
+    The text is saved at most every flush_seconds so the output can be followed while the job runs.
+    """
+
+    def __init__(self, job, field_name='output', flush_seconds=1):
+        self.job = job
+        self.field_name = field_name
+        self.flush_seconds = flush_seconds
+        self.has_output = False
+        self._buffer = []
+        self._flushed_at = time.monotonic()
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if text:
+            self._buffer.append(text)
+            self.has_output = self.has_output or bool(text.strip())
+            if time.monotonic() - self._flushed_at >= self.flush_seconds:
+                self.flush()
+        return len(text)
+
+    def flush(self):
+        self._flushed_at = time.monotonic()
+        if not self._buffer:
+            return
+        text = ''.join(self._buffer)
+        self._buffer = []
+        BackgroundJob.objects.filter(id=self.job.id).update(
+            **{self.field_name: Concat(F(self.field_name), Value(text))}
+        )
+        setattr(self.job, self.field_name, getattr(self.job, self.field_name) + text)
@@ -0,0 +1,266 @@
+import threading
+import time
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from api.models import BackgroundJob
+from .job_output import JobOutput
+
+
+class JobRunner:
+    """
+    Runs BackgroundJobs with the handler registered for their job_type.
+
+    settings.BACKGROUND_JOBS_RUNNER sets how started jobs are run:
+        worker: By the run_background_jobs workers. See: api.jobs.JobWorker
+        thread: In a background thread of the process that started the job. For development only.
+        eager: In the calling thread before start returns.
+
+    Jobs with a concurrency_key are only claimed while fewer than settings.BACKGROUND_JOBS_CONCURRENCY_LIMIT
+    jobs with the same key are running. Jobs held back by the limit stay queued until a job with the same key
+    finishes.
+
+    Running jobs save a heartbeat every settings.BACKGROUND_JOBS_HEARTBEAT_SECONDS. Jobs abandoned by a process
+    that stopped are set to errored when their heartbeat is older than settings.BACKGROUND_JOBS_STALE_SECONDS
+    so they are not counted against their concurrency limit. See: error_stale_jobs
+    """
+    RUNNER_THREAD = 'thread'
+    RUNNER_WORKER = 'worker'
+    RUNNER_EAGER = 'eager'
+
+    # The number of queued jobs locked and checked each time a job is claimed.
+    CLAIM_BATCH_SIZE = 100
+
+    # Seconds between saves of a job's progress.
+    PROGRESS_SECONDS = 1
+
+    _handlers = {}
+    _progress_saved_at = {}
+
+    @classmethod
+    def register(cls, job_type, handler):
+        """
+        Registers the handler for a job type.
+
+        Args:
+            job_type: One of the BackgroundJob.JOB_TYPE_ values.
+            handler: Object with a run(job, stdout, stderr) method.
+        """
+        cls._handlers[job_type] = handler
+
+    @classmethod
+    def start(cls, job):
+        """
+        Starts running a queued job.
+        The job is left queued for the run_background_jobs workers unless the thread or eager runner is set.
+
+        Args:
+            job: The BackgroundJob to run.
+
+        Returns:
+            The BackgroundJob
+        """
+        if settings.BACKGROUND_JOBS_RUNNER == cls.RUNNER_THREAD:
+            threading.Thread(target=cls._run_in_thread, args=(job.id,), daemon=True).start()
+        elif settings.BACKGROUND_JOBS_RUNNER == cls.RUNNER_EAGER:
+            cls._run_queued(job)
+        return job
+
+    @classmethod
+    def is_run_by_workers(cls):
+        """
+        Gets if the started jobs are run by the run_background_jobs workers.
+        """
+        return settings.BACKGROUND_JOBS_RUNNER not in [cls.RUNNER_THREAD, cls.RUNNER_EAGER]
+
+    @classmethod
+    def claim(cls, job=None, worker=None):
+        """
+        Claims the oldest queued job that is not held back by its concurrency limit and sets it to running.
+        Queued jobs locked by other workers are skipped so each job is only claimed once.
+        The stale running jobs are errored first.
+
+        Args:
+            job: Only claim this BackgroundJob.
+            worker: The name of the worker claiming the job.
+
+        Returns:
+            The claimed BackgroundJob or None.
+        """
+        cls.error_stale_jobs()
+        with transaction.atomic():
+            queued_jobs = (BackgroundJob.objects
+                           .select_for_update(skip_locked=True)
+                           .filter(status=BackgroundJob.STATUS_QUEUED)
+                           .order_by('created_at', 'id'))
+            if job is not None:
+                queued_jobs = queued_jobs.filter(id=job.id)
+
+            for queued_job in list(queued_jobs[:cls.CLAIM_BATCH_SIZE]):
+                if queued_job.concurrency_key:
+                    cls._lock_concurrency_key(queued_job.concurrency_key)
+                    running_count = BackgroundJob.objects.filter(concurrency_key=queued_job.concurrency_key,
+                                                                 status=BackgroundJob.STATUS_RUNNING).count()
+                    if running_count >= settings.BACKGROUND_JOBS_CONCURRENCY_LIMIT:
+                        continue
+
+                queued_job.status = BackgroundJob.STATUS_RUNNING
+                queued_job.started_at = timezone.now()
+                queued_job.heartbeat_at = queued_job.started_at
+                queued_job.worker = worker
+                queued_job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'worker', 'updated_at'])
+                return queued_job
+        return None
+
+    @classmethod
+    def error_stale_jobs(cls):
+        """
+        Sets the running jobs without a heartbeat for settings.BACKGROUND_JOBS_STALE_SECONDS to errored.
+        These jobs were abandoned by a process that stopped (e.g., a worker was killed or a web server restarted).
+        They are not queued again since they may have partially run.
+
+        Returns:
+            List of the errored BackgroundJobs.
+        """
+        stale_at = timezone.now() - timedelta(seconds=settings.BACKGROUND_JOBS_STALE_SECONDS)
+        with transaction.atomic():
+            stale_jobs = list(BackgroundJob.objects
+                              .select_for_update(skip_locked=True)
+                              .annotate(last_heartbeat_at=Coalesce('heartbeat_at', 'started_at', 'updated_at'))
+                              .filter(status=BackgroundJob.STATUS_RUNNING, last_heartbeat_at__lt=stale_at))
+            for stale_job in stale_jobs:
+                stale_job.status = BackgroundJob.STATUS_ERRORED
+                stale_job.ended_at = timezone.now()
+                stale_job.error_output += (f"The job was abandoned by {stale_job.worker or 'its process'}. "
+                                           f"Its last heartbeat was at {stale_job.last_heartbeat_at}.\n")
+                stale_job.save(update_fields=['status', 'ended_at', 'error_output', 'updated_at'])
+        return stale_jobs
+
+    @classmethod
+    def run(cls, job):
+        """
+        Runs a job and records its status, output and errors.
+
+        Args:
+            job: The BackgroundJob to run.
+
+        Returns:
+            The BackgroundJob
+        """
+        if job.status != BackgroundJob.STATUS_RUNNING:
+            job.status = BackgroundJob.STATUS_RUNNING
+            job.started_at = timezone.now()
+            job.heartbeat_at = job.started_at
+            job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'updated_at'])
+
+        stdout = JobOutput(job, 'output')
+        stderr = JobOutput(job, 'error_output')
+        heartbeat = cls._start_heartbeat(job)
+        try:
+            handler = cls._handlers.get(job.job_type)
+            if handler is None:
+                raise ValueError(f"Job type not supported: {job.job_type}")
+            handler.run(job, stdout=stdout, stderr=stderr)
+            job.status = BackgroundJob.STATUS_ERRORED if stderr.has_output else BackgroundJob.STATUS_SUCCESSFUL
+        except Exception:
+            stderr.write(traceback.format_exc())
+            job.status = BackgroundJob.STATUS_ERRORED
+        finally:
+            heartbeat.stop()
+            stdout.flush()
+            stderr.flush()
+            cls._progress_saved_at.pop(job.id, None)
+
+        if job.status == BackgroundJob.STATUS_SUCCESSFUL:
+            job.progress = 1
+        job.ended_at = timezone.now()
+        with transaction.atomic():
+            if job.concurrency_key:
+                # Wait for any claim checking the running jobs with this key.
+                cls._lock_concurrency_key(job.concurrency_key)
+            BackgroundJob.objects.filter(id=job.id).update(status=job.status,
+                                                           progress=job.progress,
+                                                           ended_at=job.ended_at,
+                                                           updated_at=job.ended_at)
+        return job
+
+    @classmethod
+    def update_progress(cls, job, progress, force=False):
+        """
+        Sets the progress of a running job. The progress is saved at most every PROGRESS_SECONDS.
+
+        Args:
+            job: The BackgroundJob.
+            progress: Fraction of the job completed, from 0 to 1.
+            force: Save the progress now.
+        """
+        job.progress = min(max(progress, 0), 1)
+        now = time.monotonic()
+        if force or now - cls._progress_saved_at.get(job.id, 0) >= cls.PROGRESS_SECONDS:
+            cls._progress_saved_at[job.id] = now
+            BackgroundJob.objects.filter(id=job.id).update(progress=job.progress)
+
+    @classmethod
+    def _run_queued(cls, job):
+        """
+        Runs a queued job, then the jobs that were held back by their concurrency limit.
+        """
+        claimed_job = cls.claim(job=job)
+        while claimed_job is not None:
+            cls.run(claimed_job)
+            claimed_job = cls.claim()
+
+    @classmethod
+    def _start_heartbeat(cls, job):
+        """
+        Saves the heartbeat of a running job from a thread until the returned heartbeat is stopped.
+        """
+        heartbeat = _Heartbeat(job.id)
+        heartbeat.start()
+        return heartbeat
+
+    @classmethod
+    def _run_in_thread(cls, job_id):
+        try:
+            cls._run_queued(BackgroundJob.objects.get(id=job_id))
+        finally:
+            connections.close_all()
+
+    @classmethod
+    def _lock_concurrency_key(cls, concurrency_key):
+        """
+        Locks the concurrency key until the end of the transaction.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [concurrency_key])
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Saves the heartbeat_at of a running job every settings.BACKGROUND_JOBS_HEARTBEAT_SECONDS until it is stopped.
+    """
+
+    def __init__(self, job_id):
+        super().__init__(daemon=True)
+        self.job_id = job_id
+        self._stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stopped.wait(settings.BACKGROUND_JOBS_HEARTBEAT_SECONDS):
+                try:
+                    BackgroundJob.objects.filter(id=self.job_id, status=BackgroundJob.STATUS_RUNNING).update(
+                        heartbeat_at=timezone.now()
+                    )
+                except DatabaseError:
+                    # Try again with a new connection on the next heartbeat.
+                    connections.close_all()
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
@@ -0,0 +1,63 @@
+import os
+import socket
+import time
+from django.conf import settings
+from django.db import close_old_connections
+from .job_runner import JobRunner
+
+
+class JobWorker:
+    """
+    Claims and runs queued BackgroundJobs until it is stopped. Started by the run_background_jobs command.
+    Any number of workers can run at once. Each host running workers must reach the database and share
+    the web server's MEDIA_ROOT, since the admin import jobs read their uploaded files from
+    settings.BACKGROUND_JOBS_FILES_DIR.
+    """
+
+    def __init__(self, name=None, poll_seconds=None, stdout=None):
+        """
+        Args:
+            name: The name recorded on the jobs the worker runs. Defaults to <hostname>:<pid>.
+            poll_seconds: Seconds to wait before checking for queued jobs again when none are found.
+            stdout: Where to write the jobs that are run.
+        """
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_seconds = settings.BACKGROUND_JOBS_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.stdout = stdout
+        self.is_stopping = False
+
+    def run(self, once=False):
+        """
+        Runs queued jobs.
+
+        Args:
+            once: Stop when there are no queued jobs left to claim.
+
+        Returns:
+            The number of jobs run.
+        """
+        job_count = 0
+        while not self.is_stopping:
+            close_old_connections()
+            job = JobRunner.claim(worker=self.name)
+            if job is None:
+                if once:
+                    break
+                time.sleep(self.poll_seconds)
+                continue
+
+            self._write(f"{self.name}: Running: {job}")
+            JobRunner.run(job)
+            self._write(f"{self.name}: Finished: {job}")
+            job_count += 1
+        return job_count
+
+    def stop(self):
+        """
+        Stops the worker after the running job finishes.
+        """
+        self.is_stopping = True
+
+    def _write(self, message):
+        if self.stdout:
+            self.stdout.write(message)
@@ -0,0 +1,45 @@
+from api.models import BackgroundJob
+from api.odk.exporters.entity_lists.entity_list_exporter import EntityListExporter
+from .job_runner import JobRunner
+
+
+class OdkExportEntityListsJob:
+    """
+    Exports the entity lists for an OdkProject. See: EntityListExporter
+
+    Only settings.BACKGROUND_JOBS_CONCURRENCY_LIMIT imports and exports run at once for each OdkProject.
+    """
+
+    @classmethod
+    def create(cls, odk_project, user=None):
+        """
+        Creates the job to export an OdkProject's entity lists.
+
+        Args:
+            odk_project: The OdkProject.
+            user: The user that started the export.
+
+        Returns:
+            The queued BackgroundJob.
+        """
+        return BackgroundJob.objects.create(
+            job_type=BackgroundJob.JOB_TYPE_ODK_EXPORT_ENTITY_LISTS,
+            name=f"ODK Export: {odk_project.name}",
+            args={'odk_projects': [odk_project.id]},
+            concurrency_key=BackgroundJob.concurrency_key_for(odk_project),
+            created_by=user
+        )
+
+    @classmethod
+    def run(cls, job, stdout, stderr):
+        odk_export_result = EntityListExporter(
+            odk_projects=job.args['odk_projects'],
+            background_job=job,
+            progress=lambda progress: JobRunner.update_progress(job, progress)
+        ).execute()
+        stdout.write('\n'.join(odk_export_result.info_log))
+        if odk_export_result.has_errors:
+            stderr.write('\n'.join(odk_export_result.errors))
+
+
+JobRunner.register(BackgroundJob.JOB_TYPE_ODK_EXPORT_ENTITY_LISTS, OdkExportEntityListsJob)
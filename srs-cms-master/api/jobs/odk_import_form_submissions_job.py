@@ -0,0 +1,46 @@
+from api.models import BackgroundJob
+from api.odk.importers.form_submissions.form_submission_importer import FromSubmissionImporter
+from .job_runner import JobRunner
+
+
+class OdkImportFormSubmissionsJob:
+    """
+    Imports the form submissions for an OdkProject. See: FromSubmissionImporter
+
+    Only settings.BACKGROUND_JOBS_CONCURRENCY_LIMIT imports and exports run at once for each OdkProject.
+    """
+
+    @classmethod
+    def create(cls, odk_project, user=None):
+        """
+        Creates the job to import an OdkProject's form submissions.
+
+        Args:
+            odk_project: The OdkProject.
+            user: The user that started the import.
+
+        Returns:
+            The queued BackgroundJob.
+        """
+        return BackgroundJob.objects.create(
+            job_type=BackgroundJob.JOB_TYPE_ODK_IMPORT_FORM_SUBMISSIONS,
+            name=f"ODK Import: {odk_project.name}",
+            args={'odk_projects': [odk_project.id]},
+            concurrency_key=BackgroundJob.concurrency_key_for(odk_project),
+            created_by=user
+        )
+
+    @classmethod
+    def run(cls, job, stdout, stderr):
+        odk_import_result = FromSubmissionImporter(
+            odk_projects=job.args['odk_projects'],
+            background_job=job,
+            progress=lambda progress: JobRunner.update_progress(job, progress),
+            # The progress of each page and the import stats are streamed to the job's output.
+            stdout=stdout
+        ).execute()
+        if odk_import_result.has_errors:
+            stderr.write('\n'.join(odk_import_result.errors))
+
+
+JobRunner.register(BackgroundJob.JOB_TYPE_ODK_IMPORT_FORM_SUBMISSIONS, OdkImportFormSubmissionsJob)
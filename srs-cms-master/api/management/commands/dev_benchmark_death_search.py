@@ -0,0 +1,157 @@
+import time
+import uuid
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from api.models import Event, Death, Province, Cluster, Area, Staff
+from client.views import DEATH_SEARCH_WEIGHTS, DEATH_SEARCH_MIN_SIMILARITY, death_search_threshold, search_deaths
+
+
+class Command(BaseCommand):
+    help = "Benchmark the deaths page text search with and without the search_document prefilter."
+
+    # The first page of results is compared to the results without the prefilter.
+    PAGE_SIZE = 10
+
+    class Rollback(Exception):
+        pass
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=1000000,
+            help='Number of synthetic Deaths to generate.'
+        )
+        parser.add_argument(
+            '--query',
+            type=str,
+            default=None,
+            help='The text to search for. Defaults to the name of one of the generated Deaths.'
+        )
+        parser.add_argument(
+            '--thresholds',
+            type=float,
+            nargs='+',
+            default=None,
+            help='The word similarity thresholds to benchmark the prefilter with. '
+                 'Defaults to the lowest threshold that keeps every match and DEATH_SEARCH_WORD_SIMILARITY_THRESHOLD.'
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Number of times to run each search.'
+        )
+        parser.add_argument(
+            '--keep',
+            default=False,
+            action='store_true',
+            help='Keep the generated Deaths. By default they are rolled back.'
+        )
+
+    def handle(self, *args, **kwargs):
+        try:
+            with transaction.atomic():
+                self._benchmark(kwargs['count'], kwargs['query'], kwargs['thresholds'], kwargs['runs'])
+                if not kwargs['keep']:
+                    raise self.Rollback()
+        except self.Rollback:
+            self.stdout.write('Generated Deaths rolled back.')
+
+    def _benchmark(self, count, query, thresholds, runs):
+        self.stdout.write(f"Generating {count:,} synthetic Deaths...")
+        started_at = time.perf_counter()
+        self._generate_deaths(count)
+        self.stdout.write(f"Generated in {time.perf_counter() - started_at:.2f}s")
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Event._meta.db_table}")
+            cursor.execute(f"ANALYZE {Death._meta.db_table}")
+
+        # Time maintaining the search documents for a page of imported deaths.
+        death_ids = list(Death.objects.order_by('-id').values_list('id', flat=True)[:100])
+        Death.objects.filter(id__in=death_ids).update(search_document=None)
+        started_at = time.perf_counter()
+        Death.objects.update_search_documents(death_ids=death_ids)
+        self.stdout.write(f"Search documents updated for 100 Deaths in {time.perf_counter() - started_at:.3f}s")
+
+        if query is None:
+            query = Death.objects.exclude(deceased_name=None).order_by('-id').values_list(
+                'deceased_name', flat=True).first()
+        self.stdout.write(f"Searching for: {query}")
+
+        if thresholds is None:
+            # The lowest threshold that keeps every death the weighted similarity matches.
+            thresholds = [DEATH_SEARCH_MIN_SIMILARITY / sum(weight for _, weight in DEATH_SEARCH_WEIGHTS),
+                          settings.DEATH_SEARCH_WORD_SIMILARITY_THRESHOLD]
+
+        scan_seconds, scan_ids = self._time(runs, lambda: self._search(query, prefilter=False))
+        scan_count = self._count(query, prefilter=False)
+        self.stdout.write(f"Similarity scan:                 {scan_seconds:.3f}s ({scan_count:,} matches)")
+
+        for threshold in thresholds:
+            with death_search_threshold(threshold):
+                prefilter_seconds, prefilter_ids = self._time(runs, lambda: self._search(query, prefilter=True))
+                prefilter_count = self._count(query, prefilter=True)
+            # The number of deaths on the first page without the prefilter that are still on it with the prefilter.
+            kept_count = len(set(scan_ids) & set(prefilter_ids))
+            self.stdout.write(
+                f"Prefilter at threshold {threshold:.3f}:  {prefilter_seconds:.3f}s ({prefilter_count:,} matches, "
+                f"{kept_count}/{len(scan_ids)} of the first page kept, "
+                f"speedup: {scan_seconds / prefilter_seconds:.2f}x)"
+            )
+
+    def _time(self, runs, func):
+        seconds = []
+        result = None
+        for _ in range(max(1, runs)):
+            started_at = time.perf_counter()
+            result = func()
+            seconds.append(time.perf_counter() - started_at)
+        return min(seconds), result
+
+    def _search(self, query, prefilter):
+        deaths = search_deaths(Death.objects.all(), query, prefilter=prefilter)
+        return list(deaths.values_list('id', flat=True)[:self.PAGE_SIZE])
+
+    def _count(self, query, prefilter):
+        return search_deaths(Death.objects.all(), query, prefilter=prefilter).count()
+
+    def _generate_deaths(self, count):
+        run_id = uuid.uuid4().hex[:8]
+        province = Province.objects.create(code=run_id[:2], name=f"Benchmark {run_id}")
+        cluster = Cluster.objects.create(province=province, code=f"B{run_id[:6]}", name=f"Benchmark {run_id}")
+        area = Area.objects.create(cluster=cluster, code=f"B{run_id}")
+        staff = Staff.objects.create(cluster=cluster, province=province, code=f"B{run_id[:6]}",
+                                     full_name=f"Benchmark {run_id}", staff_type=Staff.StaffType.VA)
+
+        # Names are made of syllables so trigram searches match a small number of rows.
+        syllables = "ARRAY['ka','lo','mi','zu','ne','ta','ri','bo','se','wu','fa','di']"
+        name_sql = " || ".join([f"({syllables})[1 + floor(random() * 12)::int]" for _ in range(4)])
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {Event._meta.db_table}
+                    (key, cluster_id, area_id, event_staff_id, event_type, household_head_name, respondent_name,
+                     created_at, updated_at)
+                SELECT %s || '-' || n, %s, %s, %s, %s, initcap({name_sql}) || ' ' || initcap({name_sql}),
+                       initcap({name_sql}) || ' ' || initcap({name_sql}), NOW(), NOW()
+                FROM generate_series(1, %s) n
+            """, [run_id, cluster.id, area.id, staff.id, Event.EventType.DEATH, count])
+            cursor.execute(f"""
+                INSERT INTO {Death._meta.db_table}
+                    (key, event_id, death_code, death_status, death_type, deceased_name, created_at, updated_at)
+                SELECT e.key, e.id, %s || LPAD(ROW_NUMBER() OVER (ORDER BY e.id)::text, 7, '0'), %s, %s,
+                       initcap({name_sql}) || ' ' || initcap({name_sql}), NOW(), NOW()
+                FROM {Event._meta.db_table} e
+                WHERE e.key LIKE %s
+            """, [run_id, Death.DeathStatus.NEW_DEATH, Death.DeathType.NORMAL, f"{run_id}-%"])
+            # Build the search documents with the same statement as update_search_documents while the
+            # search_document index is dropped. Updating every row with the index in place is much slower.
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute("DROP INDEX deaths_gin_search_document")
+            Death.objects.update_search_documents()
+            cursor.execute(f"""
+                CREATE INDEX deaths_gin_search_document ON {Death._meta.db_table}
+                USING gin (search_document gin_trgm_ops)
+            """)
@@ -0,0 +1,113 @@
+import os
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from api.dev.seeds.seed_loader import SeedLoader
+from api.models import EtlMapping
+from api.odk.etl import EtlMappingPlan
+from api.common import Utils, TypeCaster
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-record EtlMapping execution against the compiled EtlMappingPlan."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=50000,
+            help='Number of synthetic form submissions to map.'
+        )
+        parser.add_argument(
+            '--etl-file',
+            type=str,
+            default=os.path.join(SeedLoader('test').env_seeds_dir(), 'etl_mappings_events.json'),
+            help='ETL Document JSON file to load the mappings from. Defaults to the test Events mappings.'
+        )
+
+    def handle(self, *args, **kwargs):
+        count = kwargs['count']
+        etl_file = Utils.expand_path(kwargs['etl_file'])
+
+        etl_doc_json = Utils.load_json(etl_file)[0]
+        etl_mappings = [
+            EtlMapping(
+                source_name=m['source_name'],
+                target_name=m['target_name'],
+                target_type=m['target_type'],
+                default=m['default'],
+                transform=m['transform'],
+                is_primary_key=m['is_primary_key'],
+                is_enabled=m['is_enabled'],
+                is_required=m['is_required']
+            ) for m in etl_doc_json['mappings'] if m['is_enabled']
+        ]
+        etl_mappings.sort(key=lambda m: not m.is_primary_key)
+
+        self.stdout.write(f"Generating {count} synthetic form submissions for: {etl_doc_json['name']} "
+                          f"({len(etl_mappings)} mappings)...")
+        form_submissions = [self._generate_form_submission(etl_mappings) for _ in range(count)]
+
+        legacy_seconds = self._time(lambda: self._map_legacy(etl_mappings, form_submissions))
+        plan = EtlMappingPlan(etl_mappings)
+        plan_seconds = self._time(lambda: self._map_plan(plan, form_submissions))
+
+        self.stdout.write(f"EtlMapping:     {count / legacy_seconds:,.0f} records/sec ({legacy_seconds:.2f}s)")
+        self.stdout.write(f"EtlMappingPlan: {count / plan_seconds:,.0f} records/sec ({plan_seconds:.2f}s)")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {legacy_seconds / plan_seconds:.2f}x"))
+
+    def _time(self, func):
+        started_at = time.perf_counter()
+        func()
+        return time.perf_counter() - started_at
+
+    def _map_legacy(self, etl_mappings, form_submissions):
+        for form_submission in form_submissions:
+            record = {}
+            for etl_mapping in etl_mappings:
+                if etl_mapping.is_required and not etl_mapping.has_source_name(form_submission):
+                    break
+                value = etl_mapping.get_target_value(form_submission, cast=False, transform=False)
+                value = etl_mapping.cast_value(value)
+                if etl_mapping.transform:
+                    value = etl_mapping.transform_value(value)
+                record[etl_mapping.target_name] = value
+
+    def _map_plan(self, plan, form_submissions):
+        for form_submission in form_submissions:
+            record = {}
+            for etl_mapping in plan.mappings:
+                has_source_field, value = etl_mapping.resolve(form_submission)
+                if etl_mapping.is_required and not has_source_field:
+                    break
+                value = etl_mapping.cast_value(value)
+                if etl_mapping.transform:
+                    value = etl_mapping.transform_value(value)
+                record[etl_mapping.target_name] = value
+
+    def _generate_form_submission(self, etl_mappings):
+        values = {
+            TypeCaster.TypeCode.INT: 1,
+            TypeCaster.TypeCode.FLOAT: 1.5,
+            TypeCaster.TypeCode.STR: 'value',
+            TypeCaster.TypeCode.BOOL: True,
+            TypeCaster.TypeCode.DICT: {},
+            TypeCaster.TypeCode.LIST: [],
+            TypeCaster.TypeCode.DATE: '2025-01-01',
+            TypeCaster.TypeCode.DATETIME: '2025-01-01T12:00:00.000Z',
+        }
+        form_submission = {}
+        for etl_mapping in etl_mappings:
+            value = f"uuid:{uuid.uuid4()}" if etl_mapping.is_primary_key else values.get(etl_mapping.target_type)
+            last_obj = form_submission
+            props = etl_mapping.source_name.split('.')
+            for prop in props[:-1]:
+                last_obj = last_obj.setdefault(prop, {})
+            prop = props[-1]
+            if prop.endswith(']'):
+                prop, index = prop[:-1].rsplit('[', 1)
+                items = last_obj.setdefault(prop, [])
+                items.extend([value] * (int(index) + 1 - len(items)))
+            else:
+                last_obj[prop] = value
+        return form_submission
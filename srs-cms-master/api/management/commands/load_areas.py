@@ -2,7 +2,7 @@ import os
 import csv
 from django.core.management.base import BaseCommand
 from api.models import Area, Cluster
-from api.common import Utils
+from api.common import Utils, CsvBulkLoader
 
 
 class Command(BaseCommand):
@@ -20,88 +20,123 @@ class Command(BaseCommand):
             action='store_true',
             help='Print extra details.'
         )
+        parser.add_argument(
+            '--bulk',
+            default=False,
+            action='store_true',
+            help='Load the rows in chunks with bulk inserts and updates in one transaction.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Number of rows per chunk when loading in bulk.'
+        )
 
     def handle(self, *args, **kwargs):
         csv_file = Utils.expand_path(kwargs["csv_file"])
-        verbose = kwargs['verbose']
 
         if not os.path.exists(csv_file):
             self.stderr.write(self.style.ERROR(f"File not found: {csv_file}"))
             return
 
+        with open(csv_file, newline="", encoding="utf-8") as file:
+            self.load(file, verbose=kwargs['verbose'], bulk=kwargs['bulk'], chunk_size=kwargs['chunk_size'])
+
+    def load(self, file, verbose=False, bulk=False, chunk_size=5000):
+        """
+        Loads the rows from an open CSV file.
+        """
         try:
             self.stdout.write("Loading Areas...")
-            with open(csv_file, newline="", encoding="utf-8") as file:
-                reader = csv.DictReader(file)
+            reader = csv.DictReader(file)
+
+            expected_headers = [
+                "code", "cluster_code", "prov_text_code", "adm0_code", "adm0_name",
+                "adm1_code", "adm1_name", "adm2_code", "adm2_name",
+                "adm3_code", "adm3_name", "adm4_code", "adm4_name",
+                "adm5_code", "adm5_name", "urban_rural",
+                "carto_house_count", "carto_pop_count", "import_code",
+                "status", "comment"
+            ]
+            missing_headers = []
+            for header in expected_headers:
+                if header not in reader.fieldnames:
+                    missing_headers.append(header)
+            if missing_headers:
+                self.stderr.write(self.style.ERROR(f"Missing CSV headers: {', '.join(missing_headers)}"))
+                return
 
-                expected_headers = [
-                    "code", "cluster_code", "prov_text_code", "adm0_code", "adm0_name",
-                    "adm1_code", "adm1_name", "adm2_code", "adm2_name",
-                    "adm3_code", "adm3_name", "adm4_code", "adm4_name",
-                    "adm5_code", "adm5_name", "urban_rural",
-                    "carto_house_count", "carto_pop_count", "import_code",
-                    "status", "comment"
-                ]
-                missing_headers = []
-                for header in expected_headers:
-                    if header not in reader.fieldnames:
-                        missing_headers.append(header)
-                if missing_headers:
-                    self.stderr.write(self.style.ERROR(f"Missing CSV headers: {', '.join(missing_headers)}"))
-                    return
+            if bulk:
+                loader = CsvBulkLoader(
+                    Area,
+                    build=lambda row, references: self._new_area(row, references['cluster']),
+                    references={'cluster': ('cluster_code', Cluster)},
+                    update_fields=['cluster'],
+                    validate=lambda row, references: (
+                        None if references['cluster'] else f"Cluster not found: {row.get('cluster_code')}"),
+                    chunk_size=chunk_size
+                ).load(reader)
+                for error in loader.errors:
+                    self.stderr.write(self.style.ERROR(error))
+                self.stdout.write(self.style.SUCCESS(loader.summary('areas')))
+                return
 
-                total_loaded = 0
-                for row in reader:
-                    area_code = row.get("code")
-                    cluster_code = row.get("cluster_code")
+            total_loaded = 0
+            for row in reader:
+                area_code = row.get("code")
+                cluster_code = row.get("cluster_code")
 
-                    area = Area.find_by(code=area_code)
-                    cluster = Cluster.find_by(code=cluster_code)
+                area = Area.find_by(code=area_code)
+                cluster = Cluster.find_by(code=cluster_code)
 
-                    can_save = False
-                    if not cluster:
-                        self.stderr.write(self.style.ERROR(f"Cluster not found: {cluster_code}"))
-                    elif area and cluster and area.cluster == cluster:
+                can_save = False
+                if not cluster:
+                    self.stderr.write(self.style.ERROR(f"Cluster not found: {cluster_code}"))
+                elif area and cluster and area.cluster == cluster:
+                    if verbose:
+                        self.stdout.write(self.style.SUCCESS(f"Area exists: {area.code}"))
+                else:
+                    if not area:
+                        area = self._new_area(row, cluster)
+                        can_save = True
+                        if verbose:
+                            self.stdout.write(self.style.SUCCESS(f"Loading Area: {area.code}"))
+                    elif area.cluster != cluster:
+                        area.cluster = cluster
+                        can_save = True
                         if verbose:
-                            self.stdout.write(self.style.SUCCESS(f"Area exists: {area.code}"))
-                    else:
-                        if not area:
-                            area = Area(
-                                cluster=cluster,
-                                code=area_code,
-                                adm0_code=row.get("adm0_code"),
-                                adm0_name=row.get("adm0_name"),
-                                adm1_code=row.get("adm1_code"),
-                                adm1_name=row.get("adm1_name"),
-                                adm2_code=row.get("adm2_code"),
-                                adm2_name=row.get("adm2_name"),
-                                adm3_code=row.get("adm3_code"),
-                                adm3_name=row.get("adm3_name"),
-                                adm4_code=row.get("adm4_code"),
-                                adm4_name=row.get("adm4_name"),
-                                adm5_code=row.get("adm5_code"),
-                                adm5_name=row.get("adm5_name"),
-                                urban_rural=row.get("urban_rural"),
-                                carto_house_count=row.get("carto_house_count") or None,
-                                carto_pop_count=row.get("carto_pop_count") or None,
-                                import_code=row.get("import_code"),
-                                status=row.get("status") or None,
-                                comment=row.get("comment"),
-                                province_code=row.get("prov_text_code")
-                            )
-                            can_save = True
-                            if verbose:
-                                self.stdout.write(self.style.SUCCESS(f"Loading Area: {area.code}"))
-                        elif area.cluster != cluster:
-                            area.cluster = cluster
-                            can_save = True
-                            if verbose:
-                                self.stdout.write(self.style.SUCCESS(f"Updating Area Cluster: {cluster.code}"))
+                            self.stdout.write(self.style.SUCCESS(f"Updating Area Cluster: {cluster.code}"))
 
-                    if can_save:
-                        area.save()
-                        total_loaded += 1
+                if can_save:
+                    area.save()
+                    total_loaded += 1
 
-                self.stdout.write(self.style.SUCCESS(f"Loaded {total_loaded} areas."))
+            self.stdout.write(self.style.SUCCESS(f"Loaded {total_loaded} areas."))
         except Exception as ex:
             self.stderr.write(self.style.ERROR(f"An error occurred: {ex}"))
+
+    def _new_area(self, row, cluster):
+        return Area(
+            cluster=cluster,
+            code=row.get("code"),
+            adm0_code=row.get("adm0_code"),
+            adm0_name=row.get("adm0_name"),
+            adm1_code=row.get("adm1_code"),
+            adm1_name=row.get("adm1_name"),
+            adm2_code=row.get("adm2_code"),
+            adm2_name=row.get("adm2_name"),
+            adm3_code=row.get("adm3_code"),
+            adm3_name=row.get("adm3_name"),
+            adm4_code=row.get("adm4_code"),
+            adm4_name=row.get("adm4_name"),
+            adm5_code=row.get("adm5_code"),
+            adm5_name=row.get("adm5_name"),
+            urban_rural=row.get("urban_rural"),
+            carto_house_count=row.get("carto_house_count") or None,
+            carto_pop_count=row.get("carto_pop_count") or None,
+            import_code=row.get("import_code"),
+            status=row.get("status") or None,
+            comment=row.get("comment"),
+            province_code=row.get("prov_text_code")
+        )
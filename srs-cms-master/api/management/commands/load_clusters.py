@@ -2,7 +2,7 @@ import os
 import csv
 from django.core.management.base import BaseCommand
 from api.models import Cluster, Province
-from api.common import Utils
+from api.common import Utils, CsvBulkLoader
 
 
 class Command(BaseCommand):
@@ -20,67 +20,102 @@ class Command(BaseCommand):
             action='store_true',
             help='Print extra details.'
         )
+        parser.add_argument(
+            '--bulk',
+            default=False,
+            action='store_true',
+            help='Load the rows in chunks with bulk inserts and updates in one transaction.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Number of rows per chunk when loading in bulk.'
+        )
 
     def handle(self, *args, **kwargs):
         csv_file = Utils.expand_path(kwargs["csv_file"])
-        verbose = kwargs['verbose']
 
         if not os.path.exists(csv_file):
             self.stderr.write(self.style.ERROR(f"File not found: {csv_file}"))
             return
 
+        with open(csv_file, newline="", encoding="utf-8") as file:
+            self.load(file, verbose=kwargs['verbose'], bulk=kwargs['bulk'], chunk_size=kwargs['chunk_size'])
+
+    def load(self, file, verbose=False, bulk=False, chunk_size=5000):
+        """
+        Loads the rows from an open CSV file.
+        """
         try:
             self.stdout.write("Loading Clusters...")
-            with open(csv_file, newline="", encoding="utf-8") as file:
-                reader = csv.DictReader(file)
+            reader = csv.DictReader(file)
+
+            expected_headers = [
+                "code",
+                "name",
+                "province_code"
+            ]
+            missing_headers = []
+            for header in expected_headers:
+                if header not in reader.fieldnames:
+                    missing_headers.append(header)
+            if missing_headers:
+                self.stderr.write(self.style.ERROR(f"Missing CSV headers: {', '.join(missing_headers)}"))
+                return
 
-                expected_headers = [
-                    "code",
-                    "name",
-                    "province_code"
-                ]
-                missing_headers = []
-                for header in expected_headers:
-                    if header not in reader.fieldnames:
-                        missing_headers.append(header)
-                if missing_headers:
-                    self.stderr.write(self.style.ERROR(f"Missing CSV headers: {', '.join(missing_headers)}"))
-                    return
+            if bulk:
+                loader = CsvBulkLoader(
+                    Cluster,
+                    build=lambda row, references: self._new_cluster(row, references['province']),
+                    references={'province': ('province_code', Province)},
+                    update_fields=['province'],
+                    validate=lambda row, references: (
+                        None if references['province'] else f"Province not found: {row.get('province_code')}"),
+                    chunk_size=chunk_size
+                ).load(reader)
+                for error in loader.errors:
+                    self.stderr.write(self.style.ERROR(error))
+                self.stdout.write(self.style.SUCCESS(loader.summary('clusters')))
+                return
 
-                total_loaded = 0
-                for row in reader:
-                    cluster_code = row.get("code")
-                    province_code = row.get("province_code")
+            total_loaded = 0
+            for row in reader:
+                cluster_code = row.get("code")
+                province_code = row.get("province_code")
 
-                    cluster = Cluster.find_by(code=cluster_code)
-                    province = Province.find_by(code=province_code)
+                cluster = Cluster.find_by(code=cluster_code)
+                province = Province.find_by(code=province_code)
 
-                    can_save = False
-                    if not province:
-                        self.stderr.write(self.style.ERROR(f"Province not found: {province_code}"))
-                    elif cluster and province and cluster.province == province:
+                can_save = False
+                if not province:
+                    self.stderr.write(self.style.ERROR(f"Province not found: {province_code}"))
+                elif cluster and province and cluster.province == province:
+                    if verbose:
+                        self.stdout.write(self.style.SUCCESS(f"Cluster exists: {cluster.code}"))
+                else:
+                    if not cluster:
+                        cluster = self._new_cluster(row, province)
+                        can_save = True
+                        if verbose:
+                            self.stdout.write(self.style.SUCCESS(f"Loading Cluster: {cluster.code}"))
+                    elif cluster.province != province:
+                        cluster.province = province
+                        can_save = True
                         if verbose:
-                            self.stdout.write(self.style.SUCCESS(f"Cluster exists: {cluster.code}"))
-                    else:
-                        if not cluster:
-                            cluster = Cluster(
-                                province=province,
-                                code=cluster_code,
-                                name=row.get("name")
-                            )
-                            can_save = True
-                            if verbose:
-                                self.stdout.write(self.style.SUCCESS(f"Loading Cluster: {cluster.code}"))
-                        elif cluster.province != province:
-                            cluster.province = province
-                            can_save = True
-                            if verbose:
-                                self.stdout.write(self.style.SUCCESS(f"Updating Cluster Province: {province.code}"))
+                            self.stdout.write(self.style.SUCCESS(f"Updating Cluster Province: {province.code}"))
 
-                    if can_save:
-                        cluster.save()
-                        total_loaded += 1
+                if can_save:
+                    cluster.save()
+                    total_loaded += 1
 
-                self.stdout.write(self.style.SUCCESS(f"Loaded {total_loaded} clusters."))
+            self.stdout.write(self.style.SUCCESS(f"Loaded {total_loaded} clusters."))
         except Exception as ex:
             self.stderr.write(self.style.ERROR(f"An error occurred: {ex}"))
+
+    def _new_cluster(self, row, province):
+        return Cluster(
+            province=province,
+            code=row.get("code"),
+            name=row.get("name")
+        )
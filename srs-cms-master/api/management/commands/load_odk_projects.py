@@ -92,7 +92,9 @@ class Command(BaseCommand):
                                 odk_entity_list_exporter = odk_entity_list.odk_entity_list_exporters.create(
                                     exporter=exporter,
                                     is_enabled=odk_entity_list_exporter_json['is_enabled'],
-                                    etl_document=etl_doc
+                                    etl_document=etl_doc,
+                                    source_model=odk_entity_list_exporter_json.get('source_model'),
+                                    source_filter=odk_entity_list_exporter_json.get('source_filter')
                                 )
                                 verbose and self.stdout.write(
                                     f"Loaded OdkEntityListExporter: {odk_entity_list_exporter.exporter}"
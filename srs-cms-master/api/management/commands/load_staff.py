@@ -2,7 +2,7 @@ import os
 import csv
 from django.core.management.base import BaseCommand
 from api.models import Staff, Cluster, Province
-from api.common import Utils
+from api.common import Utils, CsvBulkLoader
 
 
 class Command(BaseCommand):
@@ -20,93 +20,136 @@ class Command(BaseCommand):
             action='store_true',
             help='Print extra details.'
         )
+        parser.add_argument(
+            '--bulk',
+            default=False,
+            action='store_true',
+            help='Load the rows in chunks with bulk inserts and updates in one transaction.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Number of rows per chunk when loading in bulk.'
+        )
 
     def handle(self, *args, **kwargs):
         csv_file = Utils.expand_path(kwargs["csv_file"])
-        verbose = kwargs['verbose']
 
         if not os.path.exists(csv_file):
             self.stderr.write(self.style.ERROR(f"File not found: {csv_file}"))
             return
 
+        with open(csv_file, newline="", encoding="utf-8") as file:
+            self.load(file, verbose=kwargs['verbose'], bulk=kwargs['bulk'], chunk_size=kwargs['chunk_size'])
+
+    def load(self, file, verbose=False, bulk=False, chunk_size=5000):
+        """
+        Loads the rows from an open CSV file.
+        """
         try:
             self.stdout.write("Loading staff...")
-            with open(csv_file, newline="", encoding="utf-8") as file:
-                reader = csv.DictReader(file)
-
-                expected_headers = [
-                    "code",
-                    "cluster_code",
-                    "province_code",
-                    "staff_type_id",
-                    "full_name",
-                    "title",
-                    "mobile_per",
-                    "email",
-                    "cms_status",
-                    "comment"
-                ]
-                missing_headers = []
-                for header in expected_headers:
-                    if header not in reader.fieldnames:
-                        missing_headers.append(header)
-                if missing_headers:
-                    self.stderr.write(self.style.ERROR(f"Missing CSV headers: {', '.join(missing_headers)}"))
-                    return
-
-                total_loaded = 0
-                for row in reader:
-                    staff_code = row["code"]
-                    staff_type = Staff.StaffType(row.get("staff_type_id"))
-                    cluster_code = row.get("cluster_code")
-                    province_code = row.get("province_code")
-
-                    staff = Staff.find_by(code=staff_code)
-                    cluster = Cluster.find_by(code=cluster_code)
-                    province = Province.find_by(code=province_code)
-
-                    can_save = False
-                    if staff_type == Staff.StaffType.VA and not province:
-                        self.stderr.write(self.style.ERROR(f"Province not found: {province_code}"))
-                    elif staff_type == Staff.StaffType.CSA and not cluster:
-                        self.stderr.write(self.style.ERROR(f"Cluster not found: {cluster_code}"))
-                    elif staff and staff.cluster == cluster and staff.province == province:
+            reader = csv.DictReader(file)
+
+            expected_headers = [
+                "code",
+                "cluster_code",
+                "province_code",
+                "staff_type_id",
+                "full_name",
+                "title",
+                "mobile_per",
+                "email",
+                "cms_status",
+                "comment"
+            ]
+            missing_headers = []
+            for header in expected_headers:
+                if header not in reader.fieldnames:
+                    missing_headers.append(header)
+            if missing_headers:
+                self.stderr.write(self.style.ERROR(f"Missing CSV headers: {', '.join(missing_headers)}"))
+                return
+
+            if bulk:
+                loader = CsvBulkLoader(
+                    Staff,
+                    build=lambda row, references: self._new_staff(row, references['cluster'],
+                                                                  references['province']),
+                    references={'cluster': ('cluster_code', Cluster), 'province': ('province_code', Province)},
+                    update_fields=['cluster', 'province'],
+                    validate=self._validate_bulk_row,
+                    chunk_size=chunk_size
+                ).load(reader)
+                for error in loader.errors:
+                    self.stderr.write(self.style.ERROR(error))
+                self.stdout.write(self.style.SUCCESS(loader.summary('staff')))
+                return
+
+            total_loaded = 0
+            for row in reader:
+                staff_code = row["code"]
+                staff_type = Staff.StaffType(row.get("staff_type_id"))
+                cluster_code = row.get("cluster_code")
+                province_code = row.get("province_code")
+
+                staff = Staff.find_by(code=staff_code)
+                cluster = Cluster.find_by(code=cluster_code)
+                province = Province.find_by(code=province_code)
+
+                can_save = False
+                if staff_type == Staff.StaffType.VA and not province:
+                    self.stderr.write(self.style.ERROR(f"Province not found: {province_code}"))
+                elif staff_type == Staff.StaffType.CSA and not cluster:
+                    self.stderr.write(self.style.ERROR(f"Cluster not found: {cluster_code}"))
+                elif staff and staff.cluster == cluster and staff.province == province:
+                    if verbose:
+                        self.stdout.write(self.style.SUCCESS(f"Staff exists: {staff.code}"))
+                else:
+                    if not staff:
+                        staff = self._new_staff(row, cluster, province)
+                        can_save = True
                         if verbose:
-                            self.stdout.write(self.style.SUCCESS(f"Staff exists: {staff.code}"))
-                    else:
-                        if not staff:
-                            staff = Staff(
-                                cluster=cluster,
-                                province=province,
-                                code=staff_code,
-                                staff_type=staff_type,
-                                full_name=row.get("full_name"),
-                                title=row.get("title"),
-                                mobile_per=row.get("mobile_per"),
-                                email=row.get("email"),
-                                cms_status=row.get("cms_status"),
-                                comment=row.get("comment")
-                            )
+                            self.stdout.write(self.style.SUCCESS(f"Loading Cluster: {cluster.code}"))
+                    elif staff.cluster != cluster or staff.province != province:
+                        if staff.cluster != cluster:
+                            staff.cluster = cluster
+                            can_save = True
+                            if verbose:
+                                self.stdout.write(self.style.SUCCESS(f"Updating Staff Cluster: {cluster.code}"))
+
+                        if staff.province != province:
+                            staff.province = province
                             can_save = True
                             if verbose:
-                                self.stdout.write(self.style.SUCCESS(f"Loading Cluster: {cluster.code}"))
-                        elif staff.cluster != cluster or staff.province != province:
-                            if staff.cluster != cluster:
-                                staff.cluster = cluster
-                                can_save = True
-                                if verbose:
-                                    self.stdout.write(self.style.SUCCESS(f"Updating Staff Cluster: {cluster.code}"))
-
-                            if staff.province != province:
-                                staff.province = province
-                                can_save = True
-                                if verbose:
-                                    self.stdout.write(self.style.SUCCESS(f"Updating Staff Province: {province.code}"))
-
-                    if can_save:
-                        staff.save()
-                        total_loaded += 1
-
-                self.stdout.write(self.style.SUCCESS(f"Loaded {total_loaded} staff."))
+                                self.stdout.write(self.style.SUCCESS(f"Updating Staff Province: {province.code}"))
+
+                if can_save:
+                    staff.save()
+                    total_loaded += 1
+
+            self.stdout.write(self.style.SUCCESS(f"Loaded {total_loaded} staff."))
         except Exception as ex:
             self.stderr.write(self.style.ERROR(f"An error occurred: {ex}"))
+
+    def _new_staff(self, row, cluster, province):
+        return Staff(
+            cluster=cluster,
+            province=province,
+            code=row["code"],
+            staff_type=Staff.StaffType(row.get("staff_type_id")),
+            full_name=row.get("full_name"),
+            title=row.get("title"),
+            mobile_per=row.get("mobile_per"),
+            email=row.get("email"),
+            cms_status=row.get("cms_status"),
+            comment=row.get("comment")
+        )
+
+    def _validate_bulk_row(self, row, references):
+        staff_type = Staff.StaffType(row.get("staff_type_id"))
+        if staff_type == Staff.StaffType.VA and not references['province']:
+            return f"Province not found: {row.get('province_code')}"
+        elif staff_type == Staff.StaffType.CSA and not references['cluster']:
+            return f"Cluster not found: {row.get('cluster_code')}"
+        return None
@@ -1,6 +1,7 @@
 import sys
 from django.core.management.base import BaseCommand
 from api.odk.exporters.entity_lists.entity_list_exporter import EntityListExporter
+from api.odk.exporters.entity_lists.entity_list_exporter_base import EntityListExporterBase
 
 
 class Command(BaseCommand):
@@ -34,6 +35,19 @@ class Command(BaseCommand):
             help='Path to save each exported file.'
         )
 
+        parser.add_argument(
+            '--full-sync',
+            default=False,
+            action='store_true',
+            help='Export all the Entities instead of only the Entities that changed since the last export.'
+        )
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Number of OdkEntityLists to export concurrently. Defaults to ODK_EXPORT_WORKERS.'
+        )
+
         parser.add_argument(
             '--verbose',
             default=False,
@@ -46,6 +60,8 @@ class Command(BaseCommand):
         odk_entity_lists_ids = kwargs['entity_lists']
         exporters = kwargs['exporters']
         out_dir = kwargs['out_dir']
+        export_mode = EntityListExporterBase.EXPORT_MODE_FULL if kwargs['full_sync'] else None
+        workers = kwargs['workers']
         verbose = kwargs['verbose']
 
         odk_export_result = EntityListExporter(
@@ -53,6 +69,8 @@ class Command(BaseCommand):
             odk_entity_lists=odk_entity_lists_ids,
             exporters=exporters,
             out_dir=out_dir,
+            export_mode=export_mode,
+            workers=workers,
             verbose=verbose
         ).execute()
 
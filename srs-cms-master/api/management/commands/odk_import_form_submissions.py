@@ -3,6 +3,7 @@ import argparse
 from datetime import datetime
 from django.core.management.base import BaseCommand
 from api.odk.importers.form_submissions.form_submission_importer import FromSubmissionImporter
+from api.odk.importers.form_submissions.form_submission_importer_base import FromSubmissionImporterBase
 
 
 class Command(BaseCommand):
@@ -59,7 +60,28 @@ class Command(BaseCommand):
         parser.add_argument(
             '--out-dir',
             type=str,
-            help='Path to save each imported file from ODK.'
+            help='Path to save each imported file from ODK and the full import result.'
+        )
+
+        parser.add_argument(
+            '--bulk',
+            default=False,
+            action='store_true',
+            help='Save each page of form submissions with bulk_create in a single transaction.'
+        )
+
+        parser.add_argument(
+            '--engine',
+            type=str,
+            choices=FromSubmissionImporterBase.ENGINES,
+            help='Save each page with the ORM or COPY it into a staging table and insert it with SQL. '
+                 'Defaults to ODK_IMPORT_ENGINE.'
+        )
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Number of OdkForms to import concurrently. Defaults to ODK_IMPORT_WORKERS.'
         )
 
         parser.add_argument(
@@ -77,6 +99,9 @@ class Command(BaseCommand):
         out_dir = kwargs['out_dir']
         start_date = kwargs['start_date']
         end_date = kwargs['end_date']
+        bulk_import = kwargs['bulk']
+        engine = kwargs['engine']
+        workers = kwargs['workers']
         verbose = kwargs['verbose']
 
         odk_import_result = FromSubmissionImporter(
@@ -87,6 +112,9 @@ class Command(BaseCommand):
             import_start_date=start_date,
             import_end_date=end_date,
             out_dir=out_dir,
+            bulk_import=bulk_import,
+            engine=engine,
+            workers=workers,
             verbose=verbose
         ).execute()
 
@@ -0,0 +1,71 @@
+import multiprocessing
+import signal
+from django.core.management.base import BaseCommand
+from django.db import connections
+from api.jobs import JobWorker
+
+
+class Command(BaseCommand):
+    help = "Run the queued background jobs. Used with BACKGROUND_JOBS_RUNNER=worker (the default)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of worker processes to start.'
+        )
+        parser.add_argument(
+            '--poll-seconds',
+            type=float,
+            default=None,
+            help='Seconds between checks for queued jobs. Defaults to BACKGROUND_JOBS_POLL_SECONDS.'
+        )
+        parser.add_argument(
+            '--once',
+            default=False,
+            action='store_true',
+            help='Exit when there are no queued jobs left to run.'
+        )
+
+    def handle(self, *args, **kwargs):
+        workers = max(1, kwargs['workers'])
+        poll_seconds = kwargs['poll_seconds']
+        once = kwargs['once']
+
+        if workers == 1:
+            self._run_worker(poll_seconds, once)
+            return
+
+        # Each worker process opens its own database connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(target=self._run_worker_process, args=(poll_seconds, once), daemon=False)
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+
+        def _stop(signum, frame):
+            for p in processes:
+                if p.is_alive():
+                    p.terminate()
+
+        signal.signal(signal.SIGTERM, _stop)
+        for process in processes:
+            process.join()
+
+    def _run_worker(self, poll_seconds, once):
+        worker = JobWorker(poll_seconds=poll_seconds, stdout=self.stdout)
+        # Finish the running job before exiting.
+        signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+        self.stdout.write(f"Started Worker: {worker.name}")
+        job_count = worker.run(once=once)
+        self.stdout.write(self.style.SUCCESS(f"Stopped Worker: {worker.name} (Jobs: {job_count})"))
+
+    def _run_worker_process(self, poll_seconds, once):
+        try:
+            self._run_worker(poll_seconds, once)
+        finally:
+            connections.close_all()
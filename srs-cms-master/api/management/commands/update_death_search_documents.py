@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from api.models import Death
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search_document for all the Deaths."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Number of Deaths to update per statement.'
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+
+        self.stdout.write("Updating Death search documents...")
+        updated_count = 0
+        death_ids = []
+        for death_id in Death.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=batch_size):
+            death_ids.append(death_id)
+            if len(death_ids) >= batch_size:
+                updated_count += Death.objects.update_search_documents(death_ids=death_ids)
+                death_ids = []
+                self.stdout.write(f"Updated Deaths: {updated_count}")
+        if death_ids:
+            updated_count += Death.objects.update_search_documents(death_ids=death_ids)
+        self.stdout.write(self.style.SUCCESS(f"Updated Deaths: {updated_count}"))
@@ -1,8 +1,9 @@
 from .models import (User, OdkProject,
-                     OdkEntityList, OdkEntityListExporter, OdkEntityListExporterJob,
+                     OdkEntityList, OdkEntityListExporter, OdkEntityListExporterJob, OdkEntity,
                      OdkForm, OdkFormImporter, OdkFormImporterJob,
                      EtlDocument, EtlMapping,
                      Staff, Province, Area, Cluster)
-from .events import (Event, Baby, Death)
+from .events import (Event, Baby, Death, DeathCodeSequence)
 from .households import (Household, HouseholdMember)
 from .verbal_autopsies import (VerbalAutopsy)
+from .background_jobs import (BackgroundJob)
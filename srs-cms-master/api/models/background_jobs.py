@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.db import models
+from api.models.decorators import db_timestamps
+from api.models.query_extensions import QueryExtensionMixin
+
+
+@db_timestamps
+class BackgroundJob(QueryExtensionMixin, models.Model):
+    """
+    A long running job that is run outside the request. See: api.jobs.JobRunner
+    """
+    JOB_TYPE_ADMIN_IMPORT_FILE = 'ADMIN_IMPORT_FILE'
+    JOB_TYPE_ODK_IMPORT_FORM_SUBMISSIONS = 'ODK_IMPORT_FORM_SUBMISSIONS'
+    JOB_TYPE_ODK_EXPORT_ENTITY_LISTS = 'ODK_EXPORT_ENTITY_LISTS'
+
+    JOB_TYPE_CHOICES = [
+        (JOB_TYPE_ADMIN_IMPORT_FILE, 'Admin Import File'),
+        (JOB_TYPE_ODK_IMPORT_FORM_SUBMISSIONS, 'ODK Import Form Submissions'),
+        (JOB_TYPE_ODK_EXPORT_ENTITY_LISTS, 'ODK Export Entity Lists'),
+    ]
+
+    STATUS_QUEUED = 'QUEUED'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_SUCCESSFUL = 'SUCCESSFUL'
+    STATUS_ERRORED = 'ERRORED'
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCESSFUL, 'Successful'),
+        (STATUS_ERRORED, 'Errored'),
+    ]
+
+    job_type = models.CharField(max_length=50, null=False, choices=JOB_TYPE_CHOICES, help_text="The type of job.")
+    name = models.CharField(max_length=255, null=False, help_text="Description of the job.")
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        null=False,
+        blank=False,
+        default=STATUS_QUEUED,
+        help_text="Status of the job."
+    )
+    args = models.JSONField(null=True, blank=True, help_text="Arguments for the job.")
+    concurrency_key = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        help_text="Jobs with the same key are limited to BACKGROUND_JOBS_CONCURRENCY_LIMIT running at once."
+    )
+    worker = models.CharField(max_length=255, null=True, blank=True, help_text="The worker that ran the job.")
+    progress = models.FloatField(null=False, default=0, help_text="Fraction of the job completed, from 0 to 1.")
+    output = models.TextField(null=False, blank=True, default='', help_text="Output of the job.")
+    error_output = models.TextField(null=False, blank=True, default='', help_text="Error output of the job.")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='background_jobs',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        help_text='The user that created the job.'
+    )
+    started_at = models.DateTimeField(null=True, blank=True, help_text="When the job started running.")
+    ended_at = models.DateTimeField(null=True, blank=True, help_text="When the job finished running.")
+    heartbeat_at = models.DateTimeField(null=True, blank=True,
+                                        help_text="When the running job last reported it was still running.")
+
+    class Meta:
+        db_table = 'background_jobs'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='background_jobs_status'),
+            models.Index(fields=['concurrency_key', 'status'], name='background_jobs_concurrency'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}: {self.status} ({self.id})"
+
+    @property
+    def is_queued(self):
+        return self.status == self.STATUS_QUEUED
+
+    @property
+    def is_finished(self):
+        return self.status in [self.STATUS_SUCCESSFUL, self.STATUS_ERRORED]
+
+    @property
+    def progress_percent(self):
+        return round((self.progress or 0) * 100)
+
+    @classmethod
+    def concurrency_key_for(cls, model):
+        """
+        Gets the concurrency key for the jobs that work on a model (e.g., an OdkProject).
+        """
+        return f"{model._meta.db_table}:{model.pk}"
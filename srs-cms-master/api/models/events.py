@@ -1,8 +1,15 @@
-from django.db import models, IntegrityError
+import json
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, connection, transaction, IntegrityError
+from django.db.models import Count, Q, prefetch_related_objects
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.contrib.postgres.indexes import GinIndex
 from api.models.decorators import db_timestamps
 from api.models.query_extensions import QueryExtensionMixin
-from api.common.type_caster import TypeCaster
+from api.models.models import Cluster, Area, Staff
 
 
 @db_timestamps
@@ -269,6 +276,143 @@ class Baby(QueryExtensionMixin, models.Model):
         return f" {self.name} ({self.id})"
 
 
+class DeathManager(models.Manager):
+    STATUS_COUNTS_CACHE_KEY = 'deaths:status_counts'
+    STATUS_COUNTS_VERSION_CACHE_KEY = 'deaths:status_counts:version'
+
+    def status_counts(self, queryset=None):
+        """
+        Counts the deaths for each death_status with a single aggregate query.
+
+        Args:
+            queryset: The Death queryset to count. Defaults to all deaths.
+
+        Returns:
+            Dict of counts by death_status.
+        """
+        queryset = self.all() if queryset is None else queryset
+        counts = queryset.aggregate(**{
+            'status_{}'.format(status.value): Count('id', filter=Q(death_status=status))
+            for status in Death.DeathStatus
+        })
+        return {status: counts['status_{}'.format(status.value)] for status in Death.DeathStatus}
+
+    def estimated_status_counts(self, queryset=None):
+        """
+        Estimates the status_counts from the query planner's row estimates instead of counting the deaths.
+        The estimates come from the table statistics (pg_class.reltuples and the column statistics)
+        so they are only as accurate as the last ANALYZE.
+
+        Args:
+            queryset: The Death queryset to estimate. Defaults to all deaths.
+
+        Returns:
+            Dict of estimated counts by death_status.
+        """
+        queryset = self.all() if queryset is None else queryset
+        return {status: self.estimated_count(queryset.filter(death_status=status)) for status in Death.DeathStatus}
+
+    def estimated_count(self, queryset=None):
+        """
+        Gets the query planner's estimate of the number of deaths in a queryset.
+
+        Args:
+            queryset: The Death queryset to estimate. Defaults to all deaths.
+
+        Returns:
+            The estimated count.
+        """
+        queryset = self.all() if queryset is None else queryset
+        sql, params = queryset.order_by().values('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def cached_status_counts(self, province_id=None):
+        """
+        Gets the status_counts for all deaths or a province from the cache.
+        The cached counts are invalidated when a Death is saved or deleted.
+
+        Args:
+            province_id: The ID of the Province to count the deaths for.
+
+        Returns:
+            Dict of counts by death_status.
+        """
+        version = cache.get_or_set(self.STATUS_COUNTS_VERSION_CACHE_KEY, time.time_ns, timeout=None)
+        cache_key = '{}:{}:{}'.format(self.STATUS_COUNTS_CACHE_KEY, version, province_id or 'all')
+        counts = cache.get(cache_key)
+        if counts is None:
+            queryset = self.filter(event__cluster__province_id=province_id) if province_id else self.all()
+            counts = self.status_counts(queryset)
+            cache.set(cache_key, counts, timeout=settings.DEATH_STATUS_COUNTS_CACHE_SECONDS)
+        return counts
+
+    def invalidate_status_counts(self):
+        """
+        Invalidates all the cached status_counts.
+        Call this after changing deaths without sending the model signals (e.g., bulk_create, update).
+        """
+        cache.set(self.STATUS_COUNTS_VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+
+    def update_search_documents(self, death_ids=None, event_ids=None, staff_ids=None, area_ids=None):
+        """
+        Updates the search_document for deaths with a single statement.
+        The search_document is the text of the fields searched on the deaths page.
+        It is the same as Death.build_search_document.
+
+        Args:
+            death_ids: Only update these deaths.
+            event_ids: Only update the deaths for these events.
+            staff_ids: Only update the deaths with these VA or event Staff.
+            area_ids: Only update the deaths for the events in these Areas.
+
+        Returns:
+            The number of deaths updated.
+        """
+        where_sql = ''
+        params = []
+        if death_ids is not None:
+            where_sql += ' AND d.id = ANY(%s)'
+            params.append(list(death_ids))
+        if event_ids is not None:
+            where_sql += ' AND d.event_id = ANY(%s)'
+            params.append(list(event_ids))
+        if staff_ids is not None:
+            where_sql += ' AND (d.va_staff_id = ANY(%s) OR e.event_staff_id = ANY(%s))'
+            params += [list(staff_ids), list(staff_ids)]
+        if area_ids is not None:
+            where_sql += ' AND e.area_id = ANY(%s)'
+            params.append(list(area_ids))
+
+        sql = f"""
+            UPDATE {Death._meta.db_table} d
+            SET search_document = s.search_document
+            FROM (
+                SELECT d.id, CONCAT_WS(' ',
+                                       d.death_code,
+                                       (SELECT vs.code FROM {Staff._meta.db_table} vs WHERE vs.id = d.va_staff_id),
+                                       es.code,
+                                       a.code,
+                                       e.household_head_name,
+                                       d.deceased_name,
+                                       e.respondent_name) AS search_document
+                FROM {Death._meta.db_table} d
+                JOIN {Event._meta.db_table} e ON e.id = d.event_id
+                JOIN {Staff._meta.db_table} es ON es.id = e.event_staff_id
+                JOIN {Area._meta.db_table} a ON a.id = e.area_id
+                WHERE TRUE{where_sql}
+            ) s
+            WHERE d.id = s.id AND d.search_document IS DISTINCT FROM s.search_document
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+
 @db_timestamps
 class Death(QueryExtensionMixin, models.Model):
     class DeathType(models.IntegerChoices):
@@ -322,6 +466,10 @@ class Death(QueryExtensionMixin, models.Model):
     match_err = models.IntegerField(blank=True, null=True)
     created_by = models.IntegerField(blank=True, null=True)
     updated_by = models.IntegerField(blank=True, null=True)
+    # The text searched on the deaths page. Set by save(). See: build_search_document
+    search_document = models.TextField(blank=True, null=True, editable=False)
+
+    objects = DeathManager()
 
     class Meta:
         managed = True
@@ -333,15 +481,72 @@ class Death(QueryExtensionMixin, models.Model):
             # For text search.
             GinIndex(fields=['death_code'], name='deaths_gin_death_code', opclasses=['gin_trgm_ops']),
             GinIndex(fields=['deceased_name'], name='events_gin_deceased_name', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['search_document'], name='deaths_gin_search_document', opclasses=['gin_trgm_ops']),
+            # For keyset pagination of the death lists.
+            models.Index(fields=['death_status', 'deceased_dod', 'id'], name='deaths_status_dod_id'),
         ]
 
     def __str__(self):
         return f"{self.death_code} - {self.DeathType(self.death_type).label}  ({self.id})"
 
+    # The fields in the search_document for each model. See: build_search_document
+    SEARCH_DOCUMENT_FIELDS = {'death_code', 'va_staff', 'va_staff_id', 'deceased_name', 'event', 'event_id'}
+    SEARCH_DOCUMENT_EVENT_FIELDS = {'event_staff', 'event_staff_id', 'area', 'area_id',
+                                    'household_head_name', 'respondent_name'}
+    SEARCH_DOCUMENT_STAFF_FIELDS = {'code'}
+    SEARCH_DOCUMENT_AREA_FIELDS = {'code'}
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if updates_search_document(update_fields, self.SEARCH_DOCUMENT_FIELDS):
+            self.search_document = self.build_search_document()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'search_document'}
+        super().save(*args, **kwargs)
+
+    def build_search_document(self):
+        """
+        Gets the text of the fields searched on the deaths page.
+        This is the same as DeathManager.update_search_documents.
+
+        Returns:
+            The search document.
+        """
+        event = self.event
+        values = [
+            self.death_code,
+            self.va_staff.code if self.va_staff_id else None,
+            event.event_staff.code,
+            event.area.code,
+            event.household_head_name,
+            self.deceased_name,
+            event.respondent_name
+        ]
+        return ' '.join(str(value) for value in values if value is not None)
+
+    @classmethod
+    def set_search_documents(cls, deaths):
+        """
+        Sets the search_document for deaths that are saved without save() (e.g., bulk_create).
+        The related Events, Staff and Areas are loaded with one query per model.
+
+        Args:
+            deaths: List of Deaths with their event set.
+
+        Returns:
+            None
+        """
+        events = [death.event for death in deaths]
+        prefetch_related_objects(events, 'event_staff', 'area')
+        prefetch_related_objects([death for death in deaths if death.va_staff_id], 'va_staff')
+        for death in deaths:
+            death.search_document = death.build_search_document()
+
     def save_with_death_code(self, force_new_id=False):
         """
         Generate a unique death_code and saves self.
-        This will attempt to insert the record and use the death_code unique constraint to retry until successful.
+        The death_code is allocated from the DeathCodeSequence for the event's cluster.
+        If the death_code already exists (e.g., it was set manually) the next death_code is allocated.
 
         death_code format:
             self.event.cluster.code + sequential number(left padded to 4 characters with '0')
@@ -363,22 +568,50 @@ class Death(QueryExtensionMixin, models.Model):
         attempt_number = 0
         while attempt_number <= max_attempts:
             attempt_number += 1
-            last_cluster_death = Death.objects.filter(
-                death_code__istartswith=cluster_code
-            ).order_by('-death_code').first()
-
-            next_id = 1
-            if last_cluster_death:
-                next_id = TypeCaster.to_int(last_cluster_death.death_code[-4:]) + 1
-
-            self.death_code = '{}{}'.format(cluster_code, str(next_id).rjust(4, '0'))
+            next_id = DeathCodeSequence.reserve({cluster_code: 1})[cluster_code][0]
+            self.death_code = self.format_death_code(cluster_code, next_id)
             try:
-                self.save()
+                # A savepoint so the next death_code can be tried when called in a transaction.
+                with transaction.atomic():
+                    self.save()
                 return True
             except IntegrityError:
                 continue
         return False
 
+    @classmethod
+    def assign_death_codes(cls, deaths):
+        """
+        Sets the death_code for each Death without a death_code.
+        The death_codes for all the clusters are reserved with one statement so a batch of deaths
+        can be saved together (e.g., with bulk_create).
+
+        Args:
+            deaths: List of Deaths with their event set.
+
+        Returns:
+            None
+        """
+        deaths = [death for death in deaths if not death.death_code]
+        if not deaths:
+            return
+
+        cluster_ids = {death.event.cluster_id for death in deaths}
+        cluster_codes = dict(Cluster.objects.filter(id__in=cluster_ids).values_list('id', 'code'))
+        counts = {}
+        for death in deaths:
+            cluster_code = cluster_codes[death.event.cluster_id]
+            counts[cluster_code] = counts.get(cluster_code, 0) + 1
+
+        reserved_ids = {cluster_code: iter(ids) for cluster_code, ids in DeathCodeSequence.reserve(counts).items()}
+        for death in deaths:
+            cluster_code = cluster_codes[death.event.cluster_id]
+            death.death_code = cls.format_death_code(cluster_code, next(reserved_ids[cluster_code]))
+
+    @classmethod
+    def format_death_code(cls, cluster_code, sequence_number):
+        return '{}{}'.format(cluster_code, str(sequence_number).rjust(4, '0'))
+
     def set_va_completed(self, verbal_autopsy=None, save=True):
         """
         Updates VA fields from the linked VerbalAutopsy.
@@ -401,6 +634,119 @@ class Death(QueryExtensionMixin, models.Model):
             self.save()
 
 
+def updates_search_document(update_fields, search_document_fields):
+    """
+    Gets if a save with update_fields can change the search_document of deaths.
+
+    Args:
+        update_fields: The update_fields of the save. None when all the fields are saved.
+        search_document_fields: The fields of the saved model that are in the search_document.
+
+    Returns:
+        True if the search_document needs to be updated.
+    """
+    return update_fields is None or not search_document_fields.isdisjoint(update_fields)
+
+
+@receiver([post_save, post_delete], sender=Death)
+def invalidate_death_status_counts(sender, **kwargs):
+    Death.objects.invalidate_status_counts()
+
+
+@receiver(post_save, sender=Event)
+def update_event_deaths_search_documents(sender, instance, created, update_fields=None, **kwargs):
+    if not created and updates_search_document(update_fields, Death.SEARCH_DOCUMENT_EVENT_FIELDS):
+        Death.objects.update_search_documents(event_ids=[instance.id])
+
+
+@receiver(post_save, sender=Staff)
+def update_staff_deaths_search_documents(sender, instance, created, update_fields=None, **kwargs):
+    if not created and updates_search_document(update_fields, Death.SEARCH_DOCUMENT_STAFF_FIELDS):
+        Death.objects.update_search_documents(staff_ids=[instance.id])
+
+
+@receiver(post_save, sender=Area)
+def update_area_deaths_search_documents(sender, instance, created, update_fields=None, **kwargs):
+    if not created and updates_search_document(update_fields, Death.SEARCH_DOCUMENT_AREA_FIELDS):
+        Death.objects.update_search_documents(area_ids=[instance.id])
+
+
+@db_timestamps
+class DeathCodeSequence(QueryExtensionMixin, models.Model):
+    """
+    The last death_code sequence number allocated for each Cluster.
+    """
+    cluster_code = models.CharField(max_length=12, null=False, unique=True)
+    last_value = models.IntegerField(null=False, default=0)
+
+    class Meta:
+        managed = True
+        db_table = 'death_code_sequences'
+
+    def __str__(self):
+        return f"{self.cluster_code}: {self.last_value}"
+
+    @classmethod
+    def reserve(cls, counts):
+        """
+        Reserves blocks of death_code sequence numbers for clusters.
+        A cluster without a sequence is first seeded from the highest death_code already in the deaths table
+        for the cluster. The sequences are then incremented with one UPDATE.
+
+        Args:
+            counts: Dict of the number of sequence numbers to reserve by cluster code.
+
+        Returns:
+            Dict of the reserved sequence numbers (range) by cluster code.
+        """
+        # Lock the sequences in a consistent order so concurrent reservations cannot deadlock.
+        cluster_codes = sorted(code for code, count in counts.items() if count > 0)
+        if not cluster_codes:
+            return {}
+
+        values_sql = ', '.join(['(%s::varchar, %s::integer)'] * len(cluster_codes))
+        params = [param for code in cluster_codes for param in (code, counts[code])]
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Only the missing clusters scan the deaths table for their highest death_code.
+            cursor.execute(f"""
+                WITH requested (cluster_code, count) AS (VALUES {values_sql})
+                INSERT INTO {cls._meta.db_table} (cluster_code, last_value, created_at, updated_at)
+                SELECT r.cluster_code,
+                       COALESCE((
+                           SELECT MAX(CAST(SUBSTRING(d.death_code FROM LENGTH(r.cluster_code) + 1) AS integer))
+                           FROM {Death._meta.db_table} d
+                           WHERE LEFT(d.death_code, LENGTH(r.cluster_code)) = r.cluster_code
+                             AND SUBSTRING(d.death_code FROM LENGTH(r.cluster_code) + 1) ~ '^[0-9]+$'
+                       ), 0),
+                       NOW(),
+                       NOW()
+                FROM requested r
+                WHERE NOT EXISTS (SELECT 1 FROM {cls._meta.db_table} s WHERE s.cluster_code = r.cluster_code)
+                ORDER BY r.cluster_code
+                ON CONFLICT (cluster_code) DO NOTHING
+            """, params)
+
+            if len(cluster_codes) > 1:
+                cursor.execute(f"""
+                    SELECT id FROM {cls._meta.db_table}
+                    WHERE cluster_code IN ({', '.join(['%s'] * len(cluster_codes))})
+                    ORDER BY cluster_code
+                    FOR UPDATE
+                """, cluster_codes)
+
+            cursor.execute(f"""
+                UPDATE {cls._meta.db_table} s
+                SET last_value = s.last_value + r.count,
+                    updated_at = NOW()
+                FROM (VALUES {values_sql}) AS r (cluster_code, count)
+                WHERE s.cluster_code = r.cluster_code
+                RETURNING s.cluster_code, s.last_value
+            """, params)
+            rows = cursor.fetchall()
+
+        return {code: range(last_value - counts[code] + 1, last_value + 1) for code, last_value in rows}
+
+
 @db_timestamps
 class Pregnancy(QueryExtensionMixin, models.Model):
     event = models.ForeignKey(
@@ -6,8 +6,11 @@ from api.models.query_extensions import QueryExtensionMixin
 from api.odk.importers.form_submissions.form_submission_importer_factory import FromSubmissionImporterFactory
 from api.odk.exporters.entity_lists.entity_list_exporter_factory import EntityListExporterFactory
 from api.odk.transformers import TransformField
+from api.odk.etl import EtlMappingPlan
 from api.common import Utils, TypeCaster, Permissions
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, Group, Permission
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
 
 
 @db_timestamps
@@ -18,6 +21,24 @@ class User(QueryExtensionMixin, AbstractUser):
         db_table = 'users'
 
 
+@receiver(m2m_changed, sender=User.provinces.through)
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_permission_scopes(sender, **kwargs):
+    Permissions.invalidate_scopes()
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_permission_scopes(sender, update_fields=None, **kwargs):
+    # Logging in only updates last_login.
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        Permissions.invalidate_scopes()
+
+
 @db_timestamps
 class EtlDocument(QueryExtensionMixin, models.Model):
     name = models.TextField(
@@ -44,6 +65,43 @@ class EtlDocument(QueryExtensionMixin, models.Model):
     def __str__(self):
         return f"{self.name} - {self.version} ({self.id})"
 
+    def get_mapping_plan(self, refresh=False):
+        """
+        Gets the compiled EtlMappingPlan for the enabled EtlMappings.
+        The plan is built once and cached on this instance.
+
+        Args:
+            refresh: True to rebuild the plan from the database.
+
+        Returns:
+            EtlMappingPlan
+        """
+        if refresh or getattr(self, '_mapping_plan', None) is None:
+            self._mapping_plan = EtlMappingPlan.from_etl_document(self)
+        return self._mapping_plan
+
+    def get_mapping_errors(self):
+        """
+        Gets the errors that prevent the EtlMappings from being used to import or export.
+
+        Returns:
+            List of error messages.
+        """
+        etl_mappings = self.get_mapping_plan().etl_mappings
+        if not etl_mappings:
+            return ['ETL Document Mappings not set or enabled. {}: {} ({})'.format(
+                self.__class__.__name__,
+                self.name,
+                self.id
+            )]
+        elif not [m for m in etl_mappings if m.is_primary_key]:
+            return ['ETL Document Mappings does not have primary key(s) set.. {}: {} ({})'.format(
+                self.__class__.__name__,
+                self.name,
+                self.id
+            )]
+        return []
+
 
 @db_timestamps
 class EtlMapping(QueryExtensionMixin, models.Model):
@@ -291,6 +349,18 @@ class OdkFormImporterJob(QueryExtensionMixin, models.Model):
                                              help_text="The form submission start date and time this importer last loaded.")
     import_end_date = models.DateTimeField(null=True, blank=False,
                                            help_text="The form submission end date and time this importer last loaded.")
+    last_submission_date = models.DateTimeField(null=True, blank=True,
+                                                help_text="The submission date of the newest form submission loaded.")
+    last_submission_id = models.CharField(max_length=255, null=True, blank=True,
+                                          help_text="The __id of the newest form submission loaded.")
+    background_job = models.ForeignKey(
+        'BackgroundJob',
+        related_name='odk_form_importer_jobs',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        help_text='The background job that ran this job.'
+    )
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -370,6 +440,17 @@ class OdkEntityListExporter(QueryExtensionMixin, models.Model):
         null=False,
         choices=EntityListExporterFactory.ODK_EXPORTERS_CHOICES,
         help_text='Exporter class for the Entity List.')
+    source_model = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        help_text='The model to export (e.g., api.Household). Used by the ModelEntityListExporter.'
+    )
+    source_filter = models.JSONField(
+        null=True,
+        blank=True,
+        help_text='Queryset filter for the source_model (e.g., {"cms_status": 1}).'
+    )
     is_enabled = models.BooleanField(
         default=False,
         help_text='Enable/Disable this exporter.'
@@ -407,6 +488,14 @@ class OdkEntityListExporterJob(QueryExtensionMixin, models.Model):
     )
 
     export_date = models.DateTimeField(null=False, blank=False, help_text="The date/time this exporter last ran.")
+    background_job = models.ForeignKey(
+        'BackgroundJob',
+        related_name='odk_entity_list_exporter_jobs',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        help_text='The background job that ran this job.'
+    )
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -424,15 +513,49 @@ class OdkEntityListExporterJob(QueryExtensionMixin, models.Model):
         return f"{self.odk_entity_list_exporter.exporter}: {self.status} ({self.id})"
 
 
+@db_timestamps
+class OdkEntity(QueryExtensionMixin, models.Model):
+    """
+    An Entity last exported to an ODK Entity List. Used to only export the changed Entities.
+    """
+    odk_entity_list = models.ForeignKey(
+        OdkEntityList,
+        related_name='odk_entities',
+        null=False,
+        on_delete=models.CASCADE,
+        help_text='Foreign key to ODK Entity List.'
+    )
+    label = models.CharField(max_length=255, null=False, help_text="The label the Entity is matched by.")
+    uuid = models.CharField(max_length=255, null=False, help_text="The ODK Entity ID.")
+    record_hash = models.CharField(max_length=64, null=False, help_text="Hash of the exported Entity data.")
+    odk_entity_list_exporter_job = models.ForeignKey(
+        OdkEntityListExporterJob,
+        related_name='odk_entities',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        help_text='The job that last exported the Entity.'
+    )
+
+    class Meta:
+        db_table = 'odk_entities'
+        constraints = [models.UniqueConstraint(fields=['odk_entity_list', 'label'],
+                                               name='unique_odk_entities_odk_entity_list_label')]
+
+    def __str__(self):
+        return f"{self.label} ({self.uuid})"
+
+
 class ProvinceManager(models.Manager):
     def for_user(self, user):
         """
         Returns provinces the user is allowed to view.
         """
-        if user.is_superuser or Permissions.has_permission(user, Permissions.Codes.VIEW_ALL_PROVINCES):
+        province_ids = Permissions.get_scope(user)['province_ids']
+        if province_ids is None:
             return self.all()
-        elif Permissions.has_permission(user, Permissions.Codes.VIEW_ASSIGNED_PROVINCES):
-            return self.filter(id__in=user.provinces.values_list('id', flat=True))
+        elif province_ids:
+            return self.filter(id__in=province_ids)
         else:
             return self.none()
 
@@ -1 +1,2 @@
 from .odk_config import OdkConfig
+from .odk_client_pool import OdkClientPool
@@ -0,0 +1,2 @@
+from .compiled_etl_mapping import CompiledEtlMapping
+from .etl_mapping_plan import EtlMappingPlan
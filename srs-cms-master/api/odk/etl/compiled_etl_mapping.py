@@ -0,0 +1,64 @@
+from api.common import FieldPath, TypeCaster
+from api.odk.transformers import TransformField
+
+
+class CompiledEtlMapping:
+    """
+    Pre-parsed form of an EtlMapping.
+
+    The source_name path, TypeCaster function and transformer are resolved once so the mapping
+    can be applied to many records without re-parsing it for every record.
+    This has the same interface as EtlMapping so it can be passed to the importer hooks in its place.
+    """
+
+    def __init__(self, etl_mapping):
+        self.etl_mapping = etl_mapping
+        self.id = etl_mapping.id
+        self.source_name = etl_mapping.source_name
+        self.target_name = etl_mapping.target_name
+        self.target_type = etl_mapping.target_type
+        self.default = etl_mapping.default
+        self.transform = etl_mapping.transform
+        self.is_primary_key = etl_mapping.is_primary_key
+        self.is_enabled = etl_mapping.is_enabled
+        self.is_required = etl_mapping.is_required
+        self.source_path = FieldPath.get(self.source_name)
+        self._cast = TypeCaster.get(self.target_type)
+        self._transform_field = TransformField.get(self.transform) if self.transform else None
+
+    def __str__(self):
+        return str(self.etl_mapping)
+
+    def resolve(self, obj):
+        """
+        Gets if the source_name exists and its raw value from a record.
+
+        Args:
+            obj: The record to get the value from.
+
+        Returns:
+            Tuple (has_source_name, value).
+        """
+        return self.source_path.resolve(obj, default=self.default)
+
+    def get_target_value(self, obj, cast=False, transform=False):
+        value = self.source_path.get_value(obj, default=self.default)
+        if cast:
+            value = self.cast_value(value)
+        if transform:
+            value = self.transform_value(value)
+        return value
+
+    def cast_value(self, value, transform=False):
+        value = self._cast(value, default=self.default)
+        if transform:
+            value = self.transform_value(value)
+        return value
+
+    def transform_value(self, value):
+        if self._transform_field is not None:
+            value = self._transform_field.transform(value)
+        return value
+
+    def has_source_name(self, obj):
+        return self.source_path.has_value(obj)
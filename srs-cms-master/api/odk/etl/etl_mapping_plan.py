@@ -0,0 +1,183 @@
+import re
+from django.core.exceptions import FieldDoesNotExist
+from api.common import FieldPath, TypeCaster
+from api.odk.etl.compiled_etl_mapping import CompiledEtlMapping
+
+
+class EtlMappingPlan:
+    """
+    Compiled set of EtlMappings for an EtlDocument.
+
+    This is built once per EtlDocument and executed for each record being imported or exported.
+    """
+    # Django's get_FOO_display() methods, which only read the FOO field.
+    _DISPLAY_METHOD_REGEX = re.compile(r'^get_(\w+)_display$')
+
+    def __init__(self, etl_mappings, source_root=None):
+        self.mappings = [m if isinstance(m, CompiledEtlMapping) else CompiledEtlMapping(m) for m in etl_mappings]
+        self.primary_key_mappings = [m for m in self.mappings if m.is_primary_key]
+        self.primary_key_names = [m.target_name for m in self.primary_key_mappings]
+        self.source_root = source_root
+        self.source_root_path = FieldPath.get(source_root) if source_root else None
+        self._by_source_name = {m.source_name: m for m in self.mappings}
+        self._by_target_name = {m.target_name: m for m in self.mappings}
+        self._model_projections = {}
+
+    @classmethod
+    def from_etl_document(cls, etl_document):
+        """
+        Builds the plan from the enabled EtlMappings of an EtlDocument ordered by is_primary_key.
+
+        Args:
+            etl_document: The EtlDocument to build the plan for.
+
+        Returns:
+            EtlMappingPlan
+        """
+        etl_mappings = etl_document.etl_mappings.filter(is_enabled=True).order_by('-is_primary_key')
+        return cls(etl_mappings, source_root=etl_document.source_root)
+
+    @property
+    def etl_mappings(self):
+        """
+        Gets the EtlMapping models the plan was built from.
+        """
+        return [m.etl_mapping for m in self.mappings]
+
+    def get_mapping_for(self, source_name=None, target_name=None):
+        """
+        Gets the CompiledEtlMapping for a source_name and/or target_name.
+
+        Args:
+            source_name: The source_name to find the mapping by.
+            target_name: The target_name to find the mapping by.
+
+        Returns:
+            CompiledEtlMapping or None.
+        """
+        if source_name is not None:
+            mapping = self._by_source_name.get(source_name)
+            if mapping is not None and target_name is not None and mapping.target_name != target_name:
+                mapping = None
+        elif target_name is not None:
+            mapping = self._by_target_name.get(target_name)
+        else:
+            mapping = self.mappings[0] if self.mappings else None
+        return mapping
+
+    def get_records(self, obj):
+        """
+        Gets the records to map from an object using the source_root.
+
+        Args:
+            obj: The object (e.g., an ODK form submission) to get the records from.
+
+        Returns:
+            List of records.
+        """
+        if self.source_root_path is None:
+            return [obj]
+        has_source_root, value = self.source_root_path.resolve(obj)
+        if not has_source_root:
+            return []
+        return TypeCaster.to_list(value) or []
+
+    def get_primary_keys(self, model):
+        """
+        Gets the primary key values from a model.
+
+        Args:
+            model: The model to get the primary key values from.
+
+        Returns:
+            Tuple (primary key kwargs, True if all primary key values are set).
+        """
+        if not self.primary_key_names:
+            raise ValueError('Primary key mappings not defined for: {}'.format(model.__class__))
+
+        pk_kwargs = {pk_name: getattr(model, pk_name, None) for pk_name in self.primary_key_names}
+        all_pks_set = all(pk_kwargs.values())
+        return pk_kwargs, all_pks_set
+
+    def get_model_projection(self, model_class):
+        """
+        Infers the related models to join and the fields to load to map instances of a Django model
+        from the source_name paths. Each forward foreign key in a path is joined and only the fields
+        at the end of the paths are loaded. All the fields of a model are loaded when a path calls a
+        method or reads an attribute that is not a field on it (e.g., event.formatted_gps_coordinates()).
+
+        Args:
+            model_class: The Django model class the mappings are run against.
+
+        Returns:
+            Tuple (select_related names, only field names).
+        """
+        if model_class not in self._model_projections:
+            related_models = {'': model_class}
+            field_names = set()
+            all_field_prefixes = set()
+
+            for mapping in self.mappings:
+                current_model, prefix = model_class, ''
+                segments = mapping.source_path.segments
+                for position, (key, index, method) in enumerate(segments):
+                    if method is not None:
+                        display_match = self._DISPLAY_METHOD_REGEX.match(method[0] or '')
+                        field = self._get_model_field(current_model, display_match.group(1)) if display_match else None
+                        if field is not None and field.concrete and not field.is_relation:
+                            field_names.add(prefix + field.name)
+                        else:
+                            all_field_prefixes.add(prefix)
+                        break
+
+                    field = self._get_model_field(current_model, key) if index is None else None
+                    if field is None:
+                        all_field_prefixes.add(prefix)
+                        break
+
+                    name = prefix + field.name
+                    if field.is_relation and field.concrete and (field.many_to_one or field.one_to_one):
+                        field_names.add(name)
+                        current_model, prefix = field.related_model, name + '__'
+                        related_models[name] = current_model
+                        if position == len(segments) - 1:
+                            # The path gets the related model itself.
+                            all_field_prefixes.add(prefix)
+                    elif field.concrete and not field.is_relation:
+                        field_names.add(name)
+                        break
+                    else:
+                        # Reverse and many to many relations are not joined.
+                        break
+
+            for prefix in all_field_prefixes:
+                related_model = related_models[prefix[:-2]] if prefix else model_class
+                field_names.update(prefix + f.name for f in related_model._meta.concrete_fields)
+
+            select_related = sorted(name for name in related_models if name)
+            self._model_projections[model_class] = (select_related, sorted(field_names))
+        return self._model_projections[model_class]
+
+    def apply_model_projection(self, queryset):
+        """
+        Joins the related models and defers the fields the mappings do not use.
+
+        Args:
+            queryset: The QuerySet of the models the mappings are run against.
+
+        Returns:
+            QuerySet
+        """
+        select_related, field_names = self.get_model_projection(queryset.model)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if field_names:
+            queryset = queryset.only(*field_names)
+        return queryset
+
+    @classmethod
+    def _get_model_field(cls, model_class, name):
+        try:
+            return model_class._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
@@ -1,24 +1,46 @@
 from api.common import Utils
+from django.conf import settings
 import traceback
 
 
 class EntityListExportResult:
-    def __init__(self):
+    """
+    Collects the results of an Entity List export.
+
+    Exported models are counted and tracked by id so large exports do not keep every model instance in memory.
+    Only the first max_samples are kept in exported_models.
+    """
+
+    def __init__(self, max_samples=None):
+        # The maximum number of exported models to keep.
+        self.max_samples = max_samples if max_samples is not None else settings.ODK_IMPORT_RESULT_MAX_SAMPLES
         # The OdkEntityLists exported.
         self.exported_entity_lists = []
-        # The Database Models exported (Death, etc.)
+        # Sample of the Database Models exported (Death, etc.)
         self.exported_models = []
+        # The number of Database Models exported by model class name.
+        self.exported_model_counts = {}
         # Export process info message log.
         self.info_log = []
         # Export process error message log.
         self.errors = []
+        # ODK client constructions and logins during the run (see OdkClientPool).
+        self.odk_client_stats = {}
+        self._exported_model_ids = set()
+
+    @property
+    def exported_models_count(self):
+        return sum(self.exported_model_counts.values())
 
     def as_json(self):
         json = {
             "exported_entity_lists": [],
             "exported_models": [],
+            "exported_models_count": self.exported_models_count,
+            "exported_model_counts": self.exported_model_counts,
             "info_log": self.info_log,
-            "errors": self.errors
+            "errors": self.errors,
+            "odk_client_stats": self.odk_client_stats
         }
         for entity_list in self.exported_entity_lists:
             id = entity_list if isinstance(entity_list, str) else entity_list.id
@@ -59,8 +81,13 @@ class EntityListExportResult:
     def merge(self, other_result):
         for exported_entity_list in other_result.exported_entity_lists:
             self.add_exported_entity_list(exported_entity_list, console=False)
+        new_model_ids = other_result._exported_model_ids - self._exported_model_ids
         for exported_model in other_result.exported_models:
-            self.add_exported_model(exported_model, console=False)
+            if (exported_model.__class__.__name__, exported_model.pk) in new_model_ids:
+                self._add_sample(self.exported_models, exported_model)
+        for model_id in new_model_ids:
+            self._exported_model_ids.add(model_id)
+            self.exported_model_counts[model_id[0]] = self.exported_model_counts.get(model_id[0], 0) + 1
         for info in other_result.info_log:
             self.info(info, console=False)
         for error in other_result.errors:
@@ -83,7 +110,14 @@ class EntityListExportResult:
     def add_exported_model(self, model, console=False):
         models = Utils.to_list(model)
         for model in models:
-            if model not in self.exported_models:
-                self.exported_models.append(model)
+            model_id = (model.__class__.__name__, model.pk)
+            if model_id not in self._exported_model_ids:
+                self._exported_model_ids.add(model_id)
+                self.exported_model_counts[model_id[0]] = self.exported_model_counts.get(model_id[0], 0) + 1
+                self._add_sample(self.exported_models, model)
             if console:
                 self.info('Exported {}: (id: {})'.format(model.__class__.__name__, model.id), console=console)
+
+    def _add_sample(self, samples, item):
+        if self.max_samples is None or len(samples) < self.max_samples:
+            samples.append(item)
@@ -1,29 +1,43 @@
 from api.common import Utils
 from api.models import OdkProject, OdkEntityList, OdkEntityListExporterJob
-from api.odk import OdkConfig
+from api.odk import OdkConfig, OdkClientPool
 from api.odk.exporters.entity_lists.entity_list_exporter_factory import EntityListExporterFactory
 from api.odk.exporters.entity_lists.entity_list_export_result import EntityListExportResult
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from django.db import models
+from django.conf import settings
+from django.db import models, connections
 
 
 class EntityListExporter:
-    def __init__(self, odk_projects=None, odk_entity_lists=None, exporters=None, out_dir=None, verbose=False):
+    def __init__(self, odk_projects=None, odk_entity_lists=None, exporters=None, out_dir=None, export_mode=None,
+                 workers=None, background_job=None, progress=None, verbose=False):
         self.odk_config = None
         self.client = None
         self.odk_projects = Utils.to_list(odk_projects)
         self.odk_entity_lists = Utils.to_list(odk_entity_lists)
         self.only_exporters = Utils.to_list(exporters)
         self.out_dir = Utils.expand_path(out_dir) if out_dir else None
+        # 'delta' or 'full'. Defaults to settings.ODK_ENTITY_LIST_EXPORT_MODE.
+        self.export_mode = export_mode
+        # The number of OdkEntityLists to export concurrently. Defaults to settings.ODK_EXPORT_WORKERS.
+        self.workers = max(1, workers or settings.ODK_EXPORT_WORKERS)
+        # The BackgroundJob running the export. It is set on each OdkEntityListExporterJob.
+        self.background_job = background_job
+        # Function(fraction) called with the fraction of the OdkEntityLists exported.
+        self.progress = progress
+        self._entity_list_count = 0
+        self._exported_entity_list_count = 0
         self.verbose = verbose is True
         self.result = EntityListExportResult()
         self._exporter_started_at = Utils.to_aware_datetime(datetime.now())
 
     def execute(self):
+        odk_client_stats = OdkClientPool.stats()
         try:
             self.result.info('Exporting ODK Entity Lists...', console=True)
             self.odk_config = OdkConfig.from_env()
-            self.client = self.odk_config.client()
+            self.client = OdkClientPool.get_client(self.odk_config)
 
             _exporters = self.only_exporters
             self.only_exporters = []
@@ -38,17 +52,21 @@ class EntityListExporter:
                 if not self.odk_projects and not self.odk_entity_lists:
                     self.odk_projects = list(OdkProject.filter_by(is_enabled=True).values_list('id', flat=True))
 
+                odk_entity_lists = []
                 if self.odk_projects:
                     for odk_project in self.odk_projects:
-                        self._export_project(odk_project)
+                        odk_entity_lists.extend(self._get_project_entity_list_ids(odk_project))
 
                 if self.odk_entity_lists:
-                    for odk_entity_list in self.odk_entity_lists:
-                        self._export_entity_list(odk_entity_list)
+                    odk_entity_lists.extend(self.odk_entity_lists)
+
+                self._entity_list_count = len(odk_entity_lists)
+                self._export_entity_lists(odk_entity_lists)
 
         except Exception as ex:
             self.result.error('Error Executing ODK Entity List Exporter.', error=ex, console=True)
         finally:
+            self.result.odk_client_stats = OdkClientPool.stats_since(odk_client_stats)
             self._show_export_stats()
             return self.result
 
@@ -62,20 +80,21 @@ class EntityListExporter:
         else:
             self.result.info('Entity List export completed successfully.', console=True)
 
-        exported_model_stats = {}
-        for exported_model in self.result.exported_models:
-            class_name = exported_model.__class__.__name__
-            if class_name not in exported_model_stats:
-                exported_model_stats[class_name] = 0
-            exported_model_stats[class_name] += 1
-
         self.result.info("", console=True)
         self.result.info('Total Exported Entity Lists: {}'.format(len(self.result.exported_entity_lists)), console=True)
-        self.result.info('Total Exported Models: {}'.format(len(self.result.exported_models)), console=True)
-        for class_name, count in exported_model_stats.items():
+        self.result.info('Total Exported Models: {}'.format(self.result.exported_models_count), console=True)
+        for class_name, count in self.result.exported_model_counts.items():
             self.result.info(' - {}: Exported: {}'.format(class_name, count), console=True)
 
-    def _export_project(self, odk_project):
+        self.result.info('ODK Clients: Constructed: {} Logins: {}'.format(
+            self.result.odk_client_stats.get(OdkClientPool.STAT_CLIENT_CONSTRUCTIONS, 0),
+            self.result.odk_client_stats.get(OdkClientPool.STAT_LOGINS, 0)
+        ), console=True)
+
+    def _get_project_entity_list_ids(self, odk_project):
+        """
+        Gets the enabled OdkEntityList IDs to export for an OdkProject.
+        """
         odk_project = odk_project if isinstance(odk_project, OdkProject) else OdkProject.find_by(id=odk_project)
 
         if not odk_project:
@@ -87,31 +106,56 @@ class EntityListExporter:
                 'Exporting ODK Entity Lists for Project: {} (id: {})'.format(odk_project.name, odk_project.id),
                 console=True)
 
-            odk_entity_lists_ids = odk_project.odk_entity_lists.filter(is_enabled=True).values_list('id', flat=True)
+            return list(odk_project.odk_entity_lists.filter(is_enabled=True).values_list('id', flat=True))
+        return []
+
+    def _export_entity_lists(self, odk_entity_lists):
+        """
+        Exports each OdkEntityList. When workers is greater than 1 the OdkEntityLists are exported concurrently.
+        """
+        if self.workers == 1:
+            for odk_entity_list in odk_entity_lists:
+                self.result.merge(self._export_entity_list(odk_entity_list))
+                self._report_progress()
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for entity_list_result in executor.map(self._export_entity_list_in_thread, odk_entity_lists):
+                    self.result.merge(entity_list_result)
+                    self._report_progress()
+
+    def _export_entity_list_in_thread(self, odk_entity_list):
+        try:
+            return self._export_entity_list(odk_entity_list)
+        finally:
+            # Each thread has its own database connection.
+            connections.close_all()
 
-            for odk_entity_lists_id in odk_entity_lists_ids:
-                self._export_entity_list(odk_entity_lists_id)
+    def _report_progress(self):
+        self._exported_entity_list_count += 1
+        if self.progress and self._entity_list_count:
+            self.progress(min(self._exported_entity_list_count / self._entity_list_count, 1))
 
     def _export_entity_list(self, odk_entity_list):
+        result = EntityListExportResult()
         odk_entity_list = odk_entity_list if isinstance(odk_entity_list, OdkEntityList) else OdkEntityList.find_by(
             id=odk_entity_list)
         odk_project = odk_entity_list.odk_project
 
         if not odk_project or not odk_entity_list:
             if not odk_project:
-                self.result.error('OdkProject not found: {}'.format(odk_project), console=True)
+                result.error('OdkProject not found: {}'.format(odk_project), console=True)
             if not odk_entity_list:
-                self.result.error('OdkEntity List not found: {}'.format(odk_entity_list), console=True)
+                result.error('OdkEntity List not found: {}'.format(odk_entity_list), console=True)
         elif odk_project and (not odk_project.is_enabled or not odk_entity_list.is_enabled):
             if not odk_project.is_enabled:
-                self.result.error('OdkProject not enabled: {} (id: {})'.format(odk_project.name, odk_project.id),
-                                  console=True)
+                result.error('OdkProject not enabled: {} (id: {})'.format(odk_project.name, odk_project.id),
+                             console=True)
             if not odk_entity_list.is_enabled:
-                self.result.error(
+                result.error(
                     'OdkEntityList not not enabled: {} (id: {})'.format(odk_entity_list.name, odk_entity_list.id),
                     console=True)
         else:
-            self.result.info(
+            result.info(
                 'Exporting OdkEntityList: {} (id: {}) '.format(odk_entity_list.name, odk_entity_list.id),
                 console=True)
 
@@ -122,27 +166,28 @@ class EntityListExporter:
 
             if not odk_entity_list_exporters:
                 if self.only_exporters:
-                    self.result.info(
+                    result.info(
                         'OdkEntityList: {} (id: {}) does not have exporter(s): {}. Skipping.'.format(
                             odk_entity_list.name,
                             odk_entity_list.id,
                             ','.join(self.only_exporters)),
                         console=self.verbose)
                 else:
-                    self.result.error(
+                    result.error(
                         'Exporters not found for OdkEntityList: {} (id: {})'.format(odk_entity_list.name,
                                                                                     odk_entity_list.id),
                         console=True)
             else:
                 for odk_entity_list_exporter in odk_entity_list_exporters:
-                    self.result.info("")
-                    self.result.info(
+                    result.info("")
+                    result.info(
                         'Executing Entity List Exporter: {}'.format(odk_entity_list_exporter.exporter),
                         console=self.verbose)
 
                     odk_entity_list_exporter_job = odk_entity_list_exporter.odk_entity_list_exporter_jobs.create(
                         export_date=Utils.to_aware_datetime(datetime.now()),
                         status=OdkEntityListExporterJob.STATUS_RUNNING,
+                        background_job=self.background_job,
                         args={
                             "odk_projects": [p.id if isinstance(p, models.Model) else p for p in self.odk_projects],
                             "odk_entity_lists": [f.id if isinstance(f, models.Model) else f for f in
@@ -154,19 +199,20 @@ class EntityListExporter:
                         exporter = EntityListExporterFactory.get_exporter(
                             odk_entity_list_exporter,
                             odk_entity_list_exporter,
+                            odk_entity_list_exporter_job=odk_entity_list_exporter_job,
+                            export_mode=self.export_mode,
                             out_dir=self.out_dir,
                             verbose=self.verbose
                         )
                         exporter_result = exporter.execute()
-                        self.result.merge(exporter_result)
+                        result.merge(exporter_result)
                     except Exception as ex:
-                        self.result.error('Error executing Entity List exporter.', error=ex, console=True)
+                        result.error('Error executing Entity List exporter.', error=ex, console=True)
                     finally:
-                        if self.result.errors:
+                        if result.errors:
                             odk_entity_list_exporter_job.status = OdkEntityListExporterJob.STATUS_ERRORED
                         else:
                             odk_entity_list_exporter_job.status = OdkEntityListExporterJob.STATUS_SUCCESSFUL
-                        odk_entity_list_exporter_job.result = self.result.as_json()
+                        odk_entity_list_exporter_job.result = result.as_json()
                         odk_entity_list_exporter_job.save()
-                return self.result
-        return None
+        return result
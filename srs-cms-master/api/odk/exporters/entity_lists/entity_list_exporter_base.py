@@ -0,0 +1,448 @@
+import hashlib
+import json
+import os
+import textwrap
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from api.common import Utils
+from api.odk import OdkConfig, OdkClientPool
+from api.odk.exporters.entity_lists.entity_list_export_result import EntityListExportResult
+from api.models import OdkEntity, OdkEntityListExporter, OdkEntityListExporterJob
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+
+class EntityListExporterBase(ABC):
+    """
+    Exports the models returned by get_queryset to an ODK Entity List with the EtlMappings of the EtlDocument.
+
+    The models are streamed from the database and uploaded to ODK in batches of batch_size records.
+    The Entities that were not exported are deleted once at the end.
+
+    Export modes:
+        full: Creates or updates all the Entities that differ from the Entity List.
+              The OdkEntities are rebuilt and replaced in one transaction once the export finishes.
+        delta: Only creates, updates and deletes the Entities that changed since the previous export.
+               The label, ODK ID and a hash of each exported Entity are kept in OdkEntity.
+               A full export is done when the previous export did not succeed or did not keep the Entities.
+    """
+    EXPORT_MODE_FULL = 'full'
+    EXPORT_MODE_DELTA = 'delta'
+
+    # Entities created more than this long before the export started on the ODK server clock are not matched.
+    CREATED_AT_MARGIN = timedelta(minutes=10)
+
+    def __init__(self, odk_entity_list_exporter, odk_entity_list_exporter_job=None, export_mode=None, out_dir=None,
+                 verbose=False, batch_size=None):
+        self.odk_config = OdkConfig.from_env()
+        # The project ID has to be set here otherwise odk_client.entities.merge will fail even if given a project_id.
+        # This is a bug in pyodk.
+        self.odk_client = OdkClientPool.get_client(
+            self.odk_config,
+            project_id=odk_entity_list_exporter.odk_entity_list.odk_project.project_id)
+        self.odk_entity_list_exporter = odk_entity_list_exporter
+        self.odk_entity_list = odk_entity_list_exporter.odk_entity_list
+        self.odk_entity_list_exporter_job = odk_entity_list_exporter_job
+        self.export_mode = export_mode or settings.ODK_ENTITY_LIST_EXPORT_MODE
+        self.batch_size = batch_size or settings.ODK_ENTITY_LIST_EXPORT_BATCH_SIZE
+        self.out_dir = Utils.expand_path(out_dir) if out_dir else None
+        self.verbose = verbose is True
+        self.result = EntityListExportResult()
+
+    def validate_before_execute(self):
+        """
+        Validate before executing the export.
+
+        Returns:
+            True if valid, otherwise False.
+        """
+        if not isinstance(self.odk_entity_list_exporter, OdkEntityListExporter):
+            self.result.error('ODK Entity List Exporter not set.', console=True)
+            return False
+
+        if not self.odk_entity_list_exporter.etl_document:
+            self.result.error('ETL Document not set. {} {}'.format(
+                self.odk_entity_list_exporter.__class__.__name__,
+                self.odk_entity_list_exporter.id
+            ), console=True)
+            return False
+
+        mapping_errors = self.odk_entity_list_exporter.etl_document.get_mapping_errors()
+        if mapping_errors:
+            for mapping_error in mapping_errors:
+                self.result.error(mapping_error, console=True)
+            return False
+        return True
+
+    def get_etl_mappings(self):
+        return self.get_mapping_plan().etl_mappings
+
+    def get_mapping_plan(self):
+        return self.odk_entity_list_exporter.etl_document.get_mapping_plan()
+
+    @abstractmethod
+    def get_queryset(self):
+        """
+        Gets the models to export.
+
+        Returns:
+            QuerySet
+        """
+
+    def get_description(self):
+        """
+        Gets the description of the models that are exported.
+        """
+        return self.__class__.__name__
+
+    def execute(self):
+        try:
+            self.result.info('Exporting {}...'.format(self.get_description()))
+            if not self.validate_before_execute():
+                return self.result
+
+            mapping_plan = self.get_mapping_plan()
+            # Streamed with a server-side cursor so only one batch of models is in memory at a time.
+            export_models = mapping_plan.apply_model_projection(
+                self.get_queryset().order_by('pk')
+            ).iterator(chunk_size=self.batch_size)
+
+            exported_json = self._open_entity_list_exported_json() if self.out_dir else None
+            try:
+                self._start_export(mapping_plan)
+                for records in self._get_record_batches(mapping_plan, export_models):
+                    if exported_json:
+                        self._write_entity_list_exported_json(exported_json, records)
+                    self._export_batch(records)
+                self._finish_export()
+                self.result.add_exported_entity_list(self.odk_entity_list)
+            except Exception as ex:
+                self.result.error('Failed to upload to ODK', error=ex, console=True)
+            finally:
+                # Closes the server-side cursor when the export stopped before reading all the models.
+                export_models.close()
+                if exported_json:
+                    self._close_entity_list_exported_json(exported_json)
+        except Exception as ex:
+            self.result.error('Error executing {}.'.format(self.__class__.__name__), error=ex, console=True)
+        return self.result
+
+    def _get_record_batches(self, mapping_plan, export_models):
+        """
+        Maps the models to Entity records.
+
+        Yields:
+            Lists of up to batch_size records.
+        """
+        records = []
+        for export_model in export_models:
+            record = {}
+            label_fields = []
+            for etl_mapping in mapping_plan.mappings:
+                has_source_field, source_value = etl_mapping.resolve(export_model)
+                if etl_mapping.is_required and not has_source_field:
+                    self.result.error(
+                        'ETL Record does not have a field named {}. ETL Record: {}'.format(
+                            etl_mapping.source_name,
+                            export_model
+                        ),
+                        console=True
+                    )
+                    break
+
+                source_value = etl_mapping.cast_value(source_value, transform=True)
+                record[etl_mapping.target_name] = source_value
+                if etl_mapping.is_primary_key:
+                    label_fields.append(source_value)
+
+            record['label'] = ':'.join(str(label_field) for label_field in label_fields)
+            records.append(record)
+            self.result.add_exported_model(export_model, console=self.verbose)
+            if len(records) >= self.batch_size:
+                yield records
+                records = []
+        if records:
+            yield records
+
+    def _can_export_delta(self):
+        """
+        Gets if only the changed Entities can be exported.
+        The OdkEntities are only in sync with the Entity List after a successful export that kept them.
+        """
+        if self.export_mode != self.EXPORT_MODE_DELTA or self.odk_entity_list_exporter_job is None:
+            return False
+        previous_job = (self.odk_entity_list_exporter.odk_entity_list_exporter_jobs
+                        .exclude(id=self.odk_entity_list_exporter_job.id)
+                        .order_by('-export_date', '-id')
+                        .first())
+        return (previous_job is not None and
+                previous_job.status == OdkEntityListExporterJob.STATUS_SUCCESSFUL and
+                (previous_job.args or {}).get('export_mode') is not None)
+
+    def _set_job_export_mode(self, export_mode):
+        if self.odk_entity_list_exporter_job is not None:
+            self.odk_entity_list_exporter_job.args = {**(self.odk_entity_list_exporter_job.args or {}),
+                                                      'export_mode': export_mode}
+
+    def _start_export(self, mapping_plan):
+        """
+        Gets the Entities to compare the exported records to.
+
+        delta: The OdkEntities are read for each batch.
+        full: The label, ODK ID and a hash of the values of each Entity in the Entity List are read once.
+              The rebuilt OdkEntities are staged as the records are exported. See: _replace_odk_entities
+        """
+        self.is_delta_export = self._can_export_delta()
+        self.export_started_at = timezone.now()
+        self.exported_labels = set()
+        self.created_record_hashes = {}
+        self.export_counts = {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        self.property_names = [m.target_name for m in mapping_plan.mappings]
+        self.odk_entity_snapshot = None
+        self.staged_odk_entities = []
+        self.result.info('Export mode: {}'.format(
+            self.EXPORT_MODE_DELTA if self.is_delta_export else self.EXPORT_MODE_FULL
+        ), console=self.verbose)
+
+        if not self.is_delta_export:
+            self.odk_entity_snapshot = {}
+            for entity in self._get_entity_table():
+                values = {name: entity.get(name) for name in self.property_names}
+                self.odk_entity_snapshot[entity['label']] = (entity['__id'], self._hash_values(values))
+
+    def _export_batch(self, records):
+        """
+        Creates and updates the Entities for a batch of records.
+        The OdkEntities for the created Entities are added by _finish_export once their ODK IDs are known.
+        """
+        unique_records = []
+        for record in records:
+            if record['label'] in self.exported_labels:
+                self.result.error('Entity label is not unique: {}'.format(record['label']), console=True)
+                continue
+            self.exported_labels.add(record['label'])
+            unique_records.append(record)
+
+        odk_entities = self._get_batch_odk_entities([r['label'] for r in unique_records])
+        created_records = []
+        updated_records = []
+        unchanged_records = []
+        for record in unique_records:
+            odk_entity = odk_entities.get(record['label'])
+            if odk_entity is None:
+                created_records.append(record)
+            elif odk_entity.record_hash != self._get_compare_hash(record):
+                updated_records.append(record)
+            else:
+                unchanged_records.append(record)
+
+        if created_records:
+            self.odk_client.entities.create_many(
+                data=created_records,
+                project_id=self.odk_entity_list.odk_project.project_id,
+                entity_list_name=self.odk_entity_list.name
+            )
+            for record in created_records:
+                self.created_record_hashes[record['label']] = self._hash_record(record)
+            self.export_counts['created'] += len(created_records)
+
+        changed_odk_entities = []
+        for record in updated_records:
+            odk_entity = odk_entities[record['label']]
+            try:
+                self.odk_client.entities.update(
+                    uuid=odk_entity.uuid,
+                    project_id=self.odk_entity_list.odk_project.project_id,
+                    entity_list_name=self.odk_entity_list.name,
+                    label=record['label'],
+                    data={k: v for k, v in record.items() if k != 'label'},
+                    force=True
+                )
+                odk_entity.record_hash = self._hash_record(record)
+                odk_entity.odk_entity_list_exporter_job = self.odk_entity_list_exporter_job
+                odk_entity.updated_at = timezone.now()
+                changed_odk_entities.append(odk_entity)
+                self.export_counts['updated'] += 1
+            except Exception as ex:
+                self.result.error('Failed to update Entity: {}'.format(record['label']), error=ex, console=True)
+        self.export_counts['unchanged'] += len(unchanged_records)
+
+        if self.is_delta_export:
+            OdkEntity.objects.bulk_update(changed_odk_entities,
+                                          ['record_hash', 'odk_entity_list_exporter_job', 'updated_at'],
+                                          batch_size=self.batch_size)
+        else:
+            for record in unchanged_records:
+                odk_entity = odk_entities[record['label']]
+                odk_entity.record_hash = self._hash_record(record)
+                changed_odk_entities.append(odk_entity)
+            self.staged_odk_entities.extend(changed_odk_entities)
+
+    def _finish_export(self):
+        """
+        Adds the OdkEntities for the created Entities and deletes the Entities that were not exported.
+        Only the OdkEntities for the Entities that were exported are changed so failed changes are retried.
+        A full export then replaces the OdkEntities with the staged ones.
+        """
+        if self.created_record_hashes:
+            new_odk_entities = []
+            entity_ids = self._get_entity_ids(created_after=self.export_started_at - self.CREATED_AT_MARGIN)
+            for label, record_hash in self.created_record_hashes.items():
+                entity_id = entity_ids.get(label)
+                if entity_id is None:
+                    self.result.error('Entity not found after export: {}'.format(label), console=True)
+                else:
+                    new_odk_entities.append(self._new_odk_entity(label, entity_id, record_hash))
+            if self.is_delta_export:
+                OdkEntity.objects.bulk_create(new_odk_entities, batch_size=self.batch_size)
+            else:
+                self.staged_odk_entities.extend(new_odk_entities)
+
+        if self.is_delta_export:
+            not_exported = ((odk_entity_id, label, uuid) for odk_entity_id, label, uuid in
+                            self.odk_entity_list.odk_entities.values_list('id', 'label', 'uuid').iterator()
+                            if label not in self.exported_labels)
+        else:
+            not_exported = ((None, label, uuid) for label, (uuid, _) in self.odk_entity_snapshot.items()
+                            if label not in self.exported_labels)
+
+        removed_odk_entity_ids = []
+        for odk_entity_id, label, uuid in list(not_exported):
+            try:
+                self.odk_client.entities.delete(
+                    uuid=uuid,
+                    project_id=self.odk_entity_list.odk_project.project_id,
+                    entity_list_name=self.odk_entity_list.name
+                )
+                if odk_entity_id is not None:
+                    removed_odk_entity_ids.append(odk_entity_id)
+                self.export_counts['deleted'] += 1
+            except Exception as ex:
+                self.result.error('Failed to delete Entity: {}'.format(label), error=ex, console=True)
+        for index in range(0, len(removed_odk_entity_ids), self.batch_size):
+            OdkEntity.objects.filter(id__in=removed_odk_entity_ids[index:index + self.batch_size]).delete()
+        if not self.is_delta_export:
+            self._replace_odk_entities()
+
+        self.result.info('Exported Entities: Created: {} Updated: {} Deleted: {} Unchanged: {}'.format(
+            self.export_counts['created'],
+            self.export_counts['updated'],
+            self.export_counts['deleted'],
+            self.export_counts['unchanged']
+        ), console=self.verbose)
+        self._set_job_export_mode(self.EXPORT_MODE_DELTA if self.is_delta_export else self.EXPORT_MODE_FULL)
+
+    def _replace_odk_entities(self):
+        """
+        Replaces the OdkEntities with the ones staged by a full export.
+        The previous OdkEntities are kept if the export fails before this.
+        """
+        with transaction.atomic():
+            self.odk_entity_list.odk_entities.all().delete()
+            OdkEntity.objects.bulk_create(self.staged_odk_entities, batch_size=self.batch_size)
+        self.staged_odk_entities = []
+
+    def _get_batch_odk_entities(self, labels):
+        """
+        Gets the OdkEntities for the labels in a batch.
+        For a full export the record_hash is the hash of the Entity values in ODK and the OdkEntities are not saved.
+
+        Returns:
+            Dict of OdkEntity by label.
+        """
+        if self.is_delta_export:
+            return {e.label: e for e in self.odk_entity_list.odk_entities.filter(label__in=labels)}
+
+        odk_entities = {}
+        for label in labels:
+            if label in self.odk_entity_snapshot:
+                uuid, values_hash = self.odk_entity_snapshot[label]
+                odk_entities[label] = self._new_odk_entity(label, uuid, values_hash)
+        return odk_entities
+
+    def _get_compare_hash(self, record):
+        if self.is_delta_export:
+            return self._hash_record(record)
+        return self._hash_values({name: record.get(name) for name in self.property_names})
+
+    def _get_entity_table(self, filter=None, select=None):
+        """
+        Reads the Entity List one page of batch_size Entities at a time.
+
+        Yields:
+            The Entities.
+        """
+        skip = 0
+        while True:
+            entities = self.odk_client.entities.get_table(
+                project_id=self.odk_entity_list.odk_project.project_id,
+                entity_list_name=self.odk_entity_list.name,
+                skip=skip,
+                top=self.batch_size,
+                filter=filter,
+                select=select
+            ).get('value', [])
+            yield from entities
+            if len(entities) < self.batch_size:
+                break
+            skip += len(entities)
+
+    def _get_entity_ids(self, created_after=None):
+        """
+        Gets the ODK Entity IDs by label.
+
+        Args:
+            created_after: Only get the Entities created after this date.
+
+        Returns:
+            Dict
+        """
+        entities = self._get_entity_table(
+            filter="__system/createdAt ge '{}'".format(created_after) if created_after else None,
+            select='__id,label'
+        )
+        return {e['label']: e['__id'] for e in entities}
+
+    def _new_odk_entity(self, label, entity_id, record_hash):
+        return OdkEntity(
+            odk_entity_list=self.odk_entity_list,
+            label=label,
+            uuid=entity_id,
+            record_hash=record_hash,
+            odk_entity_list_exporter_job=self.odk_entity_list_exporter_job
+        )
+
+    @classmethod
+    def _hash_record(cls, record):
+        data = json.dumps(record, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _hash_values(cls, values):
+        """
+        Hashes Entity values the way they are stored in ODK, as strings with empty values as ''.
+        """
+        return cls._hash_record({k: '' if v is None else str(v) for k, v in values.items()})
+
+    def _open_entity_list_exported_json(self):
+        Utils.ensure_dirs(self.out_dir)
+        out_filename = os.path.join(self.out_dir,
+                                    'entity-list-{}.json'.format(self.odk_entity_list_exporter.odk_entity_list.name))
+        exported_json = open(out_filename, 'w')
+        exported_json.write('[')
+        return exported_json
+
+    def _write_entity_list_exported_json(self, exported_json, records):
+        """
+        Appends records to the JSON array so the file is written as the records are exported.
+        """
+        for record in records:
+            if exported_json.tell() > 1:
+                exported_json.write(',')
+            exported_json.write('\n' + textwrap.indent(json.dumps(record, indent=4, sort_keys=True, default=str),
+                                                       '    '))
+
+    def _close_entity_list_exported_json(self, exported_json):
+        exported_json.write('\n]' if exported_json.tell() > 1 else ']')
+        exported_json.close()
@@ -5,8 +5,12 @@ class EntityListExporterFactory:
     ODK_VA_PRELOAD_EXPORTER_NAME = 'VAPreloadExporter'
     ODK_VA_PRELOAD_EXPORTER_CLASS = 'api.odk.exporters.entity_lists.va_preload_exporter.VaPreloadExporter'
 
+    ODK_MODEL_EXPORTER_NAME = 'ModelExporter'
+    ODK_MODEL_EXPORTER_CLASS = 'api.odk.exporters.entity_lists.model_entity_list_exporter.ModelEntityListExporter'
+
     ODK_EXPORTERS = [
         (ODK_VA_PRELOAD_EXPORTER_CLASS, ODK_VA_PRELOAD_EXPORTER_NAME),
+        (ODK_MODEL_EXPORTER_CLASS, ODK_MODEL_EXPORTER_NAME),
     ]
 
     # Choices for the Models. This returns a tuple of (name, name).
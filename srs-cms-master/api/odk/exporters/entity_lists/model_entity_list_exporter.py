@@ -0,0 +1,47 @@
+from django.apps import apps
+from api.odk.exporters.entity_lists.entity_list_exporter_base import EntityListExporterBase
+
+
+class ModelEntityListExporter(EntityListExporterBase):
+    """
+    Exports any model to an ODK Entity List.
+
+    The models are the queryset passed in or the OdkEntityListExporter's source_model filtered by its source_filter.
+    The Entities are mapped by the EtlMappings of the OdkEntityListExporter's EtlDocument.
+    """
+
+    def __init__(self, odk_entity_list_exporter, queryset=None, **kwargs):
+        super().__init__(odk_entity_list_exporter, **kwargs)
+        self.queryset = queryset
+
+    def validate_before_execute(self):
+        if not super().validate_before_execute():
+            return False
+
+        if self.queryset is None:
+            if not self.odk_entity_list_exporter.source_model:
+                self.result.error('Source Model not set. {} {}'.format(
+                    self.odk_entity_list_exporter.__class__.__name__,
+                    self.odk_entity_list_exporter.id
+                ), console=True)
+                return False
+            try:
+                self._get_source_model()
+            except (LookupError, ValueError) as ex:
+                self.result.error('Source Model not found: {}'.format(self.odk_entity_list_exporter.source_model),
+                                  error=ex, console=True)
+                return False
+        return True
+
+    def get_queryset(self):
+        if self.queryset is not None:
+            return self.queryset
+        return self._get_source_model().objects.filter(**(self.odk_entity_list_exporter.source_filter or {}))
+
+    def get_description(self):
+        if self.queryset is not None:
+            return self.queryset.model._meta.verbose_name_plural.title()
+        return self.odk_entity_list_exporter.source_model
+
+    def _get_source_model(self):
+        return apps.get_model(self.odk_entity_list_exporter.source_model)
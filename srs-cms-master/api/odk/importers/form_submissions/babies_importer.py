@@ -5,22 +5,37 @@ from config.env import Env
 
 
 class BabiesImporter(FromSubmissionImporterBase):
+    MODEL_CLASS = Baby
+    SUPPORTS_COPY_IMPORT = True
+    COPY_IMPORT_REFERENCES = {
+        'event': (Event, 'key'),
+    }
+
     def __init__(self, odk_form, odk_form_importer, **kwargs):
         super().__init__(odk_form, odk_form_importer, **kwargs)
 
     def execute(self):
         try:
             if self.validate_before_execute():
-                self.import_submissions(Baby)
+                self.import_submissions(self.MODEL_CLASS)
         except Exception as ex:
             self.result.error('Error executing {}.'.format(self.__class__.__name__), error=ex, console=True)
         return self.result
 
+    def on_before_import_page(self, form_submissions):
+        try:
+            self.resolve_parent_models(Event,
+                                       FromSubmissionImporterFactory.ODK_EVENTS_IMPORTER_NAME,
+                                       form_submissions)
+        except Exception as ex:
+            self.result.error('Error executing {}.on_before_import_page:'.format(self.__class__.__name__),
+                              error=ex, console=True)
+
     def on_can_import(self, etl_record, form_submission):
         try:
-            event = self.get_model_or_try_execute_importer(Event,
-                                                           FromSubmissionImporterFactory.ODK_EVENTS_IMPORTER_NAME,
-                                                           form_submission)
+            event = self.get_parent_model(Event,
+                                          FromSubmissionImporterFactory.ODK_EVENTS_IMPORTER_NAME,
+                                          form_submission)
             # TODO: is this the correct event_type?
             can_import = event is not None and event.event_type in [Event.EventType.PREGNANCY,
                                                                     Event.EventType.PREGNANCY_OUTCOME]
@@ -30,11 +45,16 @@ class BabiesImporter(FromSubmissionImporterBase):
                               error=ex, console=True)
             return False
 
+    def on_get_copy_reference_values(self, new_baby, etl_record, form_submission):
+        return {'event': self.get_key_from_record(form_submission)}
+
     def on_before_save_model(self, new_baby, etl_record, form_submission):
         use_existing_if_missing = Env.get("DEV_ODK_IMPORT_USE_EXISTING_IF_MISSING", cast=bool)
         try:
             event_key = self.get_key_from_record(form_submission)
-            event = (Event.find_by(key=event_key) or
+            event = (self.get_parent_model(Event,
+                                           FromSubmissionImporterFactory.ODK_EVENTS_IMPORTER_NAME,
+                                           form_submission) or
                      (Event.objects.first() if use_existing_if_missing else None))
 
             errors = []
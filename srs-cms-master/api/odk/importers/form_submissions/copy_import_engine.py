@@ -0,0 +1,211 @@
+import io
+import uuid
+from datetime import date, datetime, time
+from django.db import connection
+
+
+class CopyImportEngine:
+    """
+    Imports pages of mapped models into a model's table without saving each model.
+
+    Each page is written with COPY into an UNLOGGED staging table, the foreign keys in references are resolved
+    by joining the referenced tables on their lookup field, and the rows are inserted into the model's table
+    with one INSERT ... SELECT ... ON CONFLICT (conflict_fields) DO NOTHING.
+    The staging table is created by the first page and dropped by close().
+    """
+
+    def __init__(self, model_class, conflict_fields, references=None, use_existing_if_missing=False):
+        """
+        Args:
+            model_class: The model to import.
+            conflict_fields: The unique fields the existing rows are skipped by (e.g., ['key']).
+            references: Dict of foreign key field name to (model class, lookup field) of the foreign keys
+                to resolve in the database.
+            use_existing_if_missing: Use the first referenced model when a reference is not found.
+        """
+        self.model_class = model_class
+        self.conflict_fields = [model_class._meta.get_field(name) for name in conflict_fields]
+        self.references = references or {}
+        self.use_existing_if_missing = use_existing_if_missing is True
+        # The fields copied from the models. The foreign keys in references are resolved from the reference values.
+        self.fields = [
+            field for field in model_class._meta.concrete_fields
+            if not field.primary_key and field.name not in self.references
+        ]
+        self.table_name = 'staging_{}_{}'.format(model_class._meta.db_table, uuid.uuid4().hex[:12])
+
+    def import_models(self, rows):
+        """
+        Imports a page of models.
+        The id of each inserted model is set. The models that were not inserted and have no unresolved references
+        already exist.
+
+        Args:
+            rows: List of tuples (new_model, reference values) where the reference values are a dict of
+                the lookup value by foreign key field name.
+
+        Returns:
+            Tuple (list of the inserted models, list of tuples (new_model, dict of the unresolved reference values)).
+        """
+        if not rows:
+            return [], []
+
+        with connection.cursor() as cursor:
+            self._create_staging_table(cursor)
+            cursor.execute('TRUNCATE {}'.format(self._quote(self.table_name)))
+            self._copy_rows(cursor, rows)
+
+            unresolved = []
+            if self.references and not self.use_existing_if_missing:
+                for row_number, unresolved_names in self._get_unresolved_references(cursor).items():
+                    new_model, reference_values = rows[row_number]
+                    unresolved.append((new_model, {name: reference_values.get(name) for name in unresolved_names}))
+
+            models_by_conflict_values = {
+                self._get_conflict_values(new_model): new_model for new_model, _ in rows
+            }
+            inserted = []
+            for row in self._insert_rows(cursor):
+                new_model = models_by_conflict_values.get(tuple(row[1:]))
+                if new_model is not None:
+                    new_model.pk = row[0]
+                    inserted.append(new_model)
+        return inserted, unresolved
+
+    def close(self):
+        """
+        Drops the staging table.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS {}'.format(self._quote(self.table_name)))
+
+    def _create_staging_table(self, cursor):
+        """
+        Creates the staging table with the columns of the copied fields (without their constraints),
+        a text column for each reference value and the row number of the model in the page.
+        """
+        columns = [self._quote(field.column) for field in self.fields]
+        columns += ['NULL::text AS {}'.format(self._quote(self._get_reference_column(name)))
+                    for name in self.references]
+        cursor.execute('CREATE UNLOGGED TABLE IF NOT EXISTS {} AS SELECT {}, 0 AS _row FROM {} WITH NO DATA'.format(
+            self._quote(self.table_name),
+            ', '.join(columns),
+            self._quote(self.model_class._meta.db_table)
+        ))
+
+    def _copy_rows(self, cursor, rows):
+        buffer = io.StringIO()
+        for row_number, (new_model, reference_values) in enumerate(rows):
+            values = [
+                # Sets the auto_now(_add) fields the same as save() and bulk_create().
+                field.get_db_prep_save(field.pre_save(new_model, True), connection)
+                for field in self.fields
+            ]
+            values += [reference_values.get(name) for name in self.references]
+            values.append(row_number)
+            buffer.write('\t'.join(self._to_copy_text(value) for value in values))
+            buffer.write('\n')
+        buffer.seek(0)
+
+        columns = [field.column for field in self.fields]
+        columns += [self._get_reference_column(name) for name in self.references]
+        columns.append('_row')
+        cursor.copy_expert('COPY {} ({}) FROM STDIN'.format(
+            self._quote(self.table_name),
+            ', '.join(self._quote(column) for column in columns)
+        ), buffer)
+
+    def _get_unresolved_references(self, cursor):
+        """
+        Gets the foreign key field names that could not be resolved for each row.
+
+        Returns:
+            Dict of the list of field names by row number.
+        """
+        joins, conditions = [], []
+        for index, (name, (reference_model_class, lookup_field)) in enumerate(self.references.items()):
+            joins.append(self._get_reference_join(index, name, reference_model_class, lookup_field, 'LEFT JOIN'))
+            conditions.append('r{}.id IS NULL'.format(index))
+
+        cursor.execute('SELECT s._row, {} FROM {} s {} WHERE {} ORDER BY s._row'.format(
+            ', '.join(conditions),
+            self._quote(self.table_name),
+            ' '.join(joins),
+            ' OR '.join(conditions)
+        ))
+        names = list(self.references.keys())
+        return {
+            row[0]: [name for name, is_unresolved in zip(names, row[1:]) if is_unresolved]
+            for row in cursor.fetchall()
+        }
+
+    def _insert_rows(self, cursor):
+        """
+        Inserts the staged rows that have all their references resolved.
+
+        Returns:
+            List of tuples (id, conflict field values...) of the inserted rows.
+        """
+        columns = [self._quote(field.column) for field in self.fields]
+        select_columns = ['s.{}'.format(column) for column in columns]
+        joins = []
+        join_type = 'LEFT JOIN' if self.use_existing_if_missing else 'JOIN'
+        for index, (name, (reference_model_class, lookup_field)) in enumerate(self.references.items()):
+            columns.append(self._quote(self.model_class._meta.get_field(name).column))
+            joins.append(self._get_reference_join(index, name, reference_model_class, lookup_field, join_type))
+            if self.use_existing_if_missing:
+                select_columns.append('COALESCE(r{0}.id, (SELECT MIN(id) FROM {1}))'.format(
+                    index,
+                    self._quote(reference_model_class._meta.db_table)
+                ))
+            else:
+                select_columns.append('r{}.id'.format(index))
+
+        conflict_columns = ', '.join(self._quote(field.column) for field in self.conflict_fields)
+        cursor.execute(
+            'INSERT INTO {} ({}) SELECT {} FROM {} s {} ORDER BY s._row '
+            'ON CONFLICT ({}) DO NOTHING RETURNING id, {}'.format(
+                self._quote(self.model_class._meta.db_table),
+                ', '.join(columns),
+                ', '.join(select_columns),
+                self._quote(self.table_name),
+                ' '.join(joins),
+                conflict_columns,
+                conflict_columns
+            ))
+        return cursor.fetchall()
+
+    def _get_reference_join(self, index, name, reference_model_class, lookup_field, join_type):
+        return '{} {} r{} ON r{}.{} = s.{}'.format(
+            join_type,
+            self._quote(reference_model_class._meta.db_table),
+            index,
+            index,
+            self._quote(reference_model_class._meta.get_field(lookup_field).column),
+            self._quote(self._get_reference_column(name))
+        )
+
+    def _get_conflict_values(self, new_model):
+        return tuple(getattr(new_model, field.attname) for field in self.conflict_fields)
+
+    def _get_reference_column(self, name):
+        return '_ref_{}'.format(name)
+
+    def _quote(self, name):
+        return connection.ops.quote_name(name)
+
+    def _to_copy_text(self, value):
+        """
+        Formats a value for COPY's text format.
+        """
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, (datetime, date, time)):
+            value = value.isoformat()
+        return (str(value)
+                .replace('\\', '\\\\')
+                .replace('\t', '\\t')
+                .replace('\n', '\\n')
+                .replace('\r', '\\r'))
@@ -5,22 +5,34 @@ from config.env import Env
 
 
 class DeathsImporter(FromSubmissionImporterBase):
+    MODEL_CLASS = Death
+    SUPPORTS_COPY_IMPORT = True
+
     def __init__(self, odk_form, odk_form_importer, **kwargs):
         super().__init__(odk_form, odk_form_importer, **kwargs)
 
     def execute(self):
         try:
             if self.validate_before_execute():
-                self.import_submissions(Death)
+                self.import_submissions(self.MODEL_CLASS)
         except Exception as ex:
             self.result.error('Error executing {}.'.format(self.__class__.__name__), error=ex, console=True)
         return self.result
 
+    def on_before_import_page(self, form_submissions):
+        try:
+            self.resolve_parent_models(Event,
+                                       FromSubmissionImporterFactory.ODK_EVENTS_IMPORTER_NAME,
+                                       form_submissions)
+        except Exception as ex:
+            self.result.error('Error executing {}.on_before_import_page:'.format(self.__class__.__name__),
+                              error=ex, console=True)
+
     def on_can_import(self, etl_record, form_submission):
         try:
-            event = self.get_model_or_try_execute_importer(Event,
-                                                           FromSubmissionImporterFactory.ODK_EVENTS_IMPORTER_NAME,
-                                                           form_submission)
+            event = self.get_parent_model(Event,
+                                          FromSubmissionImporterFactory.ODK_EVENTS_IMPORTER_NAME,
+                                          form_submission)
             can_import = False
             if event is not None:
                 if event.event_type == Event.EventType.DEATH:
@@ -37,25 +49,58 @@ class DeathsImporter(FromSubmissionImporterBase):
             return False
 
     def on_before_save_model(self, new_death, etl_record, form_submission):
-        use_existing_if_missing = Env.get("DEV_ODK_IMPORT_USE_EXISTING_IF_MISSING", cast=bool)
         try:
-            event_key = self.get_key_from_record(form_submission)
-            event = (Event.find_by(key=event_key) or
-                     (Event.objects.first() if use_existing_if_missing else None))
-
-            errors = []
-            if event is None:
-                errors.append(f"Event not found: {event_key or "NULL"}")
-
-            if not errors:
-                # TODO: do we need to set the death_type here? Where does death_type map from? See TODO in ETL.
-                new_death.event = event
-                new_death.death_status = Death.DeathStatus.NEW_DEATH
+            if self._set_death_event(new_death, form_submission):
                 return new_death.save_with_death_code()
-            else:
-                self.result.error(f"{new_death.key}, " + ", ".join(errors))
-                return False
+            return False
         except Exception as ex:
             self.result.error('Error executing {}.on_before_save_model.'.format(self.__class__.__name__),
                               error=ex, console=True)
             return False
+
+    def on_before_save_models(self, new_models):
+        try:
+            new_models = [
+                (new_death, etl_record, form_submission)
+                for new_death, etl_record, form_submission in new_models
+                if self._set_death_event(new_death, form_submission)
+            ]
+            # Reserve the death_codes for the page in one statement.
+            Death.assign_death_codes([new_death for new_death, _, _ in new_models])
+            # bulk_create does not call save().
+            Death.set_search_documents([new_death for new_death, _, _ in new_models])
+            return new_models
+        except Exception as ex:
+            self.result.error('Error executing {}.on_before_save_models.'.format(self.__class__.__name__),
+                              error=ex, console=True)
+            return []
+
+    def on_before_copy_models(self, new_models):
+        # The Events are resolved for the page and the death_codes need the Event's Cluster.
+        return self.on_before_save_models(new_models)
+
+    def on_after_save_models(self, new_models):
+        super().on_after_save_models(new_models)
+        # bulk_create does not send the post_save signal.
+        Death.objects.invalidate_status_counts()
+
+    def _set_death_event(self, new_death, form_submission):
+        use_existing_if_missing = Env.get("DEV_ODK_IMPORT_USE_EXISTING_IF_MISSING", cast=bool)
+        event_key = self.get_key_from_record(form_submission)
+        event = (self.get_parent_model(Event,
+                                       FromSubmissionImporterFactory.ODK_EVENTS_IMPORTER_NAME,
+                                       form_submission) or
+                 (Event.objects.first() if use_existing_if_missing else None))
+
+        errors = []
+        if event is None:
+            errors.append(f"Event not found: {event_key or "NULL"}")
+
+        if not errors:
+            # TODO: do we need to set the death_type here? Where does death_type map from? See TODO in ETL.
+            new_death.event = event
+            new_death.death_status = Death.DeathStatus.NEW_DEATH
+            return True
+        else:
+            self.result.error(f"{new_death.key}, " + ", ".join(errors))
+            return False
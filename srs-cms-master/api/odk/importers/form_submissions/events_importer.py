@@ -4,26 +4,41 @@ from config.env import Env
 
 
 class EventsImporter(FromSubmissionImporterBase):
+    MODEL_CLASS = Event
+    SUPPORTS_COPY_IMPORT = True
+    COPY_IMPORT_REFERENCES = {
+        'cluster': (Cluster, 'code'),
+        'area': (Area, 'code'),
+        'event_staff': (Staff, 'code'),
+    }
+
     def __init__(self, odk_form, odk_form_importer, **kwargs):
         super().__init__(odk_form, odk_form_importer, **kwargs)
 
     def execute(self):
         try:
             if self.validate_before_execute():
-                self.import_submissions(Event)
+                self.import_submissions(self.MODEL_CLASS)
         except Exception as ex:
             self.result.error('Error executing {}.'.format(self.__class__.__name__), error=ex, console=True)
         return self.result
 
+    def on_get_copy_reference_values(self, new_event, etl_record, form_submission):
+        return {
+            'cluster': new_event.cluster_code,
+            'area': new_event.area_code,
+            'event_staff': new_event.staff_code,
+        }
+
     def on_before_save_model(self, new_event, etl_record, form_submission):
         use_existing_if_missing = Env.get("DEV_ODK_IMPORT_USE_EXISTING_IF_MISSING", cast=bool)
         try:
-            cluster = (Cluster.find_by(code=new_event.cluster_code) or
-                       (Cluster.objects.first() if use_existing_if_missing else None))
-            area = (Area.find_by(code=new_event.area_code) or
-                    (Area.objects.first() if use_existing_if_missing else None))
-            event_staff = (Staff.find_by(code=new_event.staff_code) or
-                           (Staff.objects.first() if use_existing_if_missing else None))
+            cluster = self.get_reference_model(Cluster, new_event.cluster_code,
+                                               use_existing_if_missing=use_existing_if_missing)
+            area = self.get_reference_model(Area, new_event.area_code,
+                                            use_existing_if_missing=use_existing_if_missing)
+            event_staff = self.get_reference_model(Staff, new_event.staff_code,
+                                                   use_existing_if_missing=use_existing_if_missing)
 
             errors = []
             if cluster is None:
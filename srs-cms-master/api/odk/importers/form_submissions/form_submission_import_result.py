@@ -1,27 +1,90 @@
 from api.common import Utils
+from collections import deque
+from django.conf import settings
+import json
+import os
+import threading
 import traceback
 
 
 class FromSubmissionImportResult:
-    def __init__(self):
+    """
+    Collects the results of a form submission import.
+
+    Imported models and form submissions are counted and tracked by id so large imports do not keep every
+    model instance and form submission in memory. Only the first max_samples of each are kept in
+    imported_models and imported_data. When spill_dir is set every imported model and form submission
+    is also appended to a JSON lines file in spill_dir. The file is kept open until close() is called.
+
+    Only the first and last max_log_lines / 2 info messages are kept in info_log. The messages for each imported
+    model and form submission are only printed.
+    """
+    SPILL_FILE_NAME = 'form-submission-import-result.jsonl'
+    _spill_lock = threading.Lock()
+
+    def __init__(self, max_samples=None, spill_dir=None, max_log_lines=None):
+        # The maximum number of imported models and form submissions to keep.
+        self.max_samples = max_samples if max_samples is not None else settings.ODK_IMPORT_RESULT_MAX_SAMPLES
+        # The maximum number of info messages to keep.
+        self.max_log_lines = max_log_lines if max_log_lines is not None else settings.ODK_IMPORT_RESULT_MAX_LOG_LINES
+        # The JSON lines file every imported model and form submission is written to.
+        self.spill_file = os.path.join(Utils.expand_path(spill_dir), self.SPILL_FILE_NAME) if spill_dir else None
+        self._spill_handle = None
         # The OdkForms imported.
         self.imported_forms = []
-        # The Database Models imported (Event, Household, etc.)
+        # Sample of the Database Models imported (Event, Household, etc.)
         self.imported_models = []
-        # The imported source rows.
+        # The number of Database Models imported by model class name.
+        self.imported_model_counts = {}
+        # Sample of the imported source rows.
         self.imported_data = []
-        # Import process info message log.
-        self.info_log = []
+        # The number of imported source rows.
+        self.imported_data_count = 0
+        # The first and last info messages of the import process.
+        self._info_log_head = []
+        self._info_log_tail = deque(maxlen=self.max_log_lines - self.max_log_lines // 2)
+        # The number of info messages that were not kept.
+        self.info_log_dropped_count = 0
         # Import process error message log.
         self.errors = []
+        # ODK client constructions and logins during the run (see OdkClientPool).
+        self.odk_client_stats = {}
+        # Reference model (Cluster, Area, etc.) cache hits and misses by model class name.
+        self.reference_cache_hits = {}
+        self.reference_cache_misses = {}
+        self._imported_model_ids = set()
+        self._imported_data_ids = set()
+
+    @property
+    def info_log(self):
+        """
+        Gets the info messages that were kept, with a message for the number of messages that were not.
+        """
+        dropped = ['... {} messages not kept ...'.format(self.info_log_dropped_count)] \
+            if self.info_log_dropped_count else []
+        return self._info_log_head + dropped + list(self._info_log_tail)
+
+    @property
+    def imported_models_count(self):
+        return sum(self.imported_model_counts.values())
 
     def as_json(self):
         json = {
             "imported_forms": [],
             "imported_models": [],
+            "imported_models_count": self.imported_models_count,
+            "imported_model_counts": self.imported_model_counts,
             "imported_data": self.imported_data,
+            "imported_data_count": self.imported_data_count,
+            "spill_file": self.spill_file,
             "info_log": self.info_log,
-            "errors": self.errors
+            "info_log_dropped_count": self.info_log_dropped_count,
+            "errors": self.errors,
+            "odk_client_stats": self.odk_client_stats,
+            "reference_cache": {
+                "hits": self.reference_cache_hits,
+                "misses": self.reference_cache_misses
+            }
         }
         for imported_form in self.imported_forms:
             id = imported_form if isinstance(imported_form, str) else imported_form.id
@@ -33,11 +96,32 @@ class FromSubmissionImportResult:
 
         return json
 
+    def as_progress_json(self):
+        """
+        Gets the counts of an import that is still running, without the samples and messages.
+        """
+        return {
+            "imported_models_count": self.imported_models_count,
+            "imported_model_counts": self.imported_model_counts,
+            "imported_data_count": self.imported_data_count,
+            "error_count": len(self.errors),
+        }
+
     def info(self, msg, console=True):
-        self.info_log.append(msg)
+        self._add_info(msg)
         if console:
             print(msg)
 
+    def _add_info(self, msg):
+        if len(self._info_log_head) < self.max_log_lines // 2:
+            self._info_log_head.append(msg)
+        elif self._info_log_tail.maxlen:
+            if len(self._info_log_tail) == self._info_log_tail.maxlen:
+                self.info_log_dropped_count += 1
+            self._info_log_tail.append(msg)
+        else:
+            self.info_log_dropped_count += 1
+
     @property
     def has_errors(self):
         return len(self.errors) > 0
@@ -62,14 +146,41 @@ class FromSubmissionImportResult:
     def merge(self, other_result):
         for imported_form in other_result.imported_forms:
             self.add_imported_form(imported_form, console=False)
+        new_model_ids = other_result._imported_model_ids - self._imported_model_ids
         for imported_model in other_result.imported_models:
-            self.add_imported_model(imported_model, console=False)
+            if (imported_model.__class__.__name__, imported_model.pk) in new_model_ids:
+                self._add_sample(self.imported_models, imported_model)
+        for model_id in new_model_ids:
+            self._imported_model_ids.add(model_id)
+            self.imported_model_counts[model_id[0]] = self.imported_model_counts.get(model_id[0], 0) + 1
+        new_data_ids = other_result._imported_data_ids - self._imported_data_ids
         for imported_data in other_result.imported_data:
-            self.add_imported_data(imported_data, console=False)
-        for info in other_result.info_log:
-            self.info(info, console=False)
+            if self._get_data_id(imported_data) in new_data_ids:
+                self._add_sample(self.imported_data, imported_data)
+        self._imported_data_ids.update(new_data_ids)
+        self.imported_data_count += len(new_data_ids)
+        for info in other_result._info_log_head:
+            self._add_info(info)
+        self.info_log_dropped_count += other_result.info_log_dropped_count
+        for info in other_result._info_log_tail:
+            self._add_info(info)
         for error in other_result.errors:
             self.error(error, console=False)
+        for class_name, count in other_result.reference_cache_hits.items():
+            self.reference_cache_hits[class_name] = self.reference_cache_hits.get(class_name, 0) + count
+        for class_name, count in other_result.reference_cache_misses.items():
+            self.reference_cache_misses[class_name] = self.reference_cache_misses.get(class_name, 0) + count
+
+    def add_reference_cache_lookup(self, model_class, hit):
+        """
+        Counts a reference model cache hit or miss.
+
+        Args:
+            model_class: The class of the reference model that was looked up.
+            hit: True if the model was found in the cache.
+        """
+        counts = self.reference_cache_hits if hit else self.reference_cache_misses
+        counts[model_class.__name__] = counts.get(model_class.__name__, 0) + 1
 
     def add_imported_form(self, odk_form, console=False):
         odk_forms = Utils.to_list(odk_form)
@@ -87,18 +198,53 @@ class FromSubmissionImportResult:
     def add_imported_model(self, model, console=False):
         models = Utils.to_list(model)
         for model in models:
-            if model not in self.imported_models:
-                self.imported_models.append(model)
+            model_id = (model.__class__.__name__, model.pk)
+            if model_id not in self._imported_model_ids:
+                self._imported_model_ids.add(model_id)
+                self.imported_model_counts[model_id[0]] = self.imported_model_counts.get(model_id[0], 0) + 1
+                self._add_sample(self.imported_models, model)
+                self._spill({'model': model_id[0], 'id': str(model.pk)})
             if console:
-                self.info('Imported {}: (id: {})'.format(model.__class__.__name__, model.id), console=console)
+                print('Imported {}: (id: {})'.format(model.__class__.__name__, model.id))
 
     def add_imported_data(self, imported_data, console=False, console_complete=False):
         imported_data = Utils.to_list(imported_data)
         for imported_data in imported_data:
-            if imported_data not in self.imported_data:
-                self.imported_data.append(imported_data)
-            if console or console_complete:
-                if console_complete:
-                    self.info('Imported Form Submission: {}'.format(imported_data), console)
-                else:
-                    self.info('Imported Form Submission: {}...'.format(str(imported_data)[0:50]), console=console)
+            data_id = self._get_data_id(imported_data)
+            if data_id not in self._imported_data_ids:
+                self._imported_data_ids.add(data_id)
+                self.imported_data_count += 1
+                self._add_sample(self.imported_data, imported_data)
+                self._spill({'data': imported_data})
+            if console_complete:
+                print('Imported Form Submission: {}'.format(imported_data))
+            elif console:
+                print('Imported Form Submission: {}...'.format(str(imported_data)[0:50]))
+
+    def _add_sample(self, samples, item):
+        if self.max_samples is None or len(samples) < self.max_samples:
+            samples.append(item)
+
+    def _get_data_id(self, imported_data):
+        if isinstance(imported_data, dict) and imported_data.get('__id') is not None:
+            return imported_data['__id']
+        return json.dumps(imported_data, sort_keys=True, default=str)
+
+    def _spill(self, record):
+        if self.spill_file:
+            line = json.dumps(record, sort_keys=True, default=str)
+            with self._spill_lock:
+                if self._spill_handle is None:
+                    Utils.ensure_dirs(os.path.dirname(self.spill_file))
+                    # Line buffered so the lines of the results spilling to the same file are not interleaved.
+                    self._spill_handle = open(self.spill_file, 'a', buffering=1)
+                self._spill_handle.write(line + '\n')
+
+    def close(self):
+        """
+        Closes the spill file. It is opened again if more models or form submissions are added.
+        """
+        with self._spill_lock:
+            if self._spill_handle is not None:
+                self._spill_handle.close()
+                self._spill_handle = None
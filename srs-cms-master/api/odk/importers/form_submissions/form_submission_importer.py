@@ -1,15 +1,21 @@
 from api.odk.importers.form_submissions.form_submission_importer_factory import FromSubmissionImporterFactory
 from api.odk.importers.form_submissions.form_submission_import_result import FromSubmissionImportResult
+from api.odk.importers.form_submissions.import_reference_cache import ImportReferenceCache
 from api.common import Utils
 from api.models import OdkProject, OdkForm, OdkFormImporterJob
-from api.odk import OdkConfig
+from api.odk import OdkConfig, OdkClientPool
+from concurrent.futures import ThreadPoolExecutor
+import threading
 from datetime import datetime, timedelta
-from django.db import models
+from django.apps import apps
+from django.conf import settings
+from django.db import models, connections
 
 
 class FromSubmissionImporter:
     def __init__(self, odk_projects=None, odk_forms=None, importers=None, form_versions=None,
-                 import_start_date=None, import_end_date=None, out_dir=None, verbose=False):
+                 import_start_date=None, import_end_date=None, out_dir=None, bulk_import=False, engine=None,
+                 workers=None, background_job=None, progress=None, stdout=None, verbose=False):
         self.odk_config = None
         self.client = None
         self.odk_projects = Utils.to_list(odk_projects)
@@ -19,15 +25,29 @@ class FromSubmissionImporter:
         self.import_start_date = import_start_date
         self.import_end_date = import_end_date
         self.out_dir = Utils.expand_path(out_dir) if out_dir else None
+        self.bulk_import = bulk_import is True
+        # 'orm' or 'copy'. Defaults to ODK_IMPORT_ENGINE.
+        self.engine = engine or settings.ODK_IMPORT_ENGINE
+        self.workers = max(1, workers or settings.ODK_IMPORT_WORKERS)
+        # The BackgroundJob running the import. It is set on each OdkFormImporterJob.
+        self.background_job = background_job
+        # Function(fraction) called with the fraction of the OdkForms imported.
+        self.progress = progress
+        # Where the progress of each page and the import stats are written while the import runs.
+        self.stdout = stdout
+        self._stdout_lock = threading.Lock()
         self.verbose = verbose is True
-        self.result = FromSubmissionImportResult()
+        self.result = FromSubmissionImportResult(spill_dir=self.out_dir)
+        self.reference_cache = None
         self._importer_started_at = Utils.to_aware_datetime(datetime.now())
 
     def execute(self):
+        odk_client_stats = OdkClientPool.stats()
         try:
             self.result.info('Importing ODK Form Submissions...', console=True)
             self.odk_config = OdkConfig.from_env()
-            self.client = self.odk_config.client()
+            self.client = OdkClientPool.get_client(self.odk_config)
+            self.reference_cache = ImportReferenceCache()
 
             _importers = self.only_importers
             self.only_importers = []
@@ -42,9 +62,10 @@ class FromSubmissionImporter:
                 if not self.odk_projects and not self.odk_forms:
                     self.odk_projects = list(OdkProject.filter_by(is_enabled=True).values_list('id', flat=True))
 
+                odk_forms = []
                 if self.odk_projects:
                     for odk_project in self.odk_projects:
-                        self._import_project(odk_project)
+                        odk_forms.extend(self._get_project_odk_forms(odk_project))
 
                 if self.odk_forms:
                     for odk_form in self.odk_forms:
@@ -52,45 +73,69 @@ class FromSubmissionImporter:
                             odk_form = odk_form if isinstance(odk_form, OdkForm) else OdkForm.find_by(id=odk_form)
                             if odk_form.version not in self.form_versions:
                                 continue
-                        self._import_form(odk_form)
+                        odk_forms.append(odk_form)
+
+                self._import_forms(odk_forms)
 
         except Exception as ex:
             self.result.error('Error Executing ODK Form Submission Importer.', error=ex, console=True)
         finally:
+            self.result.odk_client_stats = OdkClientPool.stats_since(odk_client_stats)
             self._show_import_stats()
+            self.result.close()
             return self.result
 
     def _show_import_stats(self):
-        self.result.info("", console=True)
+        self._info("", console=True)
 
         if self.result.errors:
-            self.result.info('Form Submission import completed with errors.', console=True)
+            self._info('Form Submission import completed with errors.', console=True)
+            # The errors are not written to stdout, they are in result.errors.
             for error in self.result.errors:
                 self.result.info(error, console=True)
         else:
-            self.result.info('Form Submission import completed successfully.', console=True)
-
-        imported_model_stats = {}
-        total_model_stats = {}
-        for imported_model in self.result.imported_models:
-            class_name = imported_model.__class__.__name__
-            if class_name not in imported_model_stats:
-                imported_model_stats[class_name] = 0
-            imported_model_stats[class_name] += 1
-
-            if class_name not in total_model_stats:
-                total_model_stats[class_name] = imported_model.__class__.objects.count()
-
-        self.result.info("", console=True)
-        self.result.info('Total Imported Form Submissions: {}'.format(len(self.result.imported_forms)), console=True)
-        self.result.info('Total Imported Models: {}'.format(len(self.result.imported_models)), console=True)
-        for class_name, count in imported_model_stats.items():
-            self.result.info(
-                ' - {}: Added: {} (Total: {})'.format(class_name, count, total_model_stats[class_name]),
+            self._info('Form Submission import completed successfully.', console=True)
+
+        self._info("", console=True)
+        self._info('Total Imported Form Submissions: {}'.format(len(self.result.imported_forms)), console=True)
+        self._info('Total Imported Models: {}'.format(self.result.imported_models_count), console=True)
+        for class_name, count in self.result.imported_model_counts.items():
+            total_count = apps.get_model('api', class_name).objects.count()
+            self._info(
+                ' - {}: Added: {} (Total: {})'.format(class_name, count, total_count),
                 console=True)
-        self.result.info('Imported Data Records: {}'.format(len(self.result.imported_data)), console=True)
+        self._info('Imported Data Records: {}'.format(self.result.imported_data_count), console=True)
+        if self.result.spill_file:
+            self._info('Import Result File: {}'.format(self.result.spill_file), console=True)
+
+        reference_class_names = sorted(set(self.result.reference_cache_hits) | set(self.result.reference_cache_misses))
+        if reference_class_names:
+            self._info('Reference Cache:', console=True)
+            for class_name in reference_class_names:
+                self._info(' - {}: Hits: {} Misses: {}'.format(
+                    class_name,
+                    self.result.reference_cache_hits.get(class_name, 0),
+                    self.result.reference_cache_misses.get(class_name, 0)
+                ), console=True)
+
+        self._info('ODK Clients: Constructed: {} Logins: {}'.format(
+            self.result.odk_client_stats.get(OdkClientPool.STAT_CLIENT_CONSTRUCTIONS, 0),
+            self.result.odk_client_stats.get(OdkClientPool.STAT_LOGINS, 0)
+        ), console=True)
 
-    def _import_project(self, odk_project):
+    def _info(self, msg, console=True):
+        self.result.info(msg, console=console)
+        self._write(msg)
+
+    def _write(self, msg):
+        if self.stdout:
+            with self._stdout_lock:
+                self.stdout.write(msg + '\n')
+
+    def _get_project_odk_forms(self, odk_project):
+        """
+        Gets the enabled OdkForm IDs to import for an OdkProject.
+        """
         odk_project = odk_project if isinstance(odk_project, OdkProject) else OdkProject.find_by(id=odk_project)
 
         if not odk_project:
@@ -107,27 +152,96 @@ class FromSubmissionImporter:
             else:
                 odk_form_ids = odk_project.odk_forms.filter(is_enabled=True).values_list('id', flat=True)
 
-            for odk_form_id in odk_form_ids:
-                self._import_form(odk_form_id)
+            return list(odk_form_ids)
+        return []
+
+    def _import_forms(self, odk_forms):
+        """
+        Imports each OdkForm. When workers is greater than 1 the OdkForms are imported concurrently.
+        OdkForms with importers that depend on the models imported by another OdkForm's importers
+        (e.g., VerbalAutopsies depend on Deaths) are imported after that OdkForm completes.
+        """
+        imported_count = 0
+        if self.workers == 1:
+            for odk_form in odk_forms:
+                self.result.merge(self._import_form(odk_form))
+                imported_count += 1
+                self._report_progress(imported_count, len(odk_forms))
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for stage_odk_forms in self._get_import_stages(odk_forms):
+                    for form_result in executor.map(self._import_form_in_thread, stage_odk_forms):
+                        self.result.merge(form_result)
+                        imported_count += 1
+                        self._report_progress(imported_count, len(odk_forms))
+
+    def _report_progress(self, imported_count, total_count):
+        if self.progress and total_count:
+            self.progress(imported_count / total_count)
+
+    def _import_form_in_thread(self, odk_form):
+        try:
+            return self._import_form(odk_form)
+        finally:
+            # Each thread has its own database connection.
+            connections.close_all()
+
+    def _get_import_stages(self, odk_forms):
+        """
+        Groups the OdkForms into stages that can be imported concurrently.
+
+        Returns:
+            List of lists of OdkForms.
+        """
+        form_importers = []
+        seen_odk_form_ids = set()
+        for odk_form in odk_forms:
+            odk_form = odk_form if isinstance(odk_form, OdkForm) else OdkForm.find_by(id=odk_form)
+            if odk_form is None or odk_form.id in seen_odk_form_ids:
+                continue
+            seen_odk_form_ids.add(odk_form.id)
+            importers = odk_form.get_odk_form_importers(importers=self.only_importers or None)
+            form_importers.append((odk_form, set(i.importer for i in importers)))
+
+        stages = []
+        imported_importers = set()
+        while form_importers:
+            pending_importers = set().union(*(importers for _, importers in form_importers))
+            stage = []
+            for odk_form, importers in form_importers:
+                dependencies = set()
+                for importer in importers:
+                    dependencies.update(FromSubmissionImporterFactory.get_importer_dependencies(importer))
+                if not (dependencies - importers - imported_importers) & pending_importers:
+                    stage.append((odk_form, importers))
+            # Circular dependencies: import the remaining forms together.
+            if not stage:
+                stage = form_importers
+            stages.append([odk_form for odk_form, _ in stage])
+            for odk_form, importers in stage:
+                imported_importers.update(importers)
+            form_importers = [f for f in form_importers if f not in stage]
+        return stages
 
     def _import_form(self, odk_form):
+        result = FromSubmissionImportResult()
         odk_form = odk_form if isinstance(odk_form, OdkForm) else OdkForm.find_by(id=odk_form)
         odk_project = odk_form.odk_project
 
         if not odk_project or not odk_form:
             if not odk_project:
-                self.result.error('OdkProject not found: {}'.format(odk_project), console=True)
+                result.error('OdkProject not found: {}'.format(odk_project), console=True)
             if not odk_form:
-                self.result.error('OdkForm not found: {}'.format(odk_form), console=True)
+                result.error('OdkForm not found: {}'.format(odk_form), console=True)
         elif odk_project and (not odk_project.is_enabled or not odk_form.is_enabled):
             if not odk_project.is_enabled:
-                self.result.error('OdkProject not enabled: {} (id: {})'.format(odk_project.name, odk_project.id),
-                                  console=True)
+                result.error('OdkProject not enabled: {} (id: {})'.format(odk_project.name, odk_project.id),
+                             console=True)
             if not odk_form.is_enabled:
-                self.result.error('OdkForm not not enabled: {} (id: {})'.format(odk_form.name, odk_form.id),
-                                  console=True)
+                result.error('OdkForm not not enabled: {} (id: {})'.format(odk_form.name, odk_form.id),
+                             console=True)
         else:
-            self.result.info(
+            result.info(
                 'Importing OdkForm: {} (id: {}, version: {}) '.format(odk_form.name, odk_form.id, odk_form.version),
                 console=True)
 
@@ -141,25 +255,25 @@ class FromSubmissionImporter:
 
             if primary_odk_form_importer is None:
                 if self.only_importers:
-                    self.result.info(
+                    result.info(
                         'OdkForm: {} (id: {}) does not have importer(s): {}. Skipping.'.format(
                             odk_form.name,
                             odk_form.id,
                             ','.join(self.only_importers)),
                         console=self.verbose)
                 else:
-                    self.result.error(
+                    result.error(
                         'Primary Importer not found for OdkForm: {} (id: {})'.format(odk_form.anme, odk_form.id),
                         console=True)
             else:
-                self.result.info("")
-                self.result.info(
+                result.info("")
+                result.info(
                     'Executing Primary Form Submission Importer: {}'.format(primary_odk_form_importer.importer),
                     console=self.verbose)
 
                 odk_form_importer_job = self._create_odk_form_importer_job(primary_odk_form_importer)
 
-                self.result.info('Importing Form Submission Dates: {} - {}'.format(
+                result.info('Importing Form Submission Dates: {} - {}'.format(
                     odk_form_importer_job.import_start_date, odk_form_importer_job.import_end_date
                 ), console=self.verbose)
 
@@ -171,33 +285,65 @@ class FromSubmissionImporter:
                         child_importers=child_odk_form_importers,
                         import_start_date=odk_form_importer_job.import_start_date,
                         import_end_date=odk_form_importer_job.import_end_date,
+                        import_start_submission_id=odk_form_importer_job.args.get('import_start_submission_id'),
                         out_dir=self.out_dir,
+                        bulk_import=self.bulk_import,
+                        engine=self.engine,
+                        reference_cache=self.reference_cache,
+                        progress=lambda importer: self._save_odk_form_importer_job_progress(odk_form_importer_job,
+                                                                                             importer),
                         verbose=self.verbose
                     )
                     importer_result = primary_importer.execute()
-                    self.result.merge(importer_result)
+                    result.merge(importer_result)
+                    if primary_importer.last_submission_date is not None and (
+                            odk_form_importer_job.last_submission_date is None or
+                            primary_importer.last_submission_date > odk_form_importer_job.last_submission_date):
+                        odk_form_importer_job.last_submission_date = primary_importer.last_submission_date
+                        odk_form_importer_job.last_submission_id = primary_importer.last_submission_id
                 except Exception as ex:
-                    self.result.error('Error executing Form Submission importer.', error=ex, console=True)
+                    result.error('Error executing Form Submission importer.', error=ex, console=True)
                 finally:
-                    if self.result.errors:
+                    if result.errors:
                         odk_form_importer_job.status = OdkFormImporterJob.STATUS_ERRORED
                     else:
                         odk_form_importer_job.status = OdkFormImporterJob.STATUS_SUCCESSFUL
-                    odk_form_importer_job.result = self.result.as_json()
+                    odk_form_importer_job.result = result.as_json()
                     odk_form_importer_job.save()
-                return importer_result
-        return None
+        return result
+
+    def _save_odk_form_importer_job_progress(self, odk_form_importer_job, importer):
+        """
+        Saves the counts so far of the OdkFormImporterJob's importer after each page and writes them to stdout.
+        The full result is saved once the importer finishes.
+        """
+        progress_json = {**importer.result.as_progress_json(), 'imported_page_count': importer.imported_page_count}
+        OdkFormImporterJob.objects.filter(id=odk_form_importer_job.id).update(result=progress_json)
+        self._write('{}: Page: {} Imported Models: {} Imported Data Records: {} Errors: {}'.format(
+            importer.odk_form.name,
+            progress_json['imported_page_count'],
+            progress_json['imported_models_count'],
+            progress_json['imported_data_count'],
+            progress_json['error_count']
+        ))
 
     def _create_odk_form_importer_job(self, odk_form_importer):
         import_start_date = Utils.to_aware_datetime(self.import_start_date) if self.import_start_date else None
         import_end_date = Utils.to_aware_datetime(self.import_end_date) if self.import_end_date else None
+        last_odk_form_importer_job = (odk_form_importer.odk_form_importer_jobs
+                                      .filter(status=OdkFormImporterJob.STATUS_SUCCESSFUL)
+                                      .order_by('-import_end_date')
+                                      .first())
+        last_submission_date = last_odk_form_importer_job.last_submission_date if last_odk_form_importer_job else None
+        last_submission_id = last_odk_form_importer_job.last_submission_id if last_odk_form_importer_job else None
+        import_start_submission_id = None
         if import_start_date is None:
-            import_start_date = (odk_form_importer.odk_form_importer_jobs
-                                 .filter(status=OdkFormImporterJob.STATUS_SUCCESSFUL)
-                                 .order_by('-import_end_date')
-                                 .values_list('import_end_date', flat=True).first())
-            if import_start_date:
-                import_start_date = import_start_date + timedelta(seconds=1)
+            if last_submission_date:
+                # Resume from the last form submission imported.
+                import_start_date = last_submission_date
+                import_start_submission_id = last_submission_id
+            elif last_odk_form_importer_job:
+                import_start_date = last_odk_form_importer_job.import_end_date + timedelta(seconds=1)
             else:
                 import_start_date = Utils.to_aware_datetime(datetime.min)
 
@@ -216,15 +362,21 @@ class FromSubmissionImporter:
         odk_form_importer_job = odk_form_importer.odk_form_importer_jobs.create(
             odk_form_importer=odk_form_importer,
             status=OdkFormImporterJob.STATUS_RUNNING,
+            background_job=self.background_job,
             import_start_date=import_start_date,
             import_end_date=import_end_date,
+            last_submission_date=last_submission_date,
+            last_submission_id=last_submission_id,
             args={
                 "odk_projects": [p.id if isinstance(p, models.Model) else p for p in self.odk_projects],
                 "odk_forms": [f.id if isinstance(f, models.Model) else f for f in self.odk_forms],
                 "importers": self.only_importers,
+                "bulk_import": self.bulk_import,
+                "engine": self.engine,
                 "form_version": odk_form_importer.odk_form.version,
                 "import_start_date_orig": str(self.import_start_date) if self.import_start_date else None,
-                "import_end_date_orig": str(self.import_end_date) if self.import_end_date else None
+                "import_end_date_orig": str(self.import_end_date) if self.import_end_date else None,
+                "import_start_submission_id": import_start_submission_id
             }
         )
         return odk_form_importer_job
@@ -1,28 +1,78 @@
+import json
 import os
-from api.odk import OdkConfig
+from api.odk import OdkConfig, OdkClientPool
 from api.odk.importers.form_submissions.form_submission_import_result import FromSubmissionImportResult
 from api.odk.importers.form_submissions.form_submission_importer_factory import FromSubmissionImporterFactory
+from api.odk.importers.form_submissions.import_reference_cache import ImportReferenceCache
+from api.odk.importers.form_submissions.form_submission_page import FormSubmissionPage
+from api.odk.importers.form_submissions.form_submission_page_fetcher import FormSubmissionPageFetcher
+from api.odk.importers.form_submissions.copy_import_engine import CopyImportEngine
 from api.odk.transformers import TransformField
-from api.common import Utils, TypeCaster
+from api.common import Utils, TypeCaster, FieldPath
+from config.env import Env
 from django.conf import settings
+from django.db import transaction
 
 
 class FromSubmissionImporterBase:
+    # Transforms the ODK '__id' value into the 'key' value.
+    KEY_TRANSFORM = TransformField(name='replace', args=['uuid:', ''])
+
+    # ODK_API_FORM_VERSION_FILTER values.
+    FORM_VERSION_FILTER_CLIENT = 'client'
+    FORM_VERSION_FILTER_METADATA = 'metadata'
+
+    # ODK_IMPORT_ENGINE values.
+    ENGINE_ORM = 'orm'
+    ENGINE_COPY = 'copy'
+    ENGINES = [ENGINE_ORM, ENGINE_COPY]
+
+    # Set to False for importers that save the model themselves in on_before_save_model(s).
+    SUPPORTS_BULK_IMPORT = True
+
+    # Set to True for importers that can import with the 'copy' engine. See: CopyImportEngine
+    SUPPORTS_COPY_IMPORT = False
+
+    # The foreign keys the 'copy' engine resolves in the database.
+    # Dict of foreign key field name to (model class, lookup field). See: on_get_copy_reference_values
+    COPY_IMPORT_REFERENCES = {}
+
+    # The class of the model the importer imports.
+    MODEL_CLASS = None
+
     def __init__(self, odk_form, odk_form_importer, child_importers=None, import_start_date=None, import_end_date=None,
-                 form_submissions=None, out_dir=None, verbose=False):
+                 import_start_submission_id=None, form_submissions=None, out_dir=None, bulk_import=False,
+                 engine=None, reference_cache=None, progress=None, verbose=False):
         self.odk_config = OdkConfig.from_env()
-        self.client = self.odk_config.client()
+        self.client = OdkClientPool.get_client(self.odk_config)
         self.odk_form = odk_form
         self.odk_form_importer = odk_form_importer
         self.child_importers = Utils.to_list(child_importers)
         self.import_start_date = import_start_date
         self.import_end_date = import_end_date
+        # The __id of the last form submission imported at import_start_date.
+        self.import_start_submission_id = import_start_submission_id
+        self.last_submission_date = None
+        self.last_submission_id = None
         self._form_submissions = Utils.to_list(form_submissions)
         self.odk_project = odk_form.odk_project
         self.out_dir = Utils.expand_path(out_dir) if out_dir else None
+        self.bulk_import = bulk_import is True
+        self.engine = engine or settings.ODK_IMPORT_ENGINE
+        self.reference_cache = reference_cache or ImportReferenceCache()
+        # Function(importer) called after each page of form submissions is imported.
+        self.progress = progress
+        # The number of pages of form submissions imported.
+        self.imported_page_count = 0
         self.verbose = verbose is True
-        self.result = FromSubmissionImportResult()
-        self._etl_mappings = None
+        self.result = self.new_result()
+        self._has_target_fields = {}
+        # The parent models resolved for the current page by model class and key.
+        self._parent_models = {}
+        # The FormSubmissionPage being imported.
+        self.form_submission_page = None
+        # The CopyImportEngines by model class.
+        self._copy_import_engines = {}
 
     def validate_before_execute(self):
         """
@@ -40,6 +90,10 @@ class FromSubmissionImporterBase:
                 ), console=True)
             return False
 
+        if self.engine not in self.ENGINES:
+            self.result.error('Invalid Import Engine: {}'.format(self.engine), console=True)
+            return False
+
         odk_form_importers = self.odk_form.get_odk_form_importers()
         if not odk_form_importers:
             self.result.error(
@@ -58,23 +112,11 @@ class FromSubmissionImporterBase:
                 ), console=True)
                 return False
             else:
-                etl_mappings = self.get_etl_mappings()
-                if not etl_mappings:
-                    self.result.error('ETL Document Mappings not set or enabled. {}: {} ({})'.format(
-                        odk_form_importer.etl_document.__class__.__name__,
-                        odk_form_importer.etl_document.name,
-                        odk_form_importer.etl_document.id
-                    ), console=True)
+                mapping_errors = odk_form_importer.etl_document.get_mapping_errors()
+                if mapping_errors:
+                    for mapping_error in mapping_errors:
+                        self.result.error(mapping_error, console=True)
                     return False
-                else:
-                    primary_key_mappings = [m for m in etl_mappings if m.is_primary_key]
-                    if not primary_key_mappings:
-                        self.result.error('ETL Document Mappings does not have primary key(s) set.. {}: {} ({})'.format(
-                            odk_form_importer.etl_document.__class__.__name__,
-                            odk_form_importer.etl_document.name,
-                            odk_form_importer.etl_document.id
-                        ), console=True)
-                        return False
         return True
 
     def get_form_submissions(self):
@@ -84,40 +126,270 @@ class FromSubmissionImporterBase:
         Returns:
             None
         """
-        page_size = settings.ODK_API_FORM_SUBMISSION_PAGE_SIZE
-        offset = 0
-        while True:
-            if self._form_submissions:
-                form_submissions = self._form_submissions[offset:offset + page_size]
-                form_submission_response = {
-                    'value': form_submissions,
-                    '@odata.count': len(form_submissions)
-                }
-            else:
-                form_submission_response = self.client.submissions.get_table(
-                    form_id=self.odk_form.xml_form_id,
-                    project_id=self.odk_project.project_id,
-                    count=True,
-                    top=page_size,
-                    skip=offset,
-                    expand='*',
-                    filter="__system/submissionDate ge '{}' and __system/submissionDate le '{}'".format(
-                        self.import_start_date,
-                        self.import_end_date)
-                )
+        for form_submissions in self.get_form_submission_pages():
+            yield from form_submissions
+
+    def get_form_submission_pages(self):
+        """
+        Generator to get pages of form submissions from ODK Central for the OdkForm, version, and start/end dates.
+        The next page of form submissions is fetched in the background while the current page is processed.
 
+        Form Submissions cannot be filtered at the API by formVersion. With the 'metadata' ODK_API_FORM_VERSION_FILTER
+        only the __id and __system fields are fetched first, then only the form submissions with a matching
+        formVersion are fetched with all their fields. With the 'client' filter all the form submissions
+        are fetched and filtered here.
+
+        The newest form submission is set in last_submission_date and last_submission_id after its page is imported,
+        so a page that is prefetched but not imported does not move the start of the next import past it.
+
+        Returns:
+            None
+        """
+        prefetch_pages = settings.ODK_API_FORM_SUBMISSION_PREFETCH_PAGES
+        form_submission_ids = None
+        newest_metadata_submission = None
+        if self._form_submissions:
+            prefetch_pages = 0
+            pages = self._get_form_submission_list_pages()
+        elif settings.ODK_API_FORM_VERSION_FILTER == self.FORM_VERSION_FILTER_METADATA:
+            form_submission_ids, date_ranges, newest_metadata_submission = self._get_form_version_date_ranges()
+            pages = self._get_form_submission_date_range_pages(date_ranges)
+        else:
+            pages = self._get_form_submission_pages(self.import_start_date, self.import_end_date, expand='*')
+
+        page_fetcher = FormSubmissionPageFetcher(pages, prefetch_pages=prefetch_pages)
+        try:
+            for current_page_submissions in page_fetcher:
+                form_submissions = []
+                for form_submission in current_page_submissions:
+                    form_submission_id = form_submission.get('__id')
+                    if self._is_import_start_submission(form_submission):
+                        continue
+                    if form_submission_ids is not None:
+                        # The date ranges can overlap so only return each form submission once.
+                        if form_submission_id not in form_submission_ids:
+                            continue
+                        form_submission_ids.remove(form_submission_id)
+                    elif not self._is_form_version(form_submission):
+                        continue
+                    form_submissions.append(form_submission)
+                if form_submissions:
+                    yield form_submissions
+                    self._report_progress()
+                self._set_last_submission(current_page_submissions)
+
+            if form_submission_ids:
+                # Form submissions were changed between fetching the metadata and the form submissions.
+                self.result.info('Form Submissions not found in date ranges: {}. Fetching all pages.'.format(
+                    len(form_submission_ids)
+                ), console=self.verbose)
+                for current_page_submissions in self._get_form_submission_pages(self.import_start_date,
+                                                                                 self.import_end_date,
+                                                                                 expand='*'):
+                    form_submissions = []
+                    for form_submission in current_page_submissions:
+                        form_submission_id = form_submission.get('__id')
+                        if form_submission_id in form_submission_ids and self._is_form_version(form_submission):
+                            form_submission_ids.remove(form_submission_id)
+                            form_submissions.append(form_submission)
+                    if form_submissions:
+                        yield form_submissions
+                        self._report_progress()
+                    self._set_last_submission(current_page_submissions)
+
+            # All the form submissions are imported, skip the other versions' form submissions in the next import.
+            if newest_metadata_submission is not None:
+                self._set_last_submission([newest_metadata_submission])
+        finally:
+            page_fetcher.close()
+            self._log_page_timings(page_fetcher)
+
+    def _report_progress(self):
+        self.imported_page_count += 1
+        if self.progress:
+            self.progress(self)
+
+    def _get_form_submission_pages(self, start_date, end_date, select=None, expand=None, page_size=None):
+        """
+        Generator to get pages of form submissions from ODK Central between two submission dates.
+
+        Pages are fetched with a cursor on __system/submissionDate instead of skipping all the previous pages.
+        Each page narrows the date range to the submission date of its last form submission and only skips the
+        form submissions with that same submission date.
+
+        Args:
+            start_date: The submission date to start from (inclusive).
+            end_date: The submission date to end at (inclusive).
+            select: The fields to get.
+            expand: The repetitions to expand.
+            page_size: The number of form submissions per page. Defaults to ODK_API_FORM_SUBMISSION_PAGE_SIZE.
+
+        Returns:
+            None
+        """
+        page_size = page_size or settings.ODK_API_FORM_SUBMISSION_PAGE_SIZE
+        skip = 0
+        while True:
+            form_submission_response = self.client.submissions.get_table(
+                form_id=self.odk_form.xml_form_id,
+                project_id=self.odk_project.project_id,
+                top=page_size,
+                skip=skip or None,
+                expand=expand,
+                select=select,
+                filter=self._get_form_submissions_filter(start_date, end_date)
+            )
             current_page_submissions = form_submission_response.get('value', [])
-            for form_submission in current_page_submissions:
-                # Form Submissions cannot be filtered at the API by formVersion so manually filter here.
-                form_version = self.get_value_from_record(
-                    form_submission,
-                    source_name='__system.formVersion',
-                    _target_type=TypeCaster.TypeCode.STR)
-                if form_version == self.odk_form.version:
-                    yield form_submission
+            yield current_page_submissions
+
             if len(current_page_submissions) < page_size:
                 break
-            offset += page_size
+
+            first_submission_date = self._get_submission_date(current_page_submissions[0])
+            last_submission_date = self._get_submission_date(current_page_submissions[-1])
+            if first_submission_date == last_submission_date:
+                skip += len(current_page_submissions)
+                continue
+
+            skip = 0
+            for form_submission in reversed(current_page_submissions):
+                if self._get_submission_date(form_submission) != last_submission_date:
+                    break
+                skip += 1
+
+            # Narrow the date range in the direction the form submissions are ordered.
+            if last_submission_date < first_submission_date:
+                end_date = last_submission_date
+            else:
+                start_date = last_submission_date
+
+    def _get_form_submission_list_pages(self):
+        """
+        Generator to get pages of the form submissions the importer was created with.
+        """
+        page_size = settings.ODK_API_FORM_SUBMISSION_PAGE_SIZE
+        for offset in range(0, len(self._form_submissions), page_size):
+            yield self._form_submissions[offset:offset + page_size]
+
+    def _get_form_version_date_ranges(self):
+        """
+        Fetches the __id and __system fields of the form submissions and gets the submission date ranges
+        of the form submissions with a matching formVersion.
+
+        Returns:
+            Tuple (set of form submission __ids, list of (start date, end date) tuples, the newest form submission).
+        """
+        page_size = settings.ODK_API_FORM_SUBMISSION_PAGE_SIZE
+        form_submission_ids = set()
+        matches = []
+        total = 0
+        newest_submission = None
+        for current_page_submissions in self._get_form_submission_pages(
+                self.import_start_date,
+                self.import_end_date,
+                select='__id,__system',
+                page_size=settings.ODK_API_FORM_SUBMISSION_METADATA_PAGE_SIZE):
+            for position, form_submission in enumerate(current_page_submissions, start=total):
+                if self._is_form_version(form_submission) and not self._is_import_start_submission(form_submission):
+                    form_submission_ids.add(form_submission.get('__id'))
+                    matches.append((position, self._get_submission_date(form_submission)))
+            total += len(current_page_submissions)
+            newest_submission = self._get_newest_submission(current_page_submissions, newest_submission)
+
+        # Group the matches into ranges of up to page_size form submissions, splitting at gaps larger than a page.
+        groups = []
+        for position, submission_date in matches:
+            if groups:
+                group = groups[-1]
+                first_position, last_position = group[0][0], group[-1][0]
+                if position - last_position < page_size and position - first_position < page_size:
+                    group.append((position, submission_date))
+                    continue
+            groups.append([(position, submission_date)])
+
+        date_ranges = []
+        for group in groups:
+            submission_dates = [submission_date for _, submission_date in group]
+            date_ranges.append((min(submission_dates), max(submission_dates)))
+
+        self.result.info('Form Submissions for version {}: {} of {}, Date Ranges: {}'.format(
+            self.odk_form.version,
+            len(form_submission_ids),
+            total,
+            len(date_ranges)
+        ), console=self.verbose)
+        return form_submission_ids, date_ranges, newest_submission
+
+    def _get_form_submission_date_range_pages(self, date_ranges):
+        """
+        Generator to get the pages of form submissions for each submission date range.
+        """
+        for start_date, end_date in date_ranges:
+            yield from self._get_form_submission_pages(start_date, end_date, expand='*')
+
+    def _get_form_submissions_filter(self, start_date, end_date):
+        return "__system/submissionDate ge '{}' and __system/submissionDate le '{}'".format(start_date, end_date)
+
+    def _get_submission_date(self, form_submission):
+        return (form_submission.get('__system') or {}).get('submissionDate')
+
+    def _set_last_submission(self, form_submissions):
+        """
+        Sets last_submission_date and last_submission_id to the newest form submission.
+        """
+        newest_submission = self._get_newest_submission(form_submissions)
+        if newest_submission is not None:
+            submission_date = TypeCaster.to_datetime(self._get_submission_date(newest_submission))
+            if self.last_submission_date is None or submission_date > self.last_submission_date:
+                self.last_submission_date = submission_date
+                self.last_submission_id = newest_submission.get('__id')
+
+    def _get_newest_submission(self, form_submissions, newest_submission=None):
+        """
+        Gets the form submission with the newest submission date.
+
+        Args:
+            form_submissions: The form submissions to check.
+            newest_submission: The newest form submission so far.
+
+        Returns:
+            The newest form submission or None.
+        """
+        newest_date = TypeCaster.to_datetime(self._get_submission_date(newest_submission)) if newest_submission else None
+        for form_submission in form_submissions:
+            submission_date = TypeCaster.to_datetime(self._get_submission_date(form_submission))
+            if submission_date is not None and (newest_date is None or submission_date > newest_date):
+                newest_submission = form_submission
+                newest_date = submission_date
+        return newest_submission
+
+    def _is_import_start_submission(self, form_submission):
+        """
+        Gets if the form submission is the last form submission imported by the previous import.
+        """
+        return (self.import_start_submission_id is not None and
+                form_submission.get('__id') == self.import_start_submission_id)
+
+    def _is_form_version(self, form_submission):
+        form_version = self.get_value_from_record(
+            form_submission,
+            source_name='__system.formVersion',
+            _target_type=TypeCaster.TypeCode.STR)
+        return form_version == self.odk_form.version
+
+    def _log_page_timings(self, page_fetcher):
+        for page_timing in page_fetcher.page_timings:
+            self.result.info('Form Submissions Page: {} ({} records), Fetch: {:.3f}s, Processing: {:.3f}s'.format(
+                page_timing['page'],
+                page_timing['count'],
+                page_timing['fetch_seconds'],
+                page_timing.get('process_seconds', 0)
+            ), console=self.verbose)
+        self.result.info('Form Submissions Pages: {}, Fetch: {:.3f}s, Processing: {:.3f}s'.format(
+            len(page_fetcher.page_timings),
+            page_fetcher.fetch_seconds,
+            page_fetcher.process_seconds
+        ), console=self.verbose)
 
     def get_etl_mapping_for(self, source_name=None, target_name=None):
         """
@@ -128,15 +400,9 @@ class FromSubmissionImporterBase:
             target_name: The target_name to find the mapping by.
 
         Returns:
-            EtlMapping or None.
+            CompiledEtlMapping or None.
         """
-        etl_mapping = next(
-            (mapping for mapping in self.get_etl_mappings() if
-             (target_name is None or mapping.target_name == target_name) and
-             (source_name is None or mapping.source_name == source_name)
-             ),
-            None)
-        return etl_mapping
+        return self.get_mapping_plan().get_mapping_for(source_name=source_name, target_name=target_name)
 
     def get_etl_mappings(self):
         """
@@ -145,11 +411,28 @@ class FromSubmissionImporterBase:
         Returns:
             List of EtlMappings.
         """
-        if self._etl_mappings is None:
-            self._etl_mappings = list(
-                self.odk_form_importer.etl_document.etl_mappings.filter(is_enabled=True).order_by('-is_primary_key')
-            )
-        return self._etl_mappings
+        return self.get_mapping_plan().etl_mappings
+
+    def get_mapping_plan(self):
+        """
+        Get the compiled EtlMappingPlan for the OdkFormImporter's EtlDocument.
+
+        Returns:
+            EtlMappingPlan
+        """
+        return self.odk_form_importer.etl_document.get_mapping_plan()
+
+    def on_before_import_page(self, form_submissions):
+        """
+        Called before importing a page of form submissions.
+
+        Args:
+            form_submissions: The ODK form submissions in the page.
+
+        Returns:
+            None
+        """
+        pass
 
     def on_can_import(self, etl_record, form_submission):
         """
@@ -224,6 +507,23 @@ class FromSubmissionImporterBase:
         """
         return True
 
+    def on_before_save_models(self, new_models):
+        """
+        Called before bulk saving a page of model instances.
+        By default, this calls on_before_save_model for each model instance.
+
+        Args:
+            new_models: List of tuples (new_model, etl_record, form_submission) being saved.
+
+        Returns:
+            List of tuples (new_model, etl_record, form_submission) that can be saved.
+        """
+        return [
+            (new_model, etl_record, form_submission)
+            for new_model, etl_record, form_submission in new_models
+            if self.on_before_save_model(new_model, etl_record, form_submission)
+        ]
+
     def on_after_save_model(self, new_model, etl_record, form_submission):
         """
         Called after saving a model instance.
@@ -238,6 +538,77 @@ class FromSubmissionImporterBase:
         """
         pass
 
+    def on_after_save_models(self, new_models):
+        """
+        Called after bulk saving a page of model instances.
+        By default, this calls on_after_save_model for each model instance.
+
+        Args:
+            new_models: List of tuples (new_model, etl_record, form_submission) that were saved.
+
+        Returns:
+            None
+        """
+        for new_model, etl_record, form_submission in new_models:
+            self.on_after_save_model(new_model, etl_record, form_submission)
+
+    def on_before_copy_models(self, new_models):
+        """
+        Called before importing a page of model instances with the 'copy' engine.
+        The foreign keys in COPY_IMPORT_REFERENCES are resolved in the database so by default
+        on_before_save_model is not called.
+
+        Args:
+            new_models: List of tuples (new_model, etl_record, form_submission) being imported.
+
+        Returns:
+            List of tuples (new_model, etl_record, form_submission) that can be imported.
+        """
+        return new_models
+
+    def on_get_copy_reference_values(self, new_model, etl_record, form_submission):
+        """
+        Gets the lookup values of the foreign keys in COPY_IMPORT_REFERENCES for a model instance.
+
+        Args:
+            new_model: The model instance being imported.
+            etl_record: The ODK data record being imported.
+            form_submission: The ODK form_submission.
+
+        Returns:
+            Dict of the lookup value by foreign key field name.
+        """
+        return {}
+
+    def new_result(self):
+        """
+        Creates a result that spills the imported models and form submissions to out_dir.
+
+        Returns:
+            FromSubmissionImportResult
+        """
+        return FromSubmissionImportResult(spill_dir=self.out_dir)
+
+    def is_bulk_import(self):
+        """
+        Gets if the importer will collect each page of models and save them together.
+        The 'copy' engine always collects each page of models.
+
+        Returns:
+            True if bulk importing, otherwise False.
+        """
+        return (self.bulk_import or self.engine == self.ENGINE_COPY) and self.SUPPORTS_BULK_IMPORT
+
+    def is_copy_import(self):
+        """
+        Gets if the importer will import each page of models with the CopyImportEngine.
+        Importers that do not support the 'copy' engine save each page with bulk_create.
+
+        Returns:
+            True if copy importing, otherwise False.
+        """
+        return self.engine == self.ENGINE_COPY and self.SUPPORTS_COPY_IMPORT and self.is_bulk_import()
+
     def import_submissions(self, model_class):
         """
         Import the Submissions from ODK.
@@ -249,105 +620,85 @@ class FromSubmissionImporterBase:
             FromSubmissionImportResult: The result of the import operation.
         """
         try:
-            etl_mappings = self.get_etl_mappings()
-
             if self.out_dir:
                 Utils.ensure_dirs(self.out_dir)
 
-            child_importers_form_submissions = []
+            if self.child_importers and settings.ODK_IMPORT_DEMUX:
+                self._import_demux_submissions(model_class)
+            else:
+                self._import_form_submission_pages(model_class)
+            self.result.add_imported_form(self.odk_form, console=self.verbose)
+        except Exception as ex:
+            self.result.error('Error executing import_submissions.', error=ex, console=True)
+        finally:
+            self.close_copy_import_engines()
+            self.result.close()
+        return self.result
 
-            for form_submission in self.get_form_submissions():
-                try:
-                    child_importers_form_submissions.append(form_submission)
+    def close_copy_import_engines(self):
+        """
+        Drops the staging tables of the CopyImportEngines.
+        """
+        for copy_import_engine in self._copy_import_engines.values():
+            try:
+                copy_import_engine.close()
+            except Exception as ex:
+                self.result.error('Error dropping staging table: {}'.format(copy_import_engine.table_name),
+                                  error=ex, console=True)
+        self._copy_import_engines.clear()
+
+    def import_page(self, model_class, form_submission_page):
+        """
+        Imports the models for a page of form submissions fetched by the primary importer.
 
-                    if self.odk_form_importer.etl_document.source_root:
-                        import_records = self.get_value_from_record(
-                            form_submission,
-                            source_name=self.odk_form_importer.etl_document.source_root,
-                            _target_type=TypeCaster.TypeCode.LIST
-                        ) or []
-                    else:
-                        import_records = [form_submission]
+        Args:
+            model_class: The class of the model to import.
+            form_submission_page: The FormSubmissionPage to import.
 
-                    for etl_record in import_records:
-                        if self.out_dir:
-                            self._save_form_submission_json(form_submission, etl_record, model_class)
+        Returns:
+            None
+        """
+        self.form_submission_page = form_submission_page
+        try:
+            mapping_plan = self.get_mapping_plan()
+            bulk_import_models = [] if self.is_bulk_import() else None
+            self.on_before_import_page(form_submission_page.form_submissions)
 
-                        if not self.on_can_import(etl_record, form_submission):
-                            continue
+            for form_submission in form_submission_page.form_submissions:
+                try:
+                    self._import_form_submission(model_class, mapping_plan, form_submission, bulk_import_models)
+                except Exception as ex:
+                    self.result.error('Error importing submission: {}.'.format(form_submission),
+                                      error=ex,
+                                      console=True)
 
-                        new_model = self.on_new_model(model_class, etl_record, form_submission)
-                        if new_model is None:
-                            self.result.error('Could not create model class: {}'.format(model_class.__name__))
-                            continue
+            if bulk_import_models:
+                self._bulk_save_models(model_class, bulk_import_models)
+        finally:
+            self.form_submission_page = None
 
-                        primary_keys_set = False
-                        primary_keys = None
-                        existing_model = None
-                        etl_mapping_error = None
-                        for etl_mapping in etl_mappings:
-                            # Once all the primary key values are set check for an existing model and stop mapping if found.
-                            if not primary_keys_set:
-                                primary_keys, primary_keys_set = self._get_primary_keys(new_model)
-                                if primary_keys_set:
-                                    existing_model = self._find_model(new_model)
-                                    if existing_model:
-                                        break
-
-                            has_source_field = etl_mapping.has_source_name(etl_record)
-                            has_target_field = hasattr(new_model, etl_mapping.target_name)
-
-                            if etl_mapping.is_required and not has_source_field:
-                                etl_mapping_error = 'ETL Record does not have a field named {}. ETL Record: {}'.format(
-                                    etl_mapping.source_name,
-                                    etl_record
-                                )
-                                break
-                            if not has_target_field:
-                                etl_mapping_error = 'ETL Target: {} does not have a field named {}'.format(
-                                    new_model.__class__,
-                                    etl_mapping.target_name
-                                )
-                                break
-
-                            source_value = etl_mapping.get_target_value(etl_record, cast=False, transform=False)
-                            source_value = self.on_cast_value(source_value, etl_mapping, etl_record, form_submission,
-                                                              new_model)
-
-                            if etl_mapping.transform:
-                                source_value = etl_mapping.transform_value(source_value)
-
-                            self.on_set_model_attr(new_model, source_value, etl_mapping, etl_record, form_submission)
-
-                        if etl_mapping_error is not None:
-                            self.result.error(etl_mapping_error, console=True)
-                        else:
-                            existing_model = (
-                                existing_model if primary_keys_set else self._find_model(new_model)
-                            )
-                            if existing_model is None:
-                                can_save = self.on_before_save_model(new_model, etl_record, form_submission)
-
-                                if can_save:
-                                    try:
-                                        new_model.save()
-                                        self.result.add_imported_model(new_model, console=True)
-                                        self.result.add_imported_data(form_submission, console=self.verbose)
-                                        self.on_after_save_model(new_model, etl_record, form_submission)
-                                    except Exception as ex:
-                                        self.result.error(
-                                            'Could not create {} for: {}, Error: {}'.format(model_class.__name__,
-                                                                                            primary_keys,
-                                                                                            str(ex)),
-                                            console=True
-                                        )
-                            else:
-                                self.result.info('Model already exists. Skipping: {} ({})'.format(
-                                    existing_model.__class__.__name__,
-                                    existing_model.id
-                                ), console=True)
+    def _import_form_submission_pages(self, model_class):
+        """
+        Imports each page of form submissions and then runs the child importers with the form submissions.
+        """
+        mapping_plan = self.get_mapping_plan()
+        bulk_import = self.is_bulk_import()
+        child_importers_form_submissions = []
+        bulk_import_models = [] if bulk_import else None
+
+        for form_submissions in self.get_form_submission_pages():
+            self.form_submission_page = FormSubmissionPage(form_submissions)
+            self.on_before_import_page(form_submissions)
+
+            for form_submission in form_submissions:
+                try:
+                    child_importers_form_submissions.append(form_submission)
+                    self._import_form_submission(model_class, mapping_plan, form_submission, bulk_import_models)
 
                     if len(child_importers_form_submissions) >= settings.ODK_API_FORM_SUBMISSION_PAGE_SIZE:
+                        if bulk_import:
+                            self._bulk_save_models(model_class, bulk_import_models)
+                            bulk_import_models.clear()
                         self._run_child_importers(child_importers_form_submissions)
                         child_importers_form_submissions.clear()
                 except Exception as ex:
@@ -355,15 +706,141 @@ class FromSubmissionImporterBase:
                                       error=ex,
                                       console=True)
 
-            self._run_child_importers(child_importers_form_submissions)
-            self.result.add_imported_form(self.odk_form, console=self.verbose)
-        except Exception as ex:
-            self.result.error('Error executing import_submissions.', error=ex, console=True)
-        return self.result
+        self.form_submission_page = None
+        if bulk_import:
+            self._bulk_save_models(model_class, bulk_import_models)
+        self._run_child_importers(child_importers_form_submissions)
+
+    def _import_demux_submissions(self, model_class):
+        """
+        Walks each page of form submissions once and imports the models for this importer and each child importer
+        from the same FormSubmissionPage. The models for a page are saved in one transaction.
+        This importer and each child importer import the page in a savepoint so a failed importer only rolls back
+        its own models for the page and the other importers and pages continue.
+        The child importers are created and validated once for the import.
+        """
+        child_importers = []
+        for odk_child_importer in self.child_importers:
+            self.result.info('Demultiplexing to Child Importer: {}'.format(odk_child_importer.importer),
+                             console=self.verbose)
+            child_importer = FromSubmissionImporterFactory.get_importer(odk_child_importer,
+                                                                        self.odk_form,
+                                                                        odk_child_importer,
+                                                                        import_start_date=self.import_start_date,
+                                                                        import_end_date=self.import_end_date,
+                                                                        out_dir=self.out_dir,
+                                                                        bulk_import=self.bulk_import,
+                                                                        engine=self.engine,
+                                                                        reference_cache=self.reference_cache,
+                                                                        verbose=self.verbose)
+            if child_importer.validate_before_execute():
+                child_importers.append(child_importer)
+            self.result.merge(child_importer.result)
+
+        try:
+            for form_submissions in self.get_form_submission_pages():
+                form_submission_page = FormSubmissionPage(form_submissions)
+                with transaction.atomic():
+                    try:
+                        with transaction.atomic():
+                            self.import_page(model_class, form_submission_page)
+                    except Exception as ex:
+                        # This importer's models for the page were rolled back.
+                        self.result.error('Error importing page: {}.'.format(self.imported_page_count + 1),
+                                          error=ex, console=True)
+                    for child_importer in child_importers:
+                        child_importer.result = child_importer.new_result()
+                        try:
+                            with transaction.atomic():
+                                child_importer.import_page(child_importer.MODEL_CLASS, form_submission_page)
+                            self.result.merge(child_importer.result)
+                        except Exception as ex:
+                            # The child importer's models for the page were rolled back.
+                            self.result.error('Error importing page with Child Importer: {}.'.format(
+                                child_importer.odk_form_importer.importer
+                            ), error=ex, console=True)
+                        finally:
+                            child_importer.result.close()
+        finally:
+            for child_importer in child_importers:
+                child_importer.result = child_importer.new_result()
+                child_importer.close_copy_import_engines()
+                self.result.merge(child_importer.result)
+
+        for child_importer in child_importers:
+            child_importer.result = child_importer.new_result()
+            child_importer.result.add_imported_form(self.odk_form, console=self.verbose)
+            self.result.merge(child_importer.result)
+
+    def _import_form_submission(self, model_class, mapping_plan, form_submission, bulk_import_models=None):
+        """
+        Maps the ETL records of a form submission to models and saves them.
+
+        Args:
+            model_class: The class of the model to import.
+            mapping_plan: The EtlMappingPlan.
+            form_submission: The ODK form submission.
+            bulk_import_models: List to collect the models to save with bulk_create. None to save each model.
+
+        Returns:
+            None
+        """
+        bulk_import = bulk_import_models is not None
+        for etl_record in self._get_records(mapping_plan, form_submission):
+            if self.out_dir:
+                self._save_form_submission_json(form_submission, etl_record, model_class)
+
+            if not self.on_can_import(etl_record, form_submission):
+                continue
+
+            new_model = self.on_new_model(model_class, etl_record, form_submission)
+            if new_model is None:
+                self.result.error('Could not create model class: {}'.format(model_class.__name__))
+                continue
+
+            primary_keys, existing_model, etl_mapping_error = self._map_etl_record(
+                new_model, etl_record, form_submission, find_existing=not bulk_import
+            )
+
+            if etl_mapping_error is not None:
+                self.result.error(etl_mapping_error, console=True)
+            elif bulk_import:
+                bulk_import_models.append((new_model, etl_record, form_submission))
+            elif existing_model is None:
+                try:
+                    # A savepoint so a failed save does not break the transaction of a demultiplexed page.
+                    with transaction.atomic():
+                        can_save = self.on_before_save_model(new_model, etl_record, form_submission)
+
+                        if can_save:
+                            new_model.save()
+                            self.result.add_imported_model(new_model, console=True)
+                            self.result.add_imported_data(form_submission, console=self.verbose)
+                            self.on_after_save_model(new_model, etl_record, form_submission)
+                except Exception as ex:
+                    self.result.error(
+                        'Could not create {} for: {}, Error: {}'.format(model_class.__name__,
+                                                                        primary_keys,
+                                                                        str(ex)),
+                        console=True
+                    )
+            else:
+                self._log_existing_model(existing_model)
+
+    def _get_records(self, mapping_plan, form_submission):
+        """
+        Gets the ETL records from a form submission with the source_root of the EtlMappingPlan.
+        """
+        if self.form_submission_page is None:
+            return mapping_plan.get_records(form_submission)
+        return self.form_submission_page.get_value(form_submission,
+                                                   ('records', mapping_plan.source_root),
+                                                   lambda: mapping_plan.get_records(form_submission))
 
     def get_key_from_record(self, record):
         """
         Gets the 'key' ('__id') value for a given record.
+        The key is parsed once for each record in the FormSubmissionPage being imported.
 
         Args:
             record: The ODK data record.
@@ -371,12 +848,31 @@ class FromSubmissionImporterBase:
         Returns:
             The key value or None.
         """
+        if self.form_submission_page is not None:
+            return self.form_submission_page.get_value(record,
+                                                       ('key', self._get_key_mapping_signature()),
+                                                       lambda: self._parse_key_from_record(record))
+        return self._parse_key_from_record(record)
+
+    def _get_key_mapping_signature(self):
+        """
+        Gets how the key is parsed so the importers that parse the key the same way share the parsed keys.
+        """
+        etl_mapping = self.get_etl_mapping_for(source_name='__id', target_name='key')
+        if etl_mapping is None:
+            return None
+        return (etl_mapping.source_name,
+                etl_mapping.target_name,
+                etl_mapping.target_type,
+                json.dumps(etl_mapping.transform, sort_keys=True))
+
+    def _parse_key_from_record(self, record):
         key = self.get_value_from_record(
             record,
             source_name='__id',
             target_name='key',
             _target_type=TypeCaster.TypeCode.STR,
-            _transform=TransformField(name='replace', args=['uuid:', ''])
+            _transform=self.KEY_TRANSFORM
         )
         return key
 
@@ -407,6 +903,9 @@ class FromSubmissionImporterBase:
                                                                             import_end_date=self.import_end_date,
                                                                             form_submissions=form_submission,
                                                                             out_dir=self.out_dir,
+                                                                            bulk_import=self.bulk_import,
+                                                                            engine=self.engine,
+                                                                            reference_cache=self.reference_cache,
                                                                             verbose=self.verbose)
                 importer_result = model_importer.execute()
                 self.result.merge(importer_result)
@@ -420,6 +919,106 @@ class FromSubmissionImporterBase:
                 ), console=True)
         return model
 
+    def resolve_parent_models(self, model_class, importer, form_submissions):
+        """
+        Gets the existing parent models for a page of form submissions in one query and imports the missing
+        parent models together with one execution of the importer for the model_class.
+        The resolved models are returned by get_parent_model until the next page is resolved.
+        This is meant to be called by child importers from on_before_import_page.
+
+        Args:
+            model_class: The parent model type to get or import.
+            importer: The importer name to use for the parent models that do not exist.
+            form_submissions: The form submissions in the page.
+
+        Returns:
+            Dict of the parent models by key. The value is None for parent models that could not be imported.
+        """
+        form_submissions_by_key = {}
+        for form_submission in form_submissions:
+            key = self.get_key_from_record(form_submission)
+            if key is not None and key not in form_submissions_by_key:
+                form_submissions_by_key[key] = form_submission
+
+        parent_models = {m.key: m for m in model_class.objects.filter(key__in=form_submissions_by_key.keys())}
+        missing_form_submissions = [fs for key, fs in form_submissions_by_key.items() if key not in parent_models]
+
+        if missing_form_submissions:
+            odk_form_importer = self.odk_form.get_odk_form_importer(importer)
+            if odk_form_importer:
+                self.result.info('Attempting Import for: {} {}(s)'.format(len(missing_form_submissions),
+                                                                         model_class.__name__), console=True)
+                model_importer = FromSubmissionImporterFactory.get_importer(odk_form_importer,
+                                                                            self.odk_form,
+                                                                            odk_form_importer,
+                                                                            import_start_date=self.import_start_date,
+                                                                            import_end_date=self.import_end_date,
+                                                                            form_submissions=missing_form_submissions,
+                                                                            out_dir=self.out_dir,
+                                                                            bulk_import=self.bulk_import,
+                                                                            engine=self.engine,
+                                                                            reference_cache=self.reference_cache,
+                                                                            verbose=self.verbose)
+                importer_result = model_importer.execute()
+                self.result.merge(importer_result)
+                missing_keys = [key for key in form_submissions_by_key.keys() if key not in parent_models]
+                for model in model_class.objects.filter(key__in=missing_keys):
+                    parent_models[model.key] = model
+                for key in missing_keys:
+                    if key not in parent_models:
+                        self.result.error('Could not create {} for key: {}'.format(model_class.__name__, key),
+                                          console=True)
+            else:
+                self.result.error('OdkForm: {} does not have importer: {}'.format(
+                    self.odk_form.id,
+                    importer
+                ), console=True)
+
+            # Do not try to import the missing parent models again for each form submission.
+            for key in form_submissions_by_key.keys():
+                parent_models.setdefault(key, None)
+
+        self._parent_models[model_class] = parent_models
+        return parent_models
+
+    def get_parent_model(self, model_class, importer, form_submission):
+        """
+        Gets the parent model for a form submission from the models resolved by resolve_parent_models.
+        Falls back to get_model_or_try_execute_importer if the page was not resolved.
+
+        Args:
+            model_class: The parent model type to get.
+            importer: The importer name to use if the model does not exist.
+            form_submission: The form submission to get the parent model for.
+
+        Returns:
+            The parent model or None.
+        """
+        key = self.get_key_from_record(form_submission)
+        parent_models = self._parent_models.get(model_class)
+        if parent_models is not None and key in parent_models:
+            return parent_models[key]
+        return self.get_model_or_try_execute_importer(model_class, importer, form_submission)
+
+    def get_reference_model(self, model_class, code, use_existing_if_missing=False):
+        """
+        Gets a reference model (Cluster, Area, Staff) by code from the import's reference cache.
+
+        Args:
+            model_class: The model class to get.
+            code: The code of the model.
+            use_existing_if_missing: Use the first model of model_class if the model is not found.
+
+        Returns:
+            The model or None.
+        """
+        model, hit = self.reference_cache.find_by_code(model_class, code)
+        self.result.add_reference_cache_lookup(model_class, hit)
+        if model is None and use_existing_if_missing:
+            model, hit = self.reference_cache.first(model_class)
+            self.result.add_reference_cache_lookup(model_class, hit)
+        return model
+
     def get_value_from_record(self, record, source_name=None, target_name=None,
                               _target_type=None, _transform=None):
         """
@@ -441,15 +1040,16 @@ class FromSubmissionImporterBase:
         """
         etl_mapping = self.get_etl_mapping_for(source_name=source_name, target_name=target_name)
         if etl_mapping:
-            value = etl_mapping.get_target_value(record, cast=True, transform=True)
-        elif source_name is not None and Utils.has_field(record, source_name):
-            value = Utils.get_field(record, source_name)
-            if _target_type is not None:
-                value = TypeCaster.cast(value, _target_type)
-            if _transform is not None:
-                value = TransformField.get(_transform).transform(value)
-        else:
-            value = None
+            return etl_mapping.get_target_value(record, cast=True, transform=True)
+
+        value = None
+        if source_name is not None:
+            has_field, value = FieldPath.get(source_name).resolve(record)
+            if has_field:
+                if _target_type is not None:
+                    value = TypeCaster.cast(value, _target_type)
+                if _transform is not None:
+                    value = TransformField.get(_transform).transform(value)
         return value
 
     def _run_child_importers(self, form_submissions):
@@ -477,6 +1077,9 @@ class FromSubmissionImporterBase:
                                                                             import_end_date=self.import_end_date,
                                                                             form_submissions=form_submissions,
                                                                             out_dir=self.out_dir,
+                                                                            bulk_import=self.bulk_import,
+                                                                            engine=self.engine,
+                                                                            reference_cache=self.reference_cache,
                                                                             verbose=self.verbose)
                 child_importer_result = child_importer.execute()
                 run_child_importers_result.merge(child_importer_result)
@@ -502,15 +1105,282 @@ class FromSubmissionImporterBase:
             raise ValueError('Missing primary key values.')
         return model.__class__.find_by(**filter_kwargs)
 
+    def _find_models(self, models):
+        """
+        Finds the existing models in the database for a list of models with a single query.
+
+        Args:
+            models: The models to check.
+
+        Returns:
+            Dictionary of primary key value tuples to existing models.
+        """
+        if not models:
+            return {}
+
+        mapping_plan = self.get_mapping_plan()
+        model_class = models[0].__class__
+        primary_key_names = mapping_plan.primary_key_names
+        existing_models = {}
+
+        if len(primary_key_names) == 1:
+            primary_key_name = primary_key_names[0]
+            primary_key_values = [getattr(model, primary_key_name) for model in models]
+            for existing_model in (model_class.objects
+                    .filter(**{'{}__in'.format(primary_key_name): primary_key_values})
+                    .only('id', primary_key_name)):
+                existing_models[(getattr(existing_model, primary_key_name),)] = existing_model
+        else:
+            for model in models:
+                existing_model = self._find_model(model)
+                if existing_model is not None:
+                    filter_kwargs, _ = self._get_primary_keys(existing_model)
+                    existing_models[tuple(filter_kwargs.values())] = existing_model
+        return existing_models
+
     def _get_primary_keys(self, model):
-        etl_mappings = self.get_etl_mappings()
-        pk_names = [p.target_name for p in etl_mappings if p.is_primary_key]
-        if not pk_names:
-            raise ValueError('Primary key mappings not defined for: {}'.format(model.__class__))
-
-        pk_kwargs = {pk_name: getattr(model, pk_name, None) for pk_name in pk_names}
-        all_pks_set = all(pk_kwargs.values())
-        return pk_kwargs, all_pks_set
+        return self.get_mapping_plan().get_primary_keys(model)
+
+    def _map_etl_record(self, new_model, etl_record, form_submission, find_existing=True):
+        """
+        Sets the attributes of a model from an ETL record using the EtlMappingPlan.
+
+        Args:
+            new_model: The model instance to populate.
+            etl_record: The ODK data record being imported.
+            form_submission: The ODK form_submission.
+            find_existing: Find an existing model once the primary keys are set and stop mapping if found.
+
+        Returns:
+            Tuple (primary keys, existing model, error message).
+        """
+        mapping_plan = self.get_mapping_plan()
+        primary_keys_set = False
+        primary_keys = None
+        existing_model = None
+        etl_mapping_error = None
+        for etl_mapping in mapping_plan.mappings:
+            # Once all the primary key values are set check for an existing model and stop mapping if found.
+            if not primary_keys_set:
+                primary_keys, primary_keys_set = mapping_plan.get_primary_keys(new_model)
+                if primary_keys_set and find_existing:
+                    existing_model = self._find_model(new_model)
+                    if existing_model:
+                        break
+
+            has_source_field, source_value = etl_mapping.resolve(etl_record)
+            has_target_field = self._has_target_field(new_model, etl_mapping.target_name)
+
+            if etl_mapping.is_required and not has_source_field:
+                etl_mapping_error = 'ETL Record does not have a field named {}. ETL Record: {}'.format(
+                    etl_mapping.source_name,
+                    etl_record
+                )
+                break
+            if not has_target_field:
+                etl_mapping_error = 'ETL Target: {} does not have a field named {}'.format(
+                    new_model.__class__,
+                    etl_mapping.target_name
+                )
+                break
+
+            source_value = self.on_cast_value(source_value, etl_mapping, etl_record, form_submission, new_model)
+
+            if etl_mapping.transform:
+                source_value = etl_mapping.transform_value(source_value)
+
+            self.on_set_model_attr(new_model, source_value, etl_mapping, etl_record, form_submission)
+
+        if etl_mapping_error is None and not primary_keys_set:
+            primary_keys, primary_keys_set = mapping_plan.get_primary_keys(new_model)
+            if find_existing:
+                existing_model = self._find_model(new_model)
+            elif not primary_keys_set:
+                raise ValueError('Missing primary key values.')
+        return primary_keys, existing_model, etl_mapping_error
+
+    def _bulk_save_models(self, model_class, new_models):
+        """
+        Saves a page of mapped models.
+        Existing models are found with a single query and the new models are saved with
+        bulk_create in a single transaction. If the bulk_create fails each model is saved individually.
+        With the 'copy' engine the new models are imported with the CopyImportEngine.
+
+        Args:
+            model_class: The class of the models being saved.
+            new_models: List of tuples (new_model, etl_record, form_submission) to save.
+
+        Returns:
+            None
+        """
+        if self.is_copy_import():
+            self._copy_save_models(model_class, new_models)
+            return
+
+        create_models = self._get_create_models(model_class, new_models)
+        if not create_models:
+            return
+
+        create_models = self.on_before_save_models(create_models)
+        if not create_models:
+            return
+
+        mapping_plan = self.get_mapping_plan()
+        try:
+            with transaction.atomic():
+                model_class.objects.bulk_create([new_model for new_model, _, _ in create_models])
+                self.on_after_save_models(create_models)
+            saved_models = create_models
+        except Exception as ex:
+            self.result.info('Could not bulk create {}. Saving individually. Error: {}'.format(
+                model_class.__name__,
+                str(ex)
+            ), console=True)
+            saved_models = []
+            for new_model, etl_record, form_submission in create_models:
+                try:
+                    with transaction.atomic():
+                        new_model.pk = None
+                        new_model.save()
+                        self.on_after_save_model(new_model, etl_record, form_submission)
+                    saved_models.append((new_model, etl_record, form_submission))
+                except Exception as ex:
+                    primary_keys, _ = mapping_plan.get_primary_keys(new_model)
+                    self.result.error(
+                        'Could not create {} for: {}, Error: {}'.format(model_class.__name__,
+                                                                        primary_keys,
+                                                                        str(ex)),
+                        console=True
+                    )
+
+        for new_model, etl_record, form_submission in saved_models:
+            self.result.add_imported_model(new_model, console=True)
+            self.result.add_imported_data(form_submission, console=self.verbose)
+
+    def _copy_save_models(self, model_class, new_models):
+        """
+        Imports a page of mapped models with the CopyImportEngine.
+        The page is copied into a staging table and inserted with a single INSERT ... SELECT in a single transaction.
+        The foreign keys in COPY_IMPORT_REFERENCES are resolved in the database.
+
+        Args:
+            model_class: The class of the models being imported.
+            new_models: List of tuples (new_model, etl_record, form_submission) to import.
+
+        Returns:
+            None
+        """
+        create_models = self._get_create_models(model_class, new_models)
+        if not create_models:
+            return
+
+        create_models = self.on_before_copy_models(create_models)
+        if not create_models:
+            return
+
+        mapping_plan = self.get_mapping_plan()
+        copy_import_engine = self._get_copy_import_engine(model_class)
+        rows = [
+            (new_model, self.on_get_copy_reference_values(new_model, etl_record, form_submission))
+            for new_model, etl_record, form_submission in create_models
+        ]
+        try:
+            with transaction.atomic():
+                inserted_models, unresolved_models = copy_import_engine.import_models(rows)
+                inserted_ids = {id(new_model) for new_model in inserted_models}
+                saved_models = [m for m in create_models if id(m[0]) in inserted_ids]
+                self.on_after_save_models(saved_models)
+        except Exception as ex:
+            self.result.error('Could not copy {} {}(s), Error: {}'.format(len(create_models),
+                                                                          model_class.__name__,
+                                                                          str(ex)),
+                              console=True)
+            return
+
+        unresolved_ids = set()
+        for new_model, reference_values in unresolved_models:
+            unresolved_ids.add(id(new_model))
+            primary_keys, _ = mapping_plan.get_primary_keys(new_model)
+            self.result.error('{}: {}, '.format(model_class.__name__, primary_keys) + ', '.join(
+                '{} not found: {}'.format(self.COPY_IMPORT_REFERENCES[name][0].__name__, value or 'NULL')
+                for name, value in reference_values.items()
+            ))
+
+        for new_model, etl_record, form_submission in create_models:
+            if id(new_model) not in inserted_ids and id(new_model) not in unresolved_ids:
+                # Inserted by another import after the existing models were found (ON CONFLICT DO NOTHING).
+                primary_keys, _ = mapping_plan.get_primary_keys(new_model)
+                self.result.info('Model already exists. Skipping: {} ({})'.format(model_class.__name__, primary_keys),
+                                 console=True)
+
+        for new_model, etl_record, form_submission in saved_models:
+            self.result.add_imported_model(new_model, console=True)
+            self.result.add_imported_data(form_submission, console=self.verbose)
+
+    def _get_copy_import_engine(self, model_class):
+        copy_import_engine = self._copy_import_engines.get(model_class)
+        if copy_import_engine is None:
+            copy_import_engine = CopyImportEngine(
+                model_class,
+                self.get_mapping_plan().primary_key_names,
+                references=self.COPY_IMPORT_REFERENCES,
+                use_existing_if_missing=Env.get("DEV_ODK_IMPORT_USE_EXISTING_IF_MISSING", cast=bool)
+            )
+            self._copy_import_engines[model_class] = copy_import_engine
+        return copy_import_engine
+
+    def _get_create_models(self, model_class, new_models):
+        """
+        Gets the models in a page that do not exist and are not duplicated in the page.
+        The existing models are found with a single query.
+
+        Args:
+            model_class: The class of the models being saved.
+            new_models: List of tuples (new_model, etl_record, form_submission) to save.
+
+        Returns:
+            List of tuples (new_model, etl_record, form_submission) to create.
+        """
+        if not new_models:
+            return []
+
+        mapping_plan = self.get_mapping_plan()
+        existing_models = self._find_models([new_model for new_model, _, _ in new_models])
+
+        create_models = []
+        create_primary_keys = set()
+        for new_model, etl_record, form_submission in new_models:
+            primary_keys, _ = mapping_plan.get_primary_keys(new_model)
+            primary_key_values = tuple(primary_keys.values())
+            existing_model = existing_models.get(primary_key_values)
+            if existing_model is not None:
+                self._log_existing_model(existing_model)
+            elif primary_key_values in create_primary_keys:
+                self.result.info('Duplicate {} in form submissions. Skipping: {}'.format(
+                    model_class.__name__,
+                    primary_keys
+                ), console=True)
+            else:
+                create_primary_keys.add(primary_key_values)
+                create_models.append((new_model, etl_record, form_submission))
+        return create_models
+
+    def _log_existing_model(self, existing_model):
+        self.result.info('Model already exists. Skipping: {} ({})'.format(
+            existing_model.__class__.__name__,
+            existing_model.id
+        ), console=True)
+
+    def _has_target_field(self, model, target_name):
+        """
+        Gets if a model has a field named target_name. The result is cached per model class.
+        """
+        cache_key = (model.__class__, target_name)
+        has_target_field = self._has_target_fields.get(cache_key)
+        if has_target_field is None:
+            has_target_field = hasattr(model, target_name)
+            self._has_target_fields[cache_key] = has_target_field
+        return has_target_field
 
     def _save_form_submission_json(self, form_submission, etl_record, model_class):
         submission_key = self.get_key_from_record(form_submission)
@@ -37,6 +37,11 @@ class FromSubmissionImporterFactory:
 
     ODK_IMPORTERS = ODK_EVENT_IMPORTERS + ODK_HOUSEHOLD_IMPORTERS + ODK_VERBAL_AUTOPSY_IMPORTERS
 
+    # Importers that require the models imported by other importers to exist.
+    ODK_IMPORTER_DEPENDENCIES = {
+        ODK_VERBALAUTOPSY_IMPORTER_NAME: [ODK_DEATHS_IMPORTER_NAME]
+    }
+
     # Choices for the Models. This returns a tuple of (name, name).
     ODK_IMPORTERS_CHOICES = list(map(lambda i: (i[1], i[1]), ODK_IMPORTERS))
 
@@ -73,3 +78,8 @@ class FromSubmissionImporterFactory:
         for klass, name in cls.ODK_IMPORTERS:
             if klass == importer_class or name == importer_class:
                 return name
+
+    @classmethod
+    def get_importer_dependencies(cls, importer_class):
+        name = cls.get_importer_class_name(importer_class)
+        return cls.ODK_IMPORTER_DEPENDENCIES.get(name, [])
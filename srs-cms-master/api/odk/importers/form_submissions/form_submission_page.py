@@ -0,0 +1,31 @@
+class FormSubmissionPage:
+    """
+    A page of form submissions shared by the importers of an OdkForm.
+
+    The values parsed from the form submissions (e.g., the keys and the source_root records) are parsed once
+    for the page and reused by each importer the page is imported by.
+    """
+
+    def __init__(self, form_submissions):
+        self.form_submissions = form_submissions
+        self._values = {}
+
+    def get_value(self, record, name, parse):
+        """
+        Gets a value parsed from a record in the page.
+
+        Args:
+            record: The form submission or a record from it.
+            name: Hashable name of the value.
+            parse: Function() that parses the value the first time it is requested.
+
+        Returns:
+            The value.
+        """
+        cache_key = (id(record), name)
+        cached = self._values.get(cache_key)
+        # The record is kept with the value so its id is not reused while the page is imported.
+        if cached is None or cached[0] is not record:
+            cached = (record, parse())
+            self._values[cache_key] = cached
+        return cached[1]
@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+
+
+class FormSubmissionPageFetcher:
+    """
+    Iterates pages of form submissions while the next page(s) are fetched in a background thread.
+
+    The number of pages fetched ahead is bounded by prefetch_pages to cap memory use.
+    When prefetch_pages is 0 the pages are fetched synchronously.
+    The fetch and processing time of each page are recorded in page_timings.
+    """
+    # Seconds to wait between checks for the fetcher being closed.
+    _POLL_SECONDS = 0.1
+
+    def __init__(self, pages, prefetch_pages=1):
+        """
+        Args:
+            pages: Iterable of pages (lists of form submissions). Each page is fetched when the iterable is advanced.
+            prefetch_pages: The maximum number of pages to fetch ahead of the page being processed.
+        """
+        self.pages = pages
+        self.prefetch_pages = max(0, prefetch_pages or 0)
+        self.page_timings = []
+        self._queue = None
+        self._thread = None
+        self._closed = threading.Event()
+
+    def __iter__(self):
+        if self.prefetch_pages == 0:
+            pages = self._fetch_pages()
+        else:
+            pages = self._prefetched_pages()
+
+        for page_timing, page in pages:
+            self.page_timings.append(page_timing)
+            processing_started_at = time.perf_counter()
+            yield page
+            page_timing['process_seconds'] = time.perf_counter() - processing_started_at
+
+    @property
+    def fetch_seconds(self):
+        return sum(t['fetch_seconds'] for t in self.page_timings)
+
+    @property
+    def process_seconds(self):
+        return sum(t.get('process_seconds', 0) for t in self.page_timings)
+
+    def close(self):
+        """
+        Stops fetching pages.
+        """
+        self._closed.set()
+        if self._queue is not None:
+            # Unblock the fetcher thread if it is waiting on a full queue.
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _fetch_pages(self):
+        pages = iter(self.pages)
+        page_number = 1
+        while not self._closed.is_set():
+            fetch_started_at = time.perf_counter()
+            try:
+                page = next(pages)
+            except StopIteration:
+                break
+            page_timing = {
+                'page': page_number,
+                'count': len(page),
+                'fetch_seconds': time.perf_counter() - fetch_started_at
+            }
+            yield page_timing, page
+            page_number += 1
+
+    def _prefetched_pages(self):
+        self._queue = queue.Queue(maxsize=self.prefetch_pages)
+        self._thread = threading.Thread(target=self._fetch_pages_in_thread, daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            self.close()
+
+    def _fetch_pages_in_thread(self):
+        try:
+            for item in self._fetch_pages():
+                if not self._put(item):
+                    return
+            self._put(None)
+        except BaseException as ex:
+            self._put(ex)
+
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=self._POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -5,22 +5,33 @@ from config.env import Env
 
 
 class HouseholdMembersImporter(FromSubmissionImporterBase):
+    MODEL_CLASS = HouseholdMember
+
     def __init__(self, odk_form, odk_form_importer, **kwargs):
         super().__init__(odk_form, odk_form_importer, **kwargs)
 
     def execute(self):
         try:
             if self.validate_before_execute():
-                self.import_submissions(HouseholdMember)
+                self.import_submissions(self.MODEL_CLASS)
         except Exception as ex:
             self.result.error('Error executing {}.'.format(self.__class__.__name__), error=ex, console=True)
         return self.result
 
+    def on_before_import_page(self, form_submissions):
+        try:
+            self.resolve_parent_models(Household,
+                                       FromSubmissionImporterFactory.ODK_HOUSEHOLDS_IMPORTER_NAME,
+                                       form_submissions)
+        except Exception as ex:
+            self.result.error('Error executing {}.on_before_import_page:'.format(self.__class__.__name__),
+                              error=ex, console=True)
+
     def on_can_import(self, etl_record, form_submission):
         try:
-            household = self.get_model_or_try_execute_importer(Household,
-                                                               FromSubmissionImporterFactory.ODK_HOUSEHOLDS_IMPORTER_NAME,
-                                                               form_submission)
+            household = self.get_parent_model(Household,
+                                              FromSubmissionImporterFactory.ODK_HOUSEHOLDS_IMPORTER_NAME,
+                                              form_submission)
             # TODO: what should the logic be here?
             can_import = household is not None
             return can_import
@@ -33,7 +44,9 @@ class HouseholdMembersImporter(FromSubmissionImporterBase):
         use_existing_if_missing = Env.get("DEV_ODK_IMPORT_USE_EXISTING_IF_MISSING", cast=bool)
         try:
             household_key = self.get_key_from_record(form_submission)
-            household = (Household.find_by(key=household_key) or
+            household = (self.get_parent_model(Household,
+                                               FromSubmissionImporterFactory.ODK_HOUSEHOLDS_IMPORTER_NAME,
+                                               form_submission) or
                          (Household.objects.first() if use_existing_if_missing else None))
 
             errors = []
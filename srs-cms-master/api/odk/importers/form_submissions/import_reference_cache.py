@@ -0,0 +1,65 @@
+import threading
+from collections import OrderedDict
+
+
+class ImportReferenceCache:
+    """
+    Import scoped cache for reference models (Cluster, Area, Staff) looked up by code.
+
+    Reference models do not change during an import so the cache is shared by all the importers
+    in a FromSubmissionImporter run. Each model class is cached separately and the least recently used
+    entries are dropped once max_size is reached. Missing models are cached as None.
+    The cache is thread safe so it can be shared by concurrent OdkForm imports.
+    """
+    DEFAULT_MAX_SIZE = 10000
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._caches = {}
+        self._first_models = {}
+        self._lock = threading.Lock()
+
+    def find_by_code(self, model_class, code):
+        """
+        Gets a model by its code.
+
+        Args:
+            model_class: The model class to find.
+            code: The code of the model to find.
+
+        Returns:
+            Tuple (model or None, True if the model was found in the cache).
+        """
+        with self._lock:
+            cache = self._caches.setdefault(model_class, OrderedDict())
+            if code in cache:
+                cache.move_to_end(code)
+                return cache[code], True
+
+            model = model_class.find_by(code=code) if code is not None else None
+            cache[code] = model
+            if self.max_size is not None and len(cache) > self.max_size:
+                cache.popitem(last=False)
+            return model, False
+
+    def first(self, model_class):
+        """
+        Gets the first model for a model class.
+
+        Args:
+            model_class: The model class to get the first model for.
+
+        Returns:
+            Tuple (model or None, True if the model was found in the cache).
+        """
+        with self._lock:
+            if model_class in self._first_models:
+                return self._first_models[model_class], True
+            model = model_class.objects.first()
+            self._first_models[model_class] = model
+            return model, False
+
+    def clear(self):
+        with self._lock:
+            self._caches.clear()
+            self._first_models.clear()
@@ -4,13 +4,18 @@ from config.env import Env
 
 
 class VerbalAutopsiesImporter(FromSubmissionImporterBase):
+    MODEL_CLASS = VerbalAutopsy
+
+    # The model is saved in on_before_save_model.
+    SUPPORTS_BULK_IMPORT = False
+
     def __init__(self, odk_form, odk_form_importer, **kwargs):
         super().__init__(odk_form, odk_form_importer, **kwargs)
 
     def execute(self):
         try:
             if self.validate_before_execute():
-                self.import_submissions(VerbalAutopsy)
+                self.import_submissions(self.MODEL_CLASS)
         except Exception as ex:
             self.result.error('Error executing {}.'.format(self.__class__.__name__), error=ex, console=True)
         return self.result
@@ -18,10 +23,10 @@ class VerbalAutopsiesImporter(FromSubmissionImporterBase):
     def on_before_save_model(self, new_va, etl_record, form_submission):
         use_existing_if_missing = Env.get("DEV_ODK_IMPORT_USE_EXISTING_IF_MISSING", cast=bool)
         try:
-            cluster = (Cluster.find_by(code=new_va.cluster_code) or
-                       (Cluster.objects.first() if use_existing_if_missing else None))
-            area = (Area.find_by(code=new_va.area_code) or
-                    (Area.objects.first() if use_existing_if_missing else None))
+            cluster = self.get_reference_model(Cluster, new_va.cluster_code,
+                                               use_existing_if_missing=use_existing_if_missing)
+            area = self.get_reference_model(Area, new_va.area_code,
+                                            use_existing_if_missing=use_existing_if_missing)
 
             death = ((Death.find_by(death_code=new_va.death_code)) or
                      (
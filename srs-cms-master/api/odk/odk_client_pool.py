@@ -0,0 +1,150 @@
+import threading
+import time
+import weakref
+from django.conf import settings
+
+
+class OdkClientPool:
+    """
+    Process wide pool of pyodk Clients.
+
+    Clients are keyed by base URL, username and project ID. All the clients for a base URL and username
+    share one authenticated HTTP session so the ODK Central token is fetched once and the keep-alive
+    connections are reused by every importer and exporter in the process.
+    Sessions are replaced once they are older than settings.ODK_CLIENT_MAX_AGE_SECONDS so expired tokens are not used.
+    A replaced session is still used by the clients already handed out (e.g., a running import and its page
+    prefetch thread) so it is only closed once none of its clients are referenced.
+    """
+    STAT_CLIENT_CONSTRUCTIONS = 'client_constructions'
+    STAT_LOGINS = 'logins'
+
+    _lock = threading.RLock()
+    _sessions = {}
+    _clients = {}
+    _retired_sessions = []
+    _stats = {STAT_CLIENT_CONSTRUCTIONS: 0, STAT_LOGINS: 0}
+
+    @classmethod
+    def get_client(cls, odk_config, project_id=None):
+        """
+        Gets the pooled client for an OdkConfig and project.
+
+        Args:
+            odk_config: The OdkConfig to get the client for.
+            project_id: The default ODK project ID for the client.
+
+        Returns:
+            pyodk Client
+        """
+        session_key = (odk_config.base_url, odk_config.username)
+        client_key = session_key + (project_id,)
+        with cls._lock:
+            cls._close_retired_sessions()
+            session_entry = cls._sessions.get(session_key)
+            if session_entry is not None and cls._is_expired(session_entry):
+                cls._retire_session(session_key)
+                session_entry = None
+
+            if session_entry is None:
+                client = cls._construct_client(odk_config, project_id=project_id)
+                cls._pool_session(client.session)
+                session_entry = {'session': client.session,
+                                 'created_at': time.monotonic(),
+                                 'clients': weakref.WeakSet()}
+                cls._sessions[session_key] = session_entry
+                cls._clients[client_key] = client
+            elif client_key not in cls._clients:
+                cls._clients[client_key] = cls._construct_client(odk_config,
+                                                                 project_id=project_id,
+                                                                 session=session_entry['session'])
+            client = cls._clients[client_key]
+            session_entry['clients'].add(client)
+            return client
+
+    @classmethod
+    def stats(cls):
+        """
+        Gets a copy of the client construction and login counters.
+        Pass the stats taken at the start of a run to stats_since to get the counts for the run.
+        """
+        with cls._lock:
+            return dict(cls._stats)
+
+    @classmethod
+    def stats_since(cls, started_stats):
+        """
+        Gets the client construction and login counts since started_stats were taken.
+
+        Args:
+            started_stats: The stats taken at the start of a run.
+
+        Returns:
+            Dict of counts.
+        """
+        return {name: count - started_stats.get(name, 0) for name, count in cls.stats().items()}
+
+    @classmethod
+    def clear(cls):
+        """
+        Closes and removes all the pooled and replaced clients and sessions.
+        """
+        with cls._lock:
+            for session_key in list(cls._sessions.keys()):
+                cls._retire_session(session_key)
+            for session_entry in cls._retired_sessions:
+                session_entry['session'].close()
+            cls._retired_sessions.clear()
+
+    @classmethod
+    def _construct_client(cls, odk_config, **kwargs):
+        client = odk_config.client(**kwargs)
+        cls._stats[cls.STAT_CLIENT_CONSTRUCTIONS] += 1
+        return client
+
+    @classmethod
+    def _pool_session(cls, session):
+        """
+        Makes the session login thread safe and counts the logins.
+        pyodk logs in lazily on the first request made without an Authorization header.
+        """
+        auth = session.auth
+        login = auth.login
+        login_lock = threading.Lock()
+
+        def pooled_login():
+            with login_lock:
+                if 'Authorization' not in session.headers:
+                    with cls._lock:
+                        cls._stats[cls.STAT_LOGINS] += 1
+                return login()
+
+        auth.login = pooled_login
+
+    @classmethod
+    def _is_expired(cls, session_entry):
+        max_age_seconds = settings.ODK_CLIENT_MAX_AGE_SECONDS
+        return max_age_seconds is not None and time.monotonic() - session_entry['created_at'] >= max_age_seconds
+
+    @classmethod
+    def _retire_session(cls, session_key):
+        """
+        Removes a session and its clients from the pool. The session is closed by _close_retired_sessions.
+        """
+        session_entry = cls._sessions.pop(session_key, None)
+        for client_key in [k for k in cls._clients.keys() if k[:2] == session_key]:
+            del cls._clients[client_key]
+        if session_entry is not None:
+            cls._retired_sessions.append(session_entry)
+
+    @classmethod
+    def _close_retired_sessions(cls):
+        """
+        Closes the retired sessions that none of their clients are referenced by anymore.
+        """
+        in_use_sessions = []
+        for session_entry in cls._retired_sessions:
+            if len(session_entry['clients']) > 0:
+                in_use_sessions.append(session_entry)
+            else:
+                session_entry['session'].close()
+        cls._retired_sessions = in_use_sessions
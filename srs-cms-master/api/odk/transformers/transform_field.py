@@ -11,6 +11,7 @@ class TransformField:
         self.name = name
         self.args = args
         self.kwargs = kwargs
+        self._transformer = None
 
     @classmethod
     def get(cls, transform):
@@ -21,5 +22,6 @@ class TransformField:
         return cls(**transform)
 
     def transform(self, value):
-        transformer = TransformerFactory.get_transformer(self.name)
-        return transformer.transform(value, self)
+        if self._transformer is None:
+            self._transformer = TransformerFactory.get_transformer(self.name)
+        return self._transformer.transform(value, self)
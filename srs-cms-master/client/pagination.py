@@ -0,0 +1,173 @@
+import base64
+import binascii
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+
+class KeysetPaginator:
+    """
+    Paginates a queryset by seeking past the last row of the current page instead of using OFFSET.
+
+    The rows are ordered by the keys, the last of which must be unique (e.g., id).
+    Only the first key can be null. Null values are ordered last.
+    Pages are identified by opaque cursors holding the keys of the first or last row of the adjacent page.
+    """
+    is_keyset = True
+
+    NEXT = 'n'
+    PREVIOUS = 'p'
+
+    def __init__(self, queryset, keys, page_size, count=None):
+        """
+        Args:
+            queryset: The queryset to paginate.
+            keys: List of (field name, descending) tuples to order by. Annotations can be used as keys.
+            page_size: The number of rows on each page.
+            count: The total number of rows, if known. This is only used for display.
+        """
+        self.queryset = queryset
+        self.keys = keys
+        self.page_size = page_size
+        self.count = count
+
+    def page(self, cursor=None):
+        """
+        Gets the page for a cursor.
+
+        Args:
+            cursor: A cursor from KeysetPage.next_cursor or KeysetPage.previous_cursor. None or an invalid cursor
+                    gets the first page.
+
+        Returns:
+            KeysetPage
+        """
+        direction, values = self.decode_cursor(cursor)
+        if values is None or len(values) != len(self.keys):
+            direction, values = self.NEXT, None
+
+        is_previous = direction == self.PREVIOUS
+        rows = []
+        for queryset in self._segments(values, reverse=is_previous):
+            rows += list(queryset[:self.page_size + 1 - len(rows)])
+            if len(rows) > self.page_size:
+                break
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if is_previous:
+            rows.reverse()
+            return KeysetPage(self, rows, has_previous=has_more, has_next=True)
+        else:
+            return KeysetPage(self, rows, has_previous=values is not None, has_next=has_more)
+
+    def row_values(self, row):
+        return [getattr(row, name) for name, _ in self.keys]
+
+    @classmethod
+    def encode_cursor(cls, direction, values):
+        data = json.dumps([direction, values], cls=DjangoJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @classmethod
+    def decode_cursor(cls, cursor):
+        """
+        Decodes a cursor.
+
+        Returns:
+            Tuple of the direction and key values. The values are None if the cursor is empty or invalid.
+        """
+        if not cursor:
+            return cls.NEXT, None
+        try:
+            data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, values = json.loads(data)
+        except (ValueError, TypeError, binascii.Error):
+            return cls.NEXT, None
+        if direction not in (cls.NEXT, cls.PREVIOUS) or not isinstance(values, list):
+            return cls.NEXT, None
+        return direction, values
+
+    def _ordering(self, reverse=False):
+        ordering = []
+        for name, descending in self.keys:
+            nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            if descending != reverse:
+                ordering.append(F(name).desc(**nulls))
+            else:
+                ordering.append(F(name).asc(**nulls))
+        return ordering
+
+    def _segments(self, values, reverse=False):
+        """
+        Gets the querysets for the rows after (or before when reverse) the key values, in page order.
+        The rows with a null first key are queried separately so each query can seek through an index on the keys.
+        """
+        ordering = self._ordering(reverse=reverse)
+        if values is None:
+            return [self.queryset.order_by(*ordering)]
+
+        (name, descending), value = self.keys[0], values[0]
+        not_null = self.queryset.filter(**{f'{name}__isnull': False}).order_by(*ordering)
+        null = self.queryset.filter(**{f'{name}__isnull': True}).order_by(*ordering)
+        seek = self._seek(self.keys[1:], values[1:], reverse=reverse)
+
+        if value is None:
+            null = null.filter(seek)
+            return [null, not_null] if reverse else [null]
+
+        lookup = 'lt' if descending != reverse else 'gt'
+        not_null = not_null.filter(Q(**{f'{name}__{lookup}e': value}),
+                                   Q(**{f'{name}__{lookup}': value}) | seek)
+        return [not_null] if reverse else [not_null, null]
+
+    def _seek(self, keys, values, reverse=False):
+        """
+        Builds the filter for the rows after (or before when reverse) the key values.
+        """
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending), value in zip(keys, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+
+class KeysetPage:
+    """
+    A page from a KeysetPaginator.
+    """
+
+    def __init__(self, paginator, object_list, has_previous, has_next):
+        self.paginator = paginator
+        self.object_list = object_list
+        self._has_previous = has_previous and len(object_list) > 0
+        self._has_next = has_next and len(object_list) > 0
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(KeysetPaginator.PREVIOUS, self.paginator.row_values(self.object_list[0]))
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(KeysetPaginator.NEXT, self.paginator.row_values(self.object_list[-1]))
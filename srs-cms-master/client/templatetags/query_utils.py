@@ -4,9 +4,12 @@ register = template.Library()
 
 
 @register.simple_tag(takes_context=True)
-def transform_query(context, **kwargs):
-    """Modify URL query parameters while keeping existing params."""
+def transform_query(context, *args, **kwargs):
+    """Modify URL query parameters while keeping existing params.
+    Params with variable names can be passed as positional name, value pairs."""
     query = context['request'].GET.copy()
+    for k, v in zip(args[::2], args[1::2]):
+        query[k] = v
     for k, v in kwargs.items():
         query[k] = v
     return query.urlencode()
@@ -1,13 +1,85 @@
+from contextlib import contextmanager
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.postgres.search import TrigramSimilarity
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.db import connection, transaction
 from django.db.models import F, Value
 from django.utils.dateparse import parse_date
 from django.db.models.functions import Coalesce
 from api.models import Death, Province
 from api.common import Permissions, TypeCaster
 from client.forms import DeathForm
+from client.pagination import KeysetPaginator
+
+# The related models and columns rendered by the death lists.
+DEATH_LIST_RELATED = ['event__area', 'event__cluster', 'event__event_staff', 'va_staff']
+DEATH_LIST_FIELDS = [
+    'id', 'death_code', 'deceased_name', 'deceased_dod',
+    'va_proposed_date', 'va_scheduled_date', 'va_completed_date',
+    'event__household_code', 'event__household_head_name', 'event__respondent_name', 'event__submission_date',
+    'event__area__code', 'event__area__adm4_name',
+    'event__cluster__code',
+    'event__event_staff__full_name',
+    'va_staff__full_name',
+]
+
+# The fields searched on the deaths page and their weights. The search_document holds the text of these fields.
+DEATH_SEARCH_WEIGHTS = [
+    ('death_code', 0.5),
+    ('va_staff__code', 0.4),
+    ('event__event_staff__code', 0.4),
+    ('event__area__code', 0.4),
+    ('event__household_head_name', 0.4),
+    ('deceased_name', 0.4),
+    ('event__respondent_name', 0.4),
+]
+DEATH_SEARCH_MIN_SIMILARITY = 0.05
+
+
+@contextmanager
+def death_search_threshold(threshold=None):
+    """
+    Sets the pg_trgm word similarity threshold used by search_deaths for the current transaction.
+
+    The %> prefilter only keeps the deaths with a word in their search_document similar to the query.
+    A threshold low enough to keep every death the weighted similarity matches
+    (DEATH_SEARCH_MIN_SIMILARITY / the sum of the weights) matches nearly every row, so the prefilter is traded
+    for recall with settings.DEATH_SEARCH_WORD_SIMILARITY_THRESHOLD. See: dev_benchmark_death_search
+
+    Args:
+        threshold: The word similarity threshold. Defaults to settings.DEATH_SEARCH_WORD_SIMILARITY_THRESHOLD.
+    """
+    if threshold is None:
+        threshold = settings.DEATH_SEARCH_WORD_SIMILARITY_THRESHOLD
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [str(threshold)])
+        yield
+
+
+def search_deaths(deaths, query, prefilter=True):
+    """
+    Filters deaths to the ones matching the query and orders them by their weighted similarity.
+    Call this within death_search_threshold().
+
+    Args:
+        deaths: The Death queryset to search.
+        query: The text to search for.
+        prefilter: Only rank the deaths matched by the trigram index on the search_document (%> operator).
+
+    Returns:
+        The filtered queryset annotated with the similarity.
+    """
+    similarity = sum(
+        weight * TrigramSimilarity(Coalesce(F(field_name), Value('')), query)
+        for field_name, weight in DEATH_SEARCH_WEIGHTS
+    )
+    if prefilter:
+        deaths = deaths.filter(search_document__trigram_word_similar=query)
+    return deaths.annotate(similarity=similarity).filter(
+        similarity__gte=DEATH_SEARCH_MIN_SIMILARITY).order_by('-similarity')
 
 
 @login_required(login_url="/login/")
@@ -17,6 +89,14 @@ def home(request):
 
 @login_required(login_url="/login/")
 def deaths_home(request):
+    if not request.GET.get('q', '').strip():
+        return _deaths_home(request)
+
+    with death_search_threshold():
+        return _deaths_home(request)
+
+
+def _deaths_home(request):
     province_id = request.GET.get('province')
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
@@ -45,41 +125,52 @@ def deaths_home(request):
         elif end_date:
             filters['deceased_dod'] = parse_date(end_date)
 
-    new_deaths = Death.objects.filter(death_status=Death.DeathStatus.NEW_DEATH, **filters)
-    scheduled_deaths = Death.objects.filter(death_status=Death.DeathStatus.VA_SCHEDULED, **filters)
-    completed_deaths = Death.objects.filter(death_status=Death.DeathStatus.VA_COMPLETED, **filters)
+    deaths = Death.objects.filter(**filters)
 
     # Text search
     if query:
-        # Search weights for each field.
-        similarity = (
-                0.5 * TrigramSimilarity(Coalesce(F('death_code'), Value('')), query) +
-                0.4 * TrigramSimilarity(Coalesce(F('va_staff__code'), Value('')), query) +
-                0.4 * TrigramSimilarity(Coalesce(F('event__event_staff__code'), Value('')), query) +
-                0.4 * TrigramSimilarity(Coalesce(F('event__area__code'), Value('')), query) +
-                0.4 * TrigramSimilarity(Coalesce(F('event__household_head_name'), Value('')), query) +
-                0.4 * TrigramSimilarity(Coalesce(F('deceased_name'), Value('')), query) +
-                0.4 * TrigramSimilarity(Coalesce(F('event__respondent_name'), Value('')), query)
-        )
-        min_similarity = 0.05
-
-        new_deaths = new_deaths.annotate(similarity=similarity).filter(
-            similarity__gte=min_similarity).order_by('-similarity')
-
-        scheduled_deaths = scheduled_deaths.annotate(similarity=similarity).filter(
-            similarity__gte=min_similarity).order_by('-similarity')
-
-        completed_deaths = completed_deaths.annotate(similarity=similarity).filter(
-            similarity__gte=min_similarity).order_by('-similarity')
+        deaths = search_deaths(deaths, query)
+
+    # Count all the statuses with one query. The unfiltered province counts are cached.
+    keyset_pagination = settings.DEATH_LIST_PAGINATION == 'keyset'
+    counts_are_approximate = False
+    if query or start_date or end_date:
+        status_counts = None
+        approximate_count_threshold = settings.DEATH_LIST_APPROXIMATE_COUNT_THRESHOLD
+        # Offset pages are numbered from the counts so they are only estimated for keyset pages.
+        if approximate_count_threshold and keyset_pagination:
+            # Estimate large results instead of counting every matching death.
+            estimated_counts = Death.objects.estimated_status_counts(deaths)
+            if sum(estimated_counts.values()) >= approximate_count_threshold:
+                status_counts = estimated_counts
+                counts_are_approximate = True
+        if status_counts is None:
+            status_counts = Death.objects.status_counts(deaths)
+    else:
+        status_counts = Death.objects.cached_status_counts(
+            province_id=selected_province.id if selected_province else None)
+
+    # Load each page with one query.
+    deaths = deaths.select_related(*DEATH_LIST_RELATED).only(*DEATH_LIST_FIELDS)
+    new_deaths = deaths.filter(death_status=Death.DeathStatus.NEW_DEATH)
+    scheduled_deaths = deaths.filter(death_status=Death.DeathStatus.VA_SCHEDULED)
+    completed_deaths = deaths.filter(death_status=Death.DeathStatus.VA_COMPLETED)
 
     # Paginate
-    new_deaths, new_deaths_paginator, scheduled_deaths, scheduled_deaths_paginator, completed_deaths, completed_deaths_paginator = (
-        paginate(request,
-                 page_keys=['new_deaths_page', 'scheduled_deaths_page', 'completed_deaths_page'],
-                 items=[new_deaths, scheduled_deaths, completed_deaths],
-                 page_size=paging_size
-                 )
-    )
+    paginate_kwargs = {
+        'page_keys': ['new_deaths_page', 'scheduled_deaths_page', 'completed_deaths_page'],
+        'items': [new_deaths, scheduled_deaths, completed_deaths],
+        'page_size': paging_size,
+        'counts': [status_counts[Death.DeathStatus.NEW_DEATH],
+                   status_counts[Death.DeathStatus.VA_SCHEDULED],
+                   status_counts[Death.DeathStatus.VA_COMPLETED]]
+    }
+    if keyset_pagination:
+        keys = [('similarity', True), ('id', False)] if query else [('deceased_dod', False), ('id', False)]
+        pages = paginate_keyset(request, keys=keys, **paginate_kwargs)
+    else:
+        pages = paginate(request, **paginate_kwargs)
+    new_deaths, new_deaths_paginator, scheduled_deaths, scheduled_deaths_paginator, completed_deaths, completed_deaths_paginator = pages
 
     return render(
         request,
@@ -94,6 +185,7 @@ def deaths_home(request):
             'query': query,
             'paging_size': paging_size,
             'paging_sizes': [10, 20, 50, 100],
+            'counts_are_approximate': counts_are_approximate,
 
             'new_deaths': new_deaths,
             'new_deaths_paginator': new_deaths_paginator,
@@ -128,12 +220,15 @@ def deaths_edit(request, id):
     return render(request, 'client/death_management/edit.html', {'form': form})
 
 
-def paginate(request, page_keys=[], items=[], page_size=10):
+def paginate(request, page_keys=[], items=[], page_size=10, counts=None):
     results = []
     for index, page_key in enumerate(page_keys):
         page_number = request.GET.get(page_key, 1)
         page_items = items[index] or []
         paginator = Paginator(page_items, page_size)
+        if counts is not None:
+            # Use the known count instead of a COUNT(*) query per paginator.
+            paginator.count = counts[index]
         try:
             page_items = paginator.page(page_number)
         except PageNotAnInteger:
@@ -144,3 +239,13 @@ def paginate(request, page_keys=[], items=[], page_size=10):
         results.append(paginator)
 
     return results
+
+
+def paginate_keyset(request, page_keys=[], items=[], keys=[], page_size=10, counts=None):
+    results = []
+    for index, page_key in enumerate(page_keys):
+        paginator = KeysetPaginator(items[index], keys, page_size, count=counts[index] if counts is not None else None)
+        results.append(paginator.page(request.GET.get(page_key)))
+        results.append(paginator)
+
+    return results
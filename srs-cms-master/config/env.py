@@ -109,6 +109,98 @@ class Env:
     def odk_api_form_submission_page_size(cls):
         return cls._env().int('ODK_API_FORM_SUBMISSION_PAGE_SIZE', default=100)
 
+    @classmethod
+    def odk_api_form_submission_prefetch_pages(cls):
+        return cls._env().int('ODK_API_FORM_SUBMISSION_PREFETCH_PAGES', default=1)
+
+    @classmethod
+    def odk_api_form_submission_metadata_page_size(cls):
+        return cls._env().int('ODK_API_FORM_SUBMISSION_METADATA_PAGE_SIZE', default=1000)
+
+    @classmethod
+    def odk_api_form_version_filter(cls):
+        return cls._env().str('ODK_API_FORM_VERSION_FILTER', default='client')
+
+    @classmethod
+    def odk_import_workers(cls):
+        return cls._env().int('ODK_IMPORT_WORKERS', default=1)
+
+    @classmethod
+    def odk_import_demux(cls):
+        return cls._env().bool('ODK_IMPORT_DEMUX', default=False)
+
+    @classmethod
+    def odk_import_engine(cls):
+        return cls._env().str('ODK_IMPORT_ENGINE', default='orm')
+
+    @classmethod
+    def odk_client_max_age_seconds(cls):
+        return cls._env().int('ODK_CLIENT_MAX_AGE_SECONDS', default=3600)
+
+    @classmethod
+    def odk_import_result_max_samples(cls):
+        return cls._env().int('ODK_IMPORT_RESULT_MAX_SAMPLES', default=100)
+
+    @classmethod
+    def odk_import_result_max_log_lines(cls):
+        return cls._env().int('ODK_IMPORT_RESULT_MAX_LOG_LINES', default=1000)
+
+    @classmethod
+    def odk_entity_list_export_mode(cls):
+        return cls._env().str('ODK_ENTITY_LIST_EXPORT_MODE', default='delta')
+
+    @classmethod
+    def odk_export_workers(cls):
+        return cls._env().int('ODK_EXPORT_WORKERS', default=1)
+
+    @classmethod
+    def odk_entity_list_export_batch_size(cls):
+        return cls._env().int('ODK_ENTITY_LIST_EXPORT_BATCH_SIZE', default=1000)
+
+    @classmethod
+    def death_status_counts_cache_seconds(cls):
+        return cls._env().int('DEATH_STATUS_COUNTS_CACHE_SECONDS', default=60)
+
+    @classmethod
+    def cache_url(cls):
+        return cls._env().cache_url('CACHE_URL', default='locmemcache://')
+
+    @classmethod
+    def permissions_scope_cache_seconds(cls):
+        return cls._env().int('PERMISSIONS_SCOPE_CACHE_SECONDS', default=300)
+
+    @classmethod
+    def death_list_pagination(cls):
+        return cls._env().str('DEATH_LIST_PAGINATION', default='offset')
+
+    @classmethod
+    def death_list_approximate_count_threshold(cls):
+        return cls._env().int('DEATH_LIST_APPROXIMATE_COUNT_THRESHOLD', default=0)
+
+    @classmethod
+    def death_search_word_similarity_threshold(cls):
+        return cls._env().float('DEATH_SEARCH_WORD_SIMILARITY_THRESHOLD', default=0.3)
+
+    @classmethod
+    def background_jobs_runner(cls):
+        return cls._env().str('BACKGROUND_JOBS_RUNNER', default='worker')
+
+    @classmethod
+    def background_jobs_concurrency_limit(cls):
+        return cls._env().int('BACKGROUND_JOBS_CONCURRENCY_LIMIT', default=1)
+
+    @classmethod
+    def background_jobs_poll_seconds(cls):
+        return cls._env().float('BACKGROUND_JOBS_POLL_SECONDS', default=2)
+
+    @classmethod
+    def background_jobs_heartbeat_seconds(cls):
+        return cls._env().float('BACKGROUND_JOBS_HEARTBEAT_SECONDS', default=30)
+
+    @classmethod
+    def background_jobs_stale_seconds(cls):
+        return cls._env().float('BACKGROUND_JOBS_STALE_SECONDS', default=600)
+
     @classmethod
     def npm_bin_path(cls):
         return cls._env().str('NPM_BIN_PATH', default=None)
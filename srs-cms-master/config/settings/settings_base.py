@@ -54,6 +54,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'api',
     'client',
     'tailwind',
@@ -114,6 +115,15 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/ref/settings/#caches
+# Deployments with more than one process need a shared cache (e.g., dbcache://srs_cms_cache or rediscache://...)
+# for the cached permission scopes. See: Permissions.is_scope_cache_enabled
+
+CACHES = {
+    'default': Env.cache_url()
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -168,3 +178,54 @@ ODK_BASE_URL = Env.odk_base_url()
 ODK_USERNAME = Env.odk_username()
 ODK_PASSWORD = Env.odk_password()
 ODK_API_FORM_SUBMISSION_PAGE_SIZE = Env.odk_api_form_submission_page_size()
+ODK_API_FORM_SUBMISSION_PREFETCH_PAGES = Env.odk_api_form_submission_prefetch_pages()
+ODK_API_FORM_SUBMISSION_METADATA_PAGE_SIZE = Env.odk_api_form_submission_metadata_page_size()
+# 'client' or 'metadata'. 'metadata' fetches the form submission ids first and only pays off when the form
+# has many versions. See: FromSubmissionImporterBase.get_form_submission_pages
+ODK_API_FORM_VERSION_FILTER = Env.odk_api_form_version_filter()
+ODK_IMPORT_WORKERS = Env.odk_import_workers()
+# Import each page of form submissions for the primary and child importers in one pass and one transaction.
+# Off by default. See: FromSubmissionImporterBase._import_demux_submissions
+ODK_IMPORT_DEMUX = Env.odk_import_demux()
+# 'orm' or 'copy'. See: FromSubmissionImporterBase.is_copy_import
+ODK_IMPORT_ENGINE = Env.odk_import_engine()
+ODK_CLIENT_MAX_AGE_SECONDS = Env.odk_client_max_age_seconds()
+ODK_IMPORT_RESULT_MAX_SAMPLES = Env.odk_import_result_max_samples()
+# The first and last half of this many info messages of an import are kept in its result.
+ODK_IMPORT_RESULT_MAX_LOG_LINES = Env.odk_import_result_max_log_lines()
+# 'delta' or 'full'. See: EntityListExporterBase
+ODK_ENTITY_LIST_EXPORT_MODE = Env.odk_entity_list_export_mode()
+ODK_EXPORT_WORKERS = Env.odk_export_workers()
+# The number of records read from the database and uploaded to ODK at a time when exporting an Entity List.
+ODK_ENTITY_LIST_EXPORT_BATCH_SIZE = Env.odk_entity_list_export_batch_size()
+
+# Client Settings
+# How long the dashboard death counts are cached. They are also invalidated when a Death is changed.
+DEATH_STATUS_COUNTS_CACHE_SECONDS = Env.death_status_counts_cache_seconds()
+# How long a user's permissions and provinces are cached. They are also invalidated when they are changed.
+# They are only cached across requests when CACHE_URL is a shared cache.
+PERMISSIONS_SCOPE_CACHE_SECONDS = Env.permissions_scope_cache_seconds()
+# 'offset' or 'keyset'. Keyset pages are seeked by cursors instead of page numbers. See: client.pagination
+DEATH_LIST_PAGINATION = Env.death_list_pagination()
+# Show the planner's estimated counts when a filtered death list has at least this many rows. 0 to always count.
+# Only used with 'keyset' pagination. Offset pages are numbered from the counts so they are always counted.
+DEATH_LIST_APPROXIMATE_COUNT_THRESHOLD = Env.death_list_approximate_count_threshold()
+# The pg_trgm word similarity a death's search_document needs to be ranked by the deaths search (0 to 1).
+# Lower values find more misspellings but rank more deaths. See: dev_benchmark_death_search
+DEATH_SEARCH_WORD_SIMILARITY_THRESHOLD = Env.death_search_word_similarity_threshold()
+
+# Background Jobs
+# 'worker', 'thread' or 'eager'. See: api.jobs.JobRunner
+# Jobs are run by the run_background_jobs workers by default. 'thread' is for development only.
+BACKGROUND_JOBS_RUNNER = Env.background_jobs_runner()
+# The maximum number of jobs with the same concurrency key (e.g., the same ODK project) running at once.
+BACKGROUND_JOBS_CONCURRENCY_LIMIT = Env.background_jobs_concurrency_limit()
+# Seconds between checks for queued jobs by the run_background_jobs workers.
+BACKGROUND_JOBS_POLL_SECONDS = Env.background_jobs_poll_seconds()
+# Seconds between the heartbeats of a running job.
+BACKGROUND_JOBS_HEARTBEAT_SECONDS = Env.background_jobs_heartbeat_seconds()
+# Running jobs without a heartbeat for this many seconds were abandoned (e.g., their worker was killed)
+# and are set to errored. See: JobRunner.error_stale_jobs
+BACKGROUND_JOBS_STALE_SECONDS = Env.background_jobs_stale_seconds()
+# Where uploaded files are kept until their import job runs.
+BACKGROUND_JOBS_FILES_DIR = os.path.join(MEDIA_ROOT, 'background_jobs')
@@ -7,6 +7,16 @@ while ! nc -z "$DB_HOST" "$DB_PORT"; do
 done
 echo "Database is ready."
 
+if [ "${APP_PROCESS:-web}" = "jobs" ]; then
+    echo "Waiting for the App to be initialized..."
+    while [ ! -f "/app/.app_initialized" ]; do
+      sleep 1
+    done
+
+    echo "Starting Background Job Workers..."
+    exec python manage.py run_background_jobs --workers "${BACKGROUND_JOBS_WORKERS:-1}"
+fi
+
 if [ ! -f "/app/.app_initialized" ]; then
     echo "Initializing App..."
 
@@ -29,6 +39,9 @@ else
     echo "App already initialized, skipping..."
 fi
 
+echo "Creating Cache Tables..."
+python manage.py createcachetable
+
 echo "Starting Gunicorn..."
 exec gunicorn config.wsgi:application \
     --bind "${GUNICORN_BIND:-0.0.0.0:8000}" \
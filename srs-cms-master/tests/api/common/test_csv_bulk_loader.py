@@ -0,0 +1,75 @@
+import csv
+import os
+import pytest
+from django.core.management import call_command
+from api.common import CsvBulkLoader
+from api.dev.seeds.seed_loader import SeedLoader
+from api.models import Province, Cluster, Area, Staff
+from tests.factories.factories import ClusterFactory
+
+SEEDS_DIR = os.path.join(SeedLoader('dev').seeds_root_dir(), 'dev')
+
+
+def load_seeds(bulk):
+    args = ['--bulk', '--chunk-size', '7'] if bulk else []
+    for name in ['provinces', 'clusters', 'areas', 'staff']:
+        call_command(f'load_{name}', os.path.join(SEEDS_DIR, f'{name}.csv'), *args)
+
+
+def snapshot():
+    return {
+        'provinces': set(Province.objects.values_list('code', 'name')),
+        'clusters': set(Cluster.objects.values_list('code', 'province__code')),
+        'areas': set(Area.objects.values_list('code', 'cluster__code', 'adm4_name', 'carto_pop_count')),
+        'staff': set(Staff.objects.values_list('code', 'staff_type', 'cluster__code', 'province__code')),
+    }
+
+
+@pytest.mark.django_db
+def test_bulk_load_matches_row_load():
+    load_seeds(bulk=False)
+    expected = snapshot()
+    for model_class in [Staff, Area, Cluster, Province]:
+        model_class.objects.all().delete()
+
+    load_seeds(bulk=True)
+    assert snapshot() == expected
+    with open(os.path.join(SEEDS_DIR, 'areas.csv'), newline='', encoding='utf-8') as file:
+        assert len(expected['areas']) == len(set(row['code'] for row in csv.DictReader(file)))
+
+
+@pytest.mark.django_db
+def test_bulk_load_updates_and_reports(django_assert_max_num_queries):
+    cluster = ClusterFactory()
+    other_cluster = ClusterFactory()
+    rows = [
+        {'code': 'AA001', 'cluster_code': cluster.code},
+        {'code': 'AA002', 'cluster_code': 'missing'},
+        {'code': 'AA003', 'cluster_code': cluster.code},
+    ]
+
+    def build(row, references):
+        return Area(code=row['code'], cluster=references['cluster'])
+
+    def validate(row, references):
+        return None if references['cluster'] else f"Cluster not found: {row['cluster_code']}"
+
+    def loader():
+        return CsvBulkLoader(Area, build=build, references={'cluster': ('cluster_code', Cluster)},
+                             update_fields=['cluster'], validate=validate, chunk_size=2)
+
+    result = loader().load(rows)
+    assert result.created_count == 2
+    assert result.updated_count == 0
+    assert result.errors == ['Cluster not found: missing']
+    assert result.row_count == 3
+    assert 'rows/sec' in result.summary('areas')
+
+    rows[0]['cluster_code'] = other_cluster.code
+    # Chunk 1: existing areas, clusters, update. Chunk 2: existing areas, clusters. Plus the savepoint.
+    with django_assert_max_num_queries(8):
+        result = loader().load(rows)
+    assert result.created_count == 0
+    assert result.updated_count == 1
+    assert Area.objects.get(code='AA001').cluster == other_cluster
+    assert Area.objects.get(code='AA003').cluster == cluster
@@ -0,0 +1,40 @@
+from api.common import FieldPath, Utils
+
+
+class Obj:
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def get_name(self, prefix=''):
+        return f'{prefix}name'
+
+
+def test_it_resolves_paths_the_same_as_utils():
+    obj = {
+        'a': {'b': {'c': 1}},
+        'list': [{'x': 'first'}, {'x': 'second'}],
+        'obj': Obj(child=Obj(value=2)),
+        'none': None
+    }
+    paths = [
+        'a', 'a.b', 'a.b.c', 'a.b.missing', 'missing',
+        'list[0]', 'list[1].x', 'list[5]',
+        'obj.child.value', 'obj.child.missing',
+        'obj.get_name()', "obj.get_name(prefix='my_')",
+        'none'
+    ]
+    for path in paths:
+        field_path = FieldPath.get(path)
+        assert field_path.has_value(obj) == Utils.has_field(obj, path), path
+        assert field_path.get_value(obj, default='default') == Utils.get_field(obj, path, default='default'), path
+
+
+def test_it_returns_has_field_and_value():
+    assert FieldPath.get('a.b').resolve({'a': {'b': 1}}) == (True, 1)
+    assert FieldPath.get('a.b').resolve({'a': {}}, default=2) == (False, 2)
+
+
+def test_it_caches_parsed_paths():
+    assert FieldPath.get('a.b[0]') is FieldPath.get('a.b[0]')
+    assert str(FieldPath.get('a.b[0]')) == 'a.b[0]'
@@ -1,6 +1,10 @@
 import pytest
+from django.core.cache import caches
+from django.core.management import call_command
 from api.common import Permissions
-from api.models import User
+from django.contrib.auth.models import Group
+from api.models import User, Province
+from tests.factories.factories import ProvinceFactory
 
 
 @pytest.mark.django_db
@@ -24,3 +28,108 @@ def test_permissions_work(seed_loader):
     assert Permissions.has_permission(user, Permissions.Codes.SCHEDULE_VA) is True
     assert Permissions.has_permission(user, Permissions.Codes.VIEW_ASSIGNED_PROVINCES) is False
     assert Permissions.has_permission(user, Permissions.Codes.VIEW_ALL_PROVINCES) is True
+
+
+@pytest.fixture
+def province_user(db, seed_loader):
+    seed_loader.load_permissions()
+    seed_loader.seed_users()
+    Permissions.invalidate_scopes()
+    return User.find_by(username='province')
+
+
+@pytest.fixture
+def shared_cache(db, settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'test_srs_cms_cache',
+        }
+    }
+    settings.PERMISSIONS_SCOPE_CACHE_SECONDS = 300
+    call_command('createcachetable')
+    Permissions.invalidate_scopes()
+
+
+def test_get_scope_is_not_cached_in_a_local_cache(province_user, settings, django_assert_max_num_queries):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    assert Permissions.is_scope_cache_enabled() is False
+
+    scope = Permissions.get_scope(User.find_by(username='province'))
+    user = User.find_by(username='province')
+    with django_assert_max_num_queries(3) as captured:
+        assert Permissions.get_scope(user) == scope
+    assert len(captured.captured_queries) > 0
+
+    # The scope is still kept on the user for the request.
+    with django_assert_max_num_queries(0):
+        assert Permissions.get_scope(user) == scope
+
+
+def test_get_scope_is_not_cached_when_disabled(shared_cache, settings):
+    settings.PERMISSIONS_SCOPE_CACHE_SECONDS = 0
+    assert Permissions.is_scope_cache_enabled() is False
+
+
+def test_get_scope_is_cached(shared_cache, province_user, django_assert_num_queries):
+    assert Permissions.is_scope_cache_enabled() is True
+    province = ProvinceFactory()
+    province_user.provinces.add(province)
+
+    scope = Permissions.get_scope(User.find_by(username='province'))
+    assert Permissions.Codes.SCHEDULE_VA in scope['permission_codes']
+    assert scope['province_ids'] == [province.id]
+
+    user = User.find_by(username='province')
+    # Only the cache is read.
+    with django_assert_num_queries(2):
+        assert Permissions.get_scope(user) == scope
+    with django_assert_num_queries(0):
+        assert Permissions.has_permission(user, Permissions.Codes.SCHEDULE_VA) is True
+        assert Permissions.has_permission(user, Permissions.Codes.VIEW_ALL_PROVINCES) is False
+    assert list(Province.objects.for_user(user)) == [province]
+
+
+@pytest.mark.parametrize('use_shared_cache', [True, False])
+def test_get_scope_is_invalidated(request, province_user, use_shared_cache):
+    if use_shared_cache:
+        request.getfixturevalue('shared_cache')
+    province = ProvinceFactory()
+    assert Permissions.get_scope(User.find_by(username='province'))['province_ids'] == []
+
+    province_user.provinces.add(province)
+    assert Permissions.get_scope(User.find_by(username='province'))['province_ids'] == [province.id]
+
+    province_user.groups.set([Group.objects.get(name='Central Users')])
+    scope = Permissions.get_scope(User.find_by(username='province'))
+    assert scope['province_ids'] is None
+    assert Permissions.Codes.VIEW_ALL_PROVINCES in scope['permission_codes']
+
+    province_user.is_active = False
+    province_user.save()
+    scope = Permissions.get_scope(User.find_by(username='province'))
+    assert scope['province_ids'] == []
+    assert scope['permission_codes'] == set()
+
+
+def test_get_scope_is_invalidated_in_other_processes(shared_cache, province_user, mocker):
+    # Each process has its own cache instance.
+    process_cache = caches.create_connection('default')
+    other_process_cache = caches.create_connection('default')
+    mocker.patch('api.common.permissions.cache', process_cache)
+    assert Permissions.get_scope(User.find_by(username='province'))['province_ids'] == []
+
+    mocker.patch('api.common.permissions.cache', other_process_cache)
+    province = ProvinceFactory()
+    province_user.provinces.add(province)
+
+    mocker.patch('api.common.permissions.cache', process_cache)
+    assert Permissions.get_scope(User.find_by(username='province'))['province_ids'] == [province.id]
+
+
+def test_get_scope_is_not_invalidated_by_logins(shared_cache, province_user, django_assert_num_queries):
+    Permissions.get_scope(province_user)
+    province_user.save(update_fields=['last_login'])
+    user = User.find_by(username='province')
+    with django_assert_num_queries(2):
+        Permissions.get_scope(user)
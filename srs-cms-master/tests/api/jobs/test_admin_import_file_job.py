@@ -0,0 +1,80 @@
+import os
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from api.models import BackgroundJob, Province
+
+
+@pytest.fixture
+def eager_jobs(settings, tmp_path):
+    settings.BACKGROUND_JOBS_RUNNER = 'eager'
+    settings.BACKGROUND_JOBS_FILES_DIR = str(tmp_path)
+    yield tmp_path
+
+
+def upload(admin_client, content):
+    return admin_client.post(
+        reverse('admin:api_province_import_file'),
+        {'file': SimpleUploadedFile('provinces.csv', content.encode('utf-8'), content_type='text/csv')},
+        follow=True
+    )
+
+
+@pytest.mark.django_db
+def test_import_file_runs_as_a_job(admin_client, eager_jobs):
+    response = upload(admin_client, "code,name\nP1,Province One\nP2,Province Two\n")
+
+    job = BackgroundJob.objects.get()
+    assert response.redirect_chain[-1][0] == reverse('admin:api_province_import_file_job', args=[job.id])
+    assert job.job_type == BackgroundJob.JOB_TYPE_ADMIN_IMPORT_FILE
+    assert job.status == BackgroundJob.STATUS_SUCCESSFUL
+    assert job.progress == 1
+    assert job.started_at is not None and job.ended_at is not None
+    assert job.args['command'] == 'load_provinces'
+    assert not os.path.exists(job.args['file_path'])
+    assert set(Province.objects.values_list('code', flat=True)) == {'P1', 'P2'}
+    assert 'Loaded 2 provinces.' in job.output
+    assert response.context['job'] == job
+    assert b'http-equiv="refresh"' not in response.content
+
+
+@pytest.mark.django_db
+def test_import_file_is_queued_for_the_workers(admin_client, settings, tmp_path, mocker):
+    # Keep the test transaction's connection open.
+    mocker.patch('api.jobs.job_worker.close_old_connections')
+    settings.BACKGROUND_JOBS_RUNNER = 'worker'
+    settings.BACKGROUND_JOBS_FILES_DIR = str(tmp_path)
+    response = upload(admin_client, "code,name\nP1,Province One\n")
+
+    job = BackgroundJob.objects.get()
+    assert job.status == BackgroundJob.STATUS_QUEUED
+    assert not Province.objects.exists()
+    assert b'Waiting for a background job worker' in response.content
+    assert b'http-equiv="refresh"' in response.content
+
+    call_command('run_background_jobs', '--once')
+    job.refresh_from_db()
+    assert job.status == BackgroundJob.STATUS_SUCCESSFUL
+    assert Province.objects.filter(code='P1').exists()
+
+
+@pytest.mark.django_db
+def test_import_file_job_errors(admin_client, eager_jobs):
+    upload(admin_client, "code\nP1\n")
+
+    job = BackgroundJob.objects.get()
+    assert job.status == BackgroundJob.STATUS_ERRORED
+    assert 'name' in job.error_output
+    assert not Province.objects.exists()
+    assert os.listdir(eager_jobs) == []
+
+
+@pytest.mark.django_db
+def test_import_file_job_page_refreshes_until_finished(admin_client):
+    job = BackgroundJob.objects.create(job_type=BackgroundJob.JOB_TYPE_ADMIN_IMPORT_FILE, name='Import', progress=0.5)
+
+    response = admin_client.get(reverse('admin:api_province_import_file_job', args=[job.id]))
+    assert response.status_code == 200
+    assert b'http-equiv="refresh"' in response.content
+    assert b'50%' in response.content
@@ -0,0 +1,128 @@
+import threading
+import time
+from datetime import timedelta
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.utils import timezone
+from api.jobs import JobRunner, AdminImportFileJob
+from api.models import BackgroundJob, Province
+
+
+def create_job(concurrency_key=None, status=BackgroundJob.STATUS_QUEUED):
+    return BackgroundJob.objects.create(job_type=BackgroundJob.JOB_TYPE_ADMIN_IMPORT_FILE,
+                                        name='Job',
+                                        concurrency_key=concurrency_key,
+                                        status=status)
+
+
+@pytest.mark.django_db
+def test_claim_holds_back_jobs_over_the_concurrency_limit(settings):
+    settings.BACKGROUND_JOBS_CONCURRENCY_LIMIT = 1
+    running_job = create_job(concurrency_key='project:1', status=BackgroundJob.STATUS_RUNNING)
+    held_job = create_job(concurrency_key='project:1')
+    other_job = create_job(concurrency_key='project:2')
+
+    claimed_job = JobRunner.claim(worker='test')
+    assert claimed_job == other_job
+    assert claimed_job.status == BackgroundJob.STATUS_RUNNING
+    assert claimed_job.worker == 'test'
+    assert JobRunner.claim() is None
+
+    BackgroundJob.objects.filter(id=running_job.id).update(status=BackgroundJob.STATUS_SUCCESSFUL)
+    assert JobRunner.claim() == held_job
+
+    settings.BACKGROUND_JOBS_CONCURRENCY_LIMIT = 2
+    second_job = create_job(concurrency_key='project:1')
+    third_job = create_job(concurrency_key='project:1')
+    assert JobRunner.claim(job=third_job) == third_job
+    assert JobRunner.claim(job=second_job) is None
+
+
+@pytest.mark.django_db
+def test_claim_errors_the_stale_running_jobs(settings):
+    settings.BACKGROUND_JOBS_STALE_SECONDS = 60
+    settings.BACKGROUND_JOBS_CONCURRENCY_LIMIT = 1
+    stale_job = create_job(concurrency_key='project:1', status=BackgroundJob.STATUS_RUNNING)
+    BackgroundJob.objects.filter(id=stale_job.id).update(worker='killed',
+                                                         heartbeat_at=timezone.now() - timedelta(seconds=61))
+    running_job = create_job(concurrency_key='project:2', status=BackgroundJob.STATUS_RUNNING)
+    BackgroundJob.objects.filter(id=running_job.id).update(heartbeat_at=timezone.now() - timedelta(seconds=59))
+    held_job = create_job(concurrency_key='project:1')
+
+    assert JobRunner.claim() == held_job
+
+    stale_job.refresh_from_db()
+    assert stale_job.status == BackgroundJob.STATUS_ERRORED
+    assert stale_job.ended_at is not None
+    assert 'abandoned by killed' in stale_job.error_output
+    running_job.refresh_from_db()
+    assert running_job.status == BackgroundJob.STATUS_RUNNING
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_saves_heartbeats(settings):
+    settings.BACKGROUND_JOBS_HEARTBEAT_SECONDS = 0.05
+    job = JobRunner.claim(job=create_job())
+    heartbeats = []
+
+    class Handler:
+        @classmethod
+        def run(cls, job, stdout, stderr):
+            for _ in range(3):
+                time.sleep(0.1)
+                heartbeats.append(BackgroundJob.objects.get(id=job.id).heartbeat_at)
+
+    JobRunner.register('TEST_HEARTBEAT', Handler)
+    job.job_type = 'TEST_HEARTBEAT'
+    try:
+        JobRunner.run(job)
+    finally:
+        JobRunner._handlers.pop('TEST_HEARTBEAT')
+
+    assert BackgroundJob.objects.get(id=job.id).status == BackgroundJob.STATUS_SUCCESSFUL
+    assert heartbeats[0] > job.started_at
+    assert heartbeats == sorted(heartbeats) and len(set(heartbeats)) > 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_claim_skips_jobs_claimed_by_other_workers():
+    job = create_job()
+    other_claims = []
+
+    def _claim():
+        try:
+            other_claims.append(JobRunner.claim(worker='other'))
+        finally:
+            connections.close_all()
+
+    with transaction.atomic():
+        assert JobRunner.claim(worker='first') == job
+        # The claim is not committed yet, the other worker skips the locked job.
+        thread = threading.Thread(target=_claim)
+        thread.start()
+        thread.join()
+
+    assert other_claims == [None]
+    assert BackgroundJob.objects.get(id=job.id).worker == 'first'
+
+
+@pytest.mark.django_db
+def test_workers_run_the_queued_jobs(settings, tmp_path, mocker):
+    # Keep the test transaction's connection open.
+    mocker.patch('api.jobs.job_worker.close_old_connections')
+    settings.BACKGROUND_JOBS_RUNNER = JobRunner.RUNNER_WORKER
+    settings.BACKGROUND_JOBS_FILES_DIR = str(tmp_path)
+    import_file = SimpleUploadedFile('provinces.csv', b"code,name\nP1,Province One\n", content_type='text/csv')
+    job = JobRunner.start(AdminImportFileJob.create(import_file, 'load_provinces'))
+
+    job.refresh_from_db()
+    assert job.status == BackgroundJob.STATUS_QUEUED
+    assert not Province.objects.exists()
+
+    call_command('run_background_jobs', '--once')
+    job.refresh_from_db()
+    assert job.status == BackgroundJob.STATUS_SUCCESSFUL
+    assert job.worker is not None
+    assert Province.objects.filter(code='P1').exists()
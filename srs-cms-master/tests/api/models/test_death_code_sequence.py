@@ -0,0 +1,70 @@
+import pytest
+from api.models import Death, DeathCodeSequence
+from tests.factories.factories import DeathFactory, EventFactory
+
+
+@pytest.mark.django_db
+def test_it_reserves_blocks_of_sequence_numbers():
+    reserved = DeathCodeSequence.reserve({'A1': 3, 'B1': 1})
+    assert list(reserved['A1']) == [1, 2, 3]
+    assert list(reserved['B1']) == [1]
+
+    reserved = DeathCodeSequence.reserve({'A1': 2})
+    assert list(reserved['A1']) == [4, 5]
+    assert DeathCodeSequence.find_by(cluster_code='A1').last_value == 5
+
+
+@pytest.mark.django_db
+def test_it_starts_from_the_existing_death_codes():
+    event = EventFactory()
+    cluster_code = event.cluster.code
+    DeathFactory(event=event, death_code=Death.format_death_code(cluster_code, 41))
+    # Other clusters starting with the same code are not included.
+    DeathFactory(event=event, death_code='{}X0099'.format(cluster_code))
+
+    reserved = DeathCodeSequence.reserve({cluster_code: 1})
+    assert list(reserved[cluster_code]) == [42]
+
+
+@pytest.mark.django_db
+def test_it_only_seeds_the_missing_clusters():
+    event = EventFactory()
+    cluster_code = event.cluster.code
+    DeathCodeSequence.reserve({cluster_code: 1})
+    DeathFactory(event=event, death_code=Death.format_death_code(cluster_code, 99))
+
+    # The existing sequence is incremented without reading the deaths table again.
+    reserved = DeathCodeSequence.reserve({cluster_code: 1, 'B1': 1})
+    assert list(reserved[cluster_code]) == [2]
+    assert list(reserved['B1']) == [1]
+
+
+@pytest.mark.django_db
+def test_save_with_death_code():
+    event = EventFactory()
+    cluster_code = event.cluster.code
+    DeathFactory(event=event, death_code=Death.format_death_code(cluster_code, 2))
+    DeathCodeSequence.reserve({cluster_code: 0})
+
+    death = DeathFactory.build(event=event, death_code=None)
+    assert death.save_with_death_code() is True
+    assert death.death_code == Death.format_death_code(cluster_code, 3)
+
+
+@pytest.mark.django_db
+def test_assign_death_codes():
+    event = EventFactory()
+    other_event = EventFactory()
+    deaths = [
+        DeathFactory.build(event=event, death_code=None),
+        DeathFactory.build(event=other_event, death_code=None),
+        DeathFactory.build(event=event, death_code=None),
+        DeathFactory.build(event=event, death_code='EXISTING')
+    ]
+    Death.assign_death_codes(deaths)
+    assert [d.death_code for d in deaths] == [
+        Death.format_death_code(event.cluster.code, 1),
+        Death.format_death_code(other_event.cluster.code, 1),
+        Death.format_death_code(event.cluster.code, 2),
+        'EXISTING'
+    ]
@@ -0,0 +1,106 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from api.models import Death
+from tests.factories.factories import DeathFactory, EventFactory, StaffFactory
+
+
+@pytest.mark.django_db
+def test_it_updates_the_search_document_on_save():
+    event = EventFactory(household_head_name='Head Name', respondent_name='Respondent Name')
+    death = DeathFactory(event=event, death_code='C0001', deceased_name='Deceased Name')
+    death.refresh_from_db()
+    assert death.search_document == ' '.join([
+        'C0001',
+        event.event_staff.code,
+        event.area.code,
+        'Head Name',
+        'Deceased Name',
+        'Respondent Name'
+    ])
+
+    death.va_staff = StaffFactory(code='VA001')
+    death.save()
+    death.refresh_from_db()
+    assert 'VA001' in death.search_document
+
+
+@pytest.mark.django_db
+def test_it_updates_the_search_document_when_the_event_changes():
+    death = DeathFactory(event=EventFactory(respondent_name='Old Name'))
+    death.event.respondent_name = 'New Name'
+    death.event.save()
+    death.refresh_from_db()
+    assert 'New Name' in death.search_document
+    assert 'Old Name' not in death.search_document
+
+
+@pytest.mark.django_db
+def test_update_search_documents():
+    deaths = DeathFactory.create_batch(3)
+    Death.objects.update(search_document=None)
+    assert Death.objects.update_search_documents(death_ids=[deaths[0].id]) == 1
+    assert Death.objects.update_search_documents() == 2
+    assert Death.objects.update_search_documents() == 0
+    assert not Death.objects.filter(search_document=None).exists()
+
+
+@pytest.mark.django_db
+def test_it_sets_the_search_document_before_save():
+    death = DeathFactory(va_staff=StaffFactory(code='VA001'))
+    # The document built by save() is the same as the one built by update_search_documents.
+    assert Death.objects.update_search_documents() == 0
+
+    death.deceased_name = 'New Name'
+    with CaptureQueriesContext(connection) as ctx:
+        death.save()
+    updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "{}"'.format(Death._meta.db_table))]
+    assert len(updates) == 1
+    death.refresh_from_db()
+    assert 'New Name' in death.search_document
+
+    death.deceased_name = 'Other Name'
+    death.save(update_fields=['deceased_name'])
+    death.refresh_from_db()
+    assert 'Other Name' in death.search_document
+
+
+@pytest.mark.django_db
+def test_it_updates_the_search_document_when_the_staff_or_area_changes():
+    death = DeathFactory(va_staff=StaffFactory(code='VA001'))
+    event = death.event
+
+    death.va_staff.code = 'VA002'
+    death.va_staff.save()
+    event.event_staff.code = 'ES002'
+    event.event_staff.save()
+    event.area.code = 'AR002'
+    event.area.save()
+
+    death.refresh_from_db()
+    for code in ['VA002', 'ES002', 'AR002']:
+        assert code in death.search_document
+
+
+@pytest.mark.django_db
+def test_it_only_updates_the_search_document_when_a_search_field_is_saved(django_assert_num_queries):
+    death = DeathFactory(deceased_name='Old Name')
+    death = Death.objects.get(id=death.id)
+
+    # Only the Death is updated, the event, staff and area are not loaded.
+    death.comment = 'Comment'
+    with django_assert_num_queries(1):
+        death.save(update_fields=['comment'])
+
+    # Only the Event is updated, the deaths' search documents are not.
+    event = death.event
+    event.household_head_name = 'New Head Name'
+    event.comment = 'Comment'
+    with django_assert_num_queries(1):
+        event.save(update_fields=['comment'])
+    death.refresh_from_db()
+    assert 'New Head Name' not in death.search_document
+
+    event.save(update_fields=['household_head_name'])
+    death.refresh_from_db()
+    assert 'New Head Name' in death.search_document
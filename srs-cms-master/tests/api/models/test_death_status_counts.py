@@ -0,0 +1,53 @@
+import pytest
+from api.models import Death
+from tests.factories.factories import DeathFactory, EventFactory
+
+
+@pytest.fixture
+def deaths(db):
+    event = EventFactory()
+    other_event = EventFactory()
+    return [
+        DeathFactory(event=event, death_status=Death.DeathStatus.NEW_DEATH),
+        DeathFactory(event=event, death_status=Death.DeathStatus.NEW_DEATH),
+        DeathFactory(event=event, death_status=Death.DeathStatus.VA_SCHEDULED),
+        DeathFactory(event=other_event, death_status=Death.DeathStatus.VA_COMPLETED),
+    ]
+
+
+def test_status_counts(deaths, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        counts = Death.objects.status_counts()
+    assert counts[Death.DeathStatus.NEW_DEATH] == 2
+    assert counts[Death.DeathStatus.VA_SCHEDULED] == 1
+    assert counts[Death.DeathStatus.VA_COMPLETED] == 1
+    assert counts[Death.DeathStatus.VA_ON_HOLD] == 0
+
+
+def test_cached_status_counts(deaths, django_assert_num_queries):
+    province_id = deaths[0].event.cluster.province_id
+    Death.objects.invalidate_status_counts()
+    with django_assert_num_queries(1):
+        counts = Death.objects.cached_status_counts(province_id=province_id)
+        assert Death.objects.cached_status_counts(province_id=province_id) == counts
+    assert counts[Death.DeathStatus.NEW_DEATH] == 2
+    assert counts[Death.DeathStatus.VA_COMPLETED] == 0
+
+    # Changing a death invalidates the counts.
+    deaths[0].death_status = Death.DeathStatus.VA_COMPLETED
+    deaths[0].save()
+    counts = Death.objects.cached_status_counts(province_id=province_id)
+    assert counts[Death.DeathStatus.NEW_DEATH] == 1
+    assert counts[Death.DeathStatus.VA_COMPLETED] == 1
+
+    deaths[1].delete()
+    counts = Death.objects.cached_status_counts(province_id=province_id)
+    assert counts[Death.DeathStatus.NEW_DEATH] == 0
+
+
+def test_estimated_status_counts(deaths):
+    counts = Death.objects.estimated_status_counts()
+    assert set(counts.keys()) == set(Death.DeathStatus)
+    for count in counts.values():
+        assert isinstance(count, int)
+        assert count >= 0
@@ -0,0 +1,98 @@
+import pytest
+from api.models import EtlDocument, EtlMapping, Death, Event
+from api.odk.etl import EtlMappingPlan
+from api.odk.etl import CompiledEtlMapping
+from api.odk.importers.form_submissions.form_submission_importer_factory import FromSubmissionImporterFactory
+from tests.factories.factories import EtlDocumentFactory, EventFactory, DeathFactory
+
+
+@pytest.mark.django_db
+def test_it_builds_from_etl_document():
+    etl_document = EtlDocumentFactory(with_mappings=True,
+                                      with_mappings__importer=FromSubmissionImporterFactory.ODK_EVENTS_IMPORTER_NAME)
+    plan = etl_document.get_mapping_plan()
+    assert plan is etl_document.get_mapping_plan()
+    assert plan is not etl_document.get_mapping_plan(refresh=True)
+
+    enabled_mappings = list(etl_document.etl_mappings.filter(is_enabled=True))
+    assert len(plan.mappings) == len(enabled_mappings)
+    assert plan.mappings[0].is_primary_key
+    assert plan.primary_key_names == [m.target_name for m in enabled_mappings if m.is_primary_key]
+
+
+def test_it_gets_mappings_by_source_and_target_name():
+    key_mapping = EtlMapping(source_name='__id', target_name='key', target_type='str', is_primary_key=True)
+    name_mapping = EtlMapping(source_name='person.name', target_name='name', target_type='str')
+    plan = EtlMappingPlan([key_mapping, name_mapping])
+
+    assert isinstance(plan.get_mapping_for(source_name='__id'), CompiledEtlMapping)
+    assert plan.get_mapping_for(source_name='__id').etl_mapping is key_mapping
+    assert plan.get_mapping_for(target_name='name').etl_mapping is name_mapping
+    assert plan.get_mapping_for(source_name='__id', target_name='name') is None
+    assert plan.etl_mappings == [key_mapping, name_mapping]
+
+
+def test_it_gets_records_from_the_source_root():
+    mapping = EtlMapping(source_name='name', target_name='name', target_type='str')
+    assert EtlMappingPlan([mapping]).get_records({'name': 'a'}) == [{'name': 'a'}]
+
+    plan = EtlMappingPlan([mapping], source_root='people')
+    assert plan.get_records({'people': [{'name': 'a'}, {'name': 'b'}]}) == [{'name': 'a'}, {'name': 'b'}]
+    assert plan.get_records({}) == []
+
+
+def test_it_resolves_casts_and_transforms_values():
+    mapping = EtlMapping(source_name='__id', target_name='key', target_type='str', is_primary_key=True,
+                         transform={'name': 'replace', 'args': ['uuid:', '']})
+    compiled = EtlMappingPlan([mapping]).mappings[0]
+    has_source_name, value = compiled.resolve({'__id': 'uuid:123'})
+    assert has_source_name is True
+    assert compiled.cast_value(value, transform=True) == '123'
+    assert compiled.resolve({}) == (False, None)
+
+
+def test_it_gets_primary_keys():
+    class Model:
+        key = 'abc'
+        name = None
+
+    plan = EtlMappingPlan([EtlMapping(source_name='__id', target_name='key', target_type='str', is_primary_key=True)])
+    assert plan.get_primary_keys(Model()) == ({'key': 'abc'}, True)
+
+    with pytest.raises(ValueError):
+        EtlMappingPlan([EtlMapping(source_name='name', target_name='name', target_type='str')]).get_primary_keys(Model())
+
+
+def test_it_infers_the_model_projection_from_the_source_names():
+    plan = EtlMappingPlan([
+        EtlMapping(source_name='death_code', target_name='death_id', target_type='str', is_primary_key=True),
+        EtlMapping(source_name='event.cluster.province.code', target_name='prov_code', target_type='str'),
+        EtlMapping(source_name='va_staff.code', target_name='va_staff_id', target_type='str'),
+        EtlMapping(source_name='get_deceased_sex_display()', target_name='sex', target_type='str'),
+    ])
+    select_related, field_names = plan.get_model_projection(Death)
+    assert select_related == ['event', 'event__cluster', 'event__cluster__province', 'va_staff']
+    assert field_names == ['death_code', 'deceased_sex', 'event', 'event__cluster', 'event__cluster__province',
+                           'event__cluster__province__code', 'va_staff', 'va_staff__code']
+
+    # Methods can read any field of their model.
+    plan = EtlMappingPlan([
+        EtlMapping(source_name='event.formatted_gps_coordinates()', target_name='gps', target_type='str'),
+    ])
+    select_related, field_names = plan.get_model_projection(Death)
+    assert select_related == ['event']
+    assert {f'event__{f.name}' for f in Event._meta.concrete_fields} <= set(field_names)
+
+
+@pytest.mark.django_db
+def test_it_maps_models_in_one_query(seed_loader, django_assert_num_queries):
+    seed_loader.seed_etl()
+    plan = EtlDocument.objects.get(name='VA Preload Export').get_mapping_plan()
+    event = EventFactory()
+    DeathFactory.create_batch(3, event=event, va_staff=event.event_staff)
+
+    with django_assert_num_queries(1):
+        for death in plan.apply_model_projection(Death.objects.all()):
+            for mapping in plan.mappings:
+                has_source_name, _ = mapping.resolve(death)
+                assert has_source_name, mapping.source_name
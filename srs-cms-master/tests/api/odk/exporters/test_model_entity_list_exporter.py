@@ -0,0 +1,80 @@
+import pytest
+from api.models import Death, Event, EtlDocument, OdkEntity, OdkEntityListExporterJob, OdkProject
+from api.odk.exporters.entity_lists.entity_list_exporter import EntityListExporter
+from api.odk.exporters.entity_lists.entity_list_exporter_factory import EntityListExporterFactory
+from api.odk.exporters.entity_lists.model_entity_list_exporter import ModelEntityListExporter
+from tests.factories.factories import EventFactory, DeathFactory
+
+
+@pytest.fixture
+def setup(seed_loader):
+    seed_loader.seed_etl()
+    seed_loader.seed_odk()
+    etl_document = EtlDocument.objects.create(name='Events Export', version='1')
+    etl_document.etl_mappings.create(source_name='key', target_name='event_key', target_type='str',
+                                     is_primary_key=True)
+    etl_document.etl_mappings.create(source_name='event_staff.code', target_name='staff_code', target_type='str')
+    odk_entity_list = OdkProject.objects.get().odk_entity_lists.create(name='events', is_enabled=True)
+    odk_entity_list_exporter = odk_entity_list.odk_entity_list_exporters.create(
+        exporter=EntityListExporterFactory.ODK_MODEL_EXPORTER_NAME,
+        etl_document=etl_document,
+        source_model='api.Event',
+        source_filter={'consent': 1},
+        is_enabled=True
+    )
+    events = [EventFactory(consent=1) for _ in range(3)]
+    EventFactory(consent=2)
+    return odk_entity_list_exporter, events
+
+
+@pytest.mark.django_db
+def test_it_exports_the_source_model(setup, mock_entities):
+    odk_entity_list_exporter, events = setup
+    result = EntityListExporter(odk_entity_lists=[odk_entity_list_exporter.odk_entity_list],
+                                exporters=[EntityListExporterFactory.ODK_MODEL_EXPORTER_NAME]).execute()
+    assert result.errors == []
+    assert result.exported_model_counts == {'Event': 3}
+
+    exported = {e['label']: e for e in mock_entities['entities'].values()}
+    assert set(exported.keys()) == set(e.key for e in events)
+    assert exported[events[0].key]['staff_code'] == events[0].event_staff.code
+    assert OdkEntity.objects.filter(odk_entity_list=odk_entity_list_exporter.odk_entity_list).count() == 3
+
+
+@pytest.mark.django_db
+def test_it_exports_a_queryset(setup, mock_entities):
+    odk_entity_list_exporter, events = setup
+    result = ModelEntityListExporter(odk_entity_list_exporter,
+                                     queryset=Event.objects.filter(id=events[0].id)).execute()
+    assert result.errors == []
+    assert [e['label'] for e in mock_entities['entities'].values()] == [events[0].key]
+
+
+@pytest.mark.django_db
+def test_it_validates_the_source_model(setup, mock_entities):
+    odk_entity_list_exporter, _ = setup
+    odk_entity_list_exporter.source_model = 'api.NotAModel'
+    result = ModelEntityListExporter(odk_entity_list_exporter).execute()
+    assert len(result.errors) == 1
+    assert result.errors[0].startswith('Source Model not found: api.NotAModel')
+    assert not mock_entities['create_many'].called
+
+
+@pytest.mark.django_db(transaction=True)
+def test_it_exports_entity_lists_concurrently(setup, mock_entities):
+    odk_entity_list_exporter, events = setup
+    event = events[0]
+    DeathFactory(event=event, va_staff=event.event_staff, death_status=Death.DeathStatus.VA_SCHEDULED)
+
+    result = EntityListExporter(workers=2).execute()
+    assert result.errors == []
+    assert len(result.exported_entity_lists) == 2
+    assert result.exported_model_counts == {'Death': 1, 'Event': 3}
+    assert sorted(mock_entities['entity_list_names'].values()) == ['events', 'events', 'events', 'va_preload']
+
+    # Each OdkEntityList has its own job with only its results.
+    for odk_entity_list_exporter_job in OdkEntityListExporterJob.objects.all():
+        assert odk_entity_list_exporter_job.status == OdkEntityListExporterJob.STATUS_SUCCESSFUL
+        assert odk_entity_list_exporter_job.result['exported_entity_lists'] == [
+            {'id': odk_entity_list_exporter_job.odk_entity_list_exporter.odk_entity_list_id}
+        ]
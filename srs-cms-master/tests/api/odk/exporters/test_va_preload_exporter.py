@@ -0,0 +1,141 @@
+import json
+import pytest
+from api.models import Death, OdkEntity, OdkEntityListExporter, OdkEntityListExporterJob
+from api.odk.exporters.entity_lists.entity_list_exporter import EntityListExporter
+from api.odk.exporters.entity_lists.entity_list_exporter_base import EntityListExporterBase
+from api.odk.exporters.entity_lists.va_preload_exporter import VaPreloadExporter
+from tests.factories.factories import EventFactory, DeathFactory
+
+
+@pytest.fixture
+def setup(seed_loader):
+    seed_loader.seed_etl()
+    seed_loader.seed_odk()
+    event = EventFactory()
+    deaths = [DeathFactory(event=event, va_staff=event.event_staff, death_status=Death.DeathStatus.VA_SCHEDULED) for _ in range(3)]
+    return OdkEntityListExporter.objects.get(), deaths
+
+
+def export(export_mode=None, out_dir=None):
+    result = EntityListExporter(export_mode=export_mode, out_dir=out_dir).execute()
+    assert result.errors == []
+    return OdkEntityListExporterJob.objects.order_by('-id').first()
+
+
+def reset_mocks(mock_entities):
+    for mock in mock_entities.values():
+        if hasattr(mock, 'reset_mock'):
+            mock.reset_mock()
+
+
+@pytest.mark.django_db
+def test_it_exports_only_the_changed_entities(setup, mock_entities):
+    odk_entity_list_exporter, deaths = setup
+
+    # The first export creates all the entities.
+    job = export()
+    assert job.args['export_mode'] == VaPreloadExporter.EXPORT_MODE_FULL
+    assert not mock_entities['merge'].called
+    assert len(mock_entities['create_many'].call_args.kwargs['data']) == 3
+    assert OdkEntity.objects.count() == 3
+    assert set(OdkEntity.objects.values_list('uuid', flat=True)) == set(mock_entities['entities'].keys())
+
+    # Nothing changed.
+    reset_mocks(mock_entities)
+    job = export()
+    assert job.args['export_mode'] == VaPreloadExporter.EXPORT_MODE_DELTA
+    assert not mock_entities['merge'].called
+    assert not mock_entities['create_many'].called
+    assert not mock_entities['update'].called
+    assert not mock_entities['delete'].called
+
+    # One created, one updated and one deleted.
+    reset_mocks(mock_entities)
+    new_death = DeathFactory(event=deaths[0].event, va_staff=deaths[0].va_staff,
+                             death_status=Death.DeathStatus.VA_SCHEDULED)
+    Death.objects.filter(id=deaths[1].id).update(deceased_mother_name='Changed Name')
+    Death.objects.filter(id=deaths[2].id).update(death_status=Death.DeathStatus.VA_COMPLETED)
+    job = export()
+    assert job.args['export_mode'] == VaPreloadExporter.EXPORT_MODE_DELTA
+    assert not mock_entities['merge'].called
+    assert len(mock_entities['create_many'].call_args.kwargs['data']) == 1
+    assert mock_entities['update'].call_count == 1
+    assert mock_entities['update'].call_args.kwargs['data']['dec_parent1'] == 'Changed Name'
+    assert mock_entities['delete'].call_count == 1
+
+    labels = set(OdkEntity.objects.values_list('label', flat=True))
+    assert labels == set(e['label'] for e in mock_entities['entities'].values())
+    assert len(labels) == 3
+    assert any(label.startswith(f'{new_death.death_code}:') for label in labels)
+    assert OdkEntity.objects.filter(odk_entity_list_exporter_job=job).count() == 2
+
+
+@pytest.mark.django_db
+def test_it_falls_back_to_a_full_export(setup, mock_entities):
+    export()
+
+    # Only the entities that differ from ODK are changed.
+    reset_mocks(mock_entities)
+    uuid = next(iter(mock_entities['entities']))
+    mock_entities['entities'][uuid]['dec_parent1'] = 'Changed in ODK'
+    job = export(export_mode=VaPreloadExporter.EXPORT_MODE_FULL)
+    assert job.args['export_mode'] == VaPreloadExporter.EXPORT_MODE_FULL
+    assert not mock_entities['create_many'].called
+    assert mock_entities['update'].call_count == 1
+    assert mock_entities['update'].call_args.kwargs['uuid'] == uuid
+    assert OdkEntity.objects.count() == 3
+
+    # The entities may not match ODK after a failed export.
+    OdkEntityListExporterJob.objects.filter(id=job.id).update(status=OdkEntityListExporterJob.STATUS_ERRORED)
+    reset_mocks(mock_entities)
+    job = export()
+    assert job.args['export_mode'] == VaPreloadExporter.EXPORT_MODE_FULL
+    assert not mock_entities['create_many'].called
+    assert not mock_entities['update'].called
+    assert OdkEntity.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_it_keeps_the_entities_when_a_full_export_fails(setup, mock_entities, settings):
+    odk_entity_list_exporter, deaths = setup
+    settings.ODK_ENTITY_LIST_EXPORT_BATCH_SIZE = 2
+    export()
+    odk_entities = set(OdkEntity.objects.values_list('label', 'uuid', 'record_hash'))
+    assert len(odk_entities) == 3
+
+    reset_mocks(mock_entities)
+    DeathFactory(event=deaths[0].event, va_staff=deaths[0].va_staff, death_status=Death.DeathStatus.VA_SCHEDULED)
+    mock_entities['create_many'].side_effect = Exception('Upload failed')
+    result = EntityListExporter(export_mode=VaPreloadExporter.EXPORT_MODE_FULL).execute()
+    assert any('Failed to upload to ODK' in error for error in result.errors)
+    assert set(OdkEntity.objects.values_list('label', 'uuid', 'record_hash')) == odk_entities
+
+
+def test_it_requires_get_queryset():
+    class Exporter(EntityListExporterBase):
+        pass
+
+    with pytest.raises(TypeError):
+        Exporter(None)
+
+
+@pytest.mark.django_db
+def test_it_exports_in_batches(setup, mock_entities, settings, tmp_path):
+    odk_entity_list_exporter, deaths = setup
+    settings.ODK_ENTITY_LIST_EXPORT_BATCH_SIZE = 2
+
+    job = export(out_dir=tmp_path)
+    assert [len(c.kwargs['data']) for c in mock_entities['create_many'].call_args_list] == [2, 1]
+    assert all(c.kwargs['top'] == 2 for c in mock_entities['get_table'].call_args_list)
+    assert OdkEntity.objects.count() == 3
+    with open(tmp_path / f'entity-list-{odk_entity_list_exporter.odk_entity_list.name}.json') as f:
+        assert len(json.load(f)) == 3
+
+    # The entities that are no longer scheduled are deleted once all the batches are exported.
+    reset_mocks(mock_entities)
+    Death.objects.filter(id__in=[deaths[0].id, deaths[2].id]).update(death_status=Death.DeathStatus.VA_COMPLETED)
+    job = export()
+    assert job.args['export_mode'] == VaPreloadExporter.EXPORT_MODE_DELTA
+    assert mock_entities['delete'].call_count == 2
+    assert OdkEntity.objects.count() == 1
+    assert len(mock_entities['entities']) == 1
@@ -1,4 +1,4 @@
-maimport pytest
+import pytest
 from api.odk.importers.form_submissions.babies_importer import BabiesImporter
 from api.odk.importers.form_submissions.form_submission_importer_factory import FromSubmissionImporterFactory
 from api.models import Event, Baby
@@ -70,3 +70,19 @@ def test_it_does_not_import_duplicate_babies(setup, expect_odk_form_submission_i
     importer = BabiesImporter(odk_form, odk_form_importer)
     result = importer.execute()
     expect_odk_form_submission_import_result(result, imported_models_count=0)
+
+
+@pytest.mark.django_db
+def test_it_gets_the_events_once_per_page(setup, expect_odk_form_submission_import_result, mocker):
+    odk_form, odk_form_importer, event_form_submissions = setup()
+    resolve_parent_models = mocker.spy(BabiesImporter, 'resolve_parent_models')
+    get_model_or_try_execute_importer = mocker.spy(BabiesImporter, 'get_model_or_try_execute_importer')
+
+    importer = BabiesImporter(odk_form, odk_form_importer, bulk_import=True)
+    result = importer.execute()
+    expect_odk_form_submission_import_result(result, imported_models_count=DEFAULT_FORM_SUBMISSION_COUNT * 2)
+
+    # The Events for the page are found and imported together, not looked up for each Baby.
+    assert importer.imported_page_count == 1
+    assert resolve_parent_models.call_count == importer.imported_page_count
+    assert get_model_or_try_execute_importer.call_count == 0
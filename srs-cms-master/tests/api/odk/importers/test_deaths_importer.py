@@ -70,3 +70,66 @@ def test_it_does_not_import_duplicate_deaths(setup, expect_odk_form_submission_i
     importer = DeathsImporter(odk_form, odk_form_importer)
     result = importer.execute()
     expect_odk_form_submission_import_result(result, imported_models_count=0)
+
+
+@pytest.mark.django_db
+def test_it_imports_missing_events_once_per_page(setup, mocker, expect_odk_form_submission_import_result):
+    odk_form, odk_form_importer, event_form_submissions = setup()
+    get_importer = mocker.spy(FromSubmissionImporterFactory, 'get_importer')
+
+    importer = DeathsImporter(odk_form, odk_form_importer)
+    result = importer.execute()
+    expect_odk_form_submission_import_result(result, imported_models_count=DEFAULT_FORM_SUBMISSION_COUNT * 2)
+    assert get_importer.call_count == 1
+    assert len(get_importer.call_args.kwargs['form_submissions']) == DEFAULT_FORM_SUBMISSION_COUNT
+
+
+@pytest.mark.django_db
+def test_it_does_not_retry_missing_events_per_form_submission(setup, mocker):
+    odk_form, odk_form_importer, event_form_submissions = setup()
+    mocker.patch('api.odk.importers.form_submissions.events_importer.EventsImporter.on_can_import',
+                 return_value=False)
+    get_importer = mocker.spy(FromSubmissionImporterFactory, 'get_importer')
+
+    importer = DeathsImporter(odk_form, odk_form_importer)
+    result = importer.execute()
+    assert get_importer.call_count == 1
+    assert not [m for m in result.imported_models if isinstance(m, Death)]
+    assert len([e for e in result.errors if e.startswith('Could not create Event')]) == DEFAULT_FORM_SUBMISSION_COUNT
+
+
+@pytest.mark.django_db
+def test_it_bulk_imports_deaths_with_death_codes(setup, expect_odk_form_submission_import_result):
+    odk_form, odk_form_importer, event_form_submissions = setup()
+
+    importer = DeathsImporter(odk_form, odk_form_importer, bulk_import=True)
+    assert importer.is_bulk_import() is True
+    result = importer.execute()
+    expect_odk_form_submission_import_result(result, imported_models_count=DEFAULT_FORM_SUBMISSION_COUNT * 2)
+
+    deaths = list(Death.objects.select_related('event__cluster').order_by('death_code'))
+    assert len(deaths) == DEFAULT_FORM_SUBMISSION_COUNT
+    for death in deaths:
+        assert death.death_code.startswith(death.event.cluster.code)
+    assert len({d.death_code for d in deaths}) == DEFAULT_FORM_SUBMISSION_COUNT
+
+
+@pytest.mark.django_db
+def test_it_copy_imports_deaths_with_death_codes(setup, expect_odk_form_submission_import_result):
+    odk_form, odk_form_importer, event_form_submissions = setup()
+
+    importer = DeathsImporter(odk_form, odk_form_importer, engine=DeathsImporter.ENGINE_COPY)
+    assert importer.is_copy_import() is True
+    result = importer.execute()
+    expect_odk_form_submission_import_result(result, imported_models_count=DEFAULT_FORM_SUBMISSION_COUNT * 2)
+
+    deaths = list(Death.objects.select_related('event__cluster').order_by('death_code'))
+    assert len(deaths) == DEFAULT_FORM_SUBMISSION_COUNT
+    for death in deaths:
+        assert death.death_status == Death.DeathStatus.NEW_DEATH
+        assert death.death_code.startswith(death.event.cluster.code)
+        assert death.search_document is not None
+    assert len({d.death_code for d in deaths}) == DEFAULT_FORM_SUBMISSION_COUNT
+
+    result = DeathsImporter(odk_form, odk_form_importer, engine=DeathsImporter.ENGINE_COPY).execute()
+    expect_odk_form_submission_import_result(result, imported_models_count=0)
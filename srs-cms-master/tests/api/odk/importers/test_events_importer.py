@@ -1,7 +1,10 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from api.odk.importers.form_submissions.events_importer import EventsImporter
 from api.odk.importers.form_submissions.form_submission_importer_factory import FromSubmissionImporterFactory
 from api.models import Event
+from api.common import Utils, TypeCaster
 from tests.factories.factories import OdkProjectFactory, FormSubmissionFactory, ProvinceFactory
 
 DEFAULT_FORM_SUBMISSION_COUNT = 3
@@ -62,3 +65,182 @@ def test_it_does_not_import_duplicate_events(setup, expect_odk_form_submission_i
     importer = EventsImporter(odk_form, odk_form_importer)
     result = importer.execute()
     expect_odk_form_submission_import_result(result, imported_models_count=0)
+
+
+@pytest.mark.django_db
+def test_it_bulk_imports_events(setup, expect_odk_form_submission_import_result):
+    odk_form, odk_form_importer, event_form_submissions = setup()
+
+    importer = EventsImporter(odk_form, odk_form_importer, bulk_import=True)
+    assert importer.is_bulk_import()
+    with CaptureQueriesContext(connection) as ctx:
+        result = importer.execute()
+    expect_odk_form_submission_import_result(result, imported_models_count=DEFAULT_FORM_SUBMISSION_COUNT)
+
+    event_table = Event._meta.db_table
+    insert_queries = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "{}"'.format(event_table))]
+    assert len(insert_queries) == 1
+
+    for imported_event in result.imported_models:
+        assert imported_event.id is not None
+        actual_model = Event.objects.get(id=imported_event.id)
+        assert actual_model == imported_event
+        assert actual_model.cluster is not None
+
+    # Import the same records again
+    importer = EventsImporter(odk_form, odk_form_importer, bulk_import=True)
+    result = importer.execute()
+    expect_odk_form_submission_import_result(result, imported_models_count=0)
+
+
+@pytest.mark.django_db
+def test_it_does_not_bulk_import_duplicate_events_in_the_same_page(setup, expect_odk_form_submission_import_result):
+    odk_form, odk_form_importer, event_form_submissions = setup(form_submission_count=1)
+    event_form_submissions.append(event_form_submissions[0])
+
+    importer = EventsImporter(odk_form, odk_form_importer, bulk_import=True)
+    result = importer.execute()
+    expect_odk_form_submission_import_result(result, imported_models_count=1)
+    assert Event.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_it_copy_imports_events(setup, expect_odk_form_submission_import_result):
+    odk_form, odk_form_importer, event_form_submissions = setup()
+    # An Event with a Cluster that does not exist.
+    cluster_code_mapping = odk_form_importer.etl_document.etl_mappings.get(target_name='cluster_code')
+    path = cluster_code_mapping.source_name.split('.')
+    Utils.get_field(event_form_submissions[0], '.'.join(path[:-1]))[path[-1]] = 'NOT_A_CLUSTER'
+
+    importer = EventsImporter(odk_form, odk_form_importer, engine=EventsImporter.ENGINE_COPY)
+    assert importer.is_copy_import()
+    with CaptureQueriesContext(connection) as ctx:
+        result = importer.execute()
+    expect_odk_form_submission_import_result(result,
+                                             imported_models_count=DEFAULT_FORM_SUBMISSION_COUNT - 1,
+                                             error_count=1)
+    assert 'Cluster not found: NOT_A_CLUSTER' in result.errors[0]
+
+    event_table = Event._meta.db_table
+    insert_queries = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "{}"'.format(event_table))]
+    assert len(insert_queries) == 1
+    assert 'ON CONFLICT ("key") DO NOTHING' in insert_queries[0]['sql']
+
+    for imported_event in result.imported_models:
+        actual_model = Event.objects.get(id=imported_event.id)
+        assert actual_model.key == imported_event.key
+        assert actual_model.cluster.code == imported_event.cluster_code
+        assert actual_model.area.code == imported_event.area_code
+        assert actual_model.event_staff.code == imported_event.staff_code
+        assert actual_model.created_at is not None
+
+    # The staging table is dropped.
+    assert not [t for t in connection.introspection.table_names() if t.startswith('staging_')]
+
+    # Import the same records again
+    importer = EventsImporter(odk_form, odk_form_importer, engine=EventsImporter.ENGINE_COPY)
+    result = importer.execute()
+    expect_odk_form_submission_import_result(result, imported_models_count=0, error_count=1)
+
+
+@pytest.mark.django_db
+def test_it_caches_reference_models(setup, expect_odk_form_submission_import_result):
+    odk_form, odk_form_importer, event_form_submissions = setup()
+    # Import the Events with the same Cluster, Area and Staff.
+    for event_form_submission in event_form_submissions[1:]:
+        for source_name in ['cluster_code', 'area_code', 'staff_code']:
+            etl_mapping = odk_form_importer.etl_document.etl_mappings.get(target_name=source_name)
+            path = etl_mapping.source_name.split('.')
+            Utils.get_field(event_form_submission, '.'.join(path[:-1]))[path[-1]] = \
+                Utils.get_field(event_form_submissions[0], etl_mapping.source_name)
+
+    importer = EventsImporter(odk_form, odk_form_importer)
+    result = importer.execute()
+    expect_odk_form_submission_import_result(result, imported_models_count=DEFAULT_FORM_SUBMISSION_COUNT)
+
+    for class_name in ['Cluster', 'Area', 'Staff']:
+        assert result.reference_cache_misses[class_name] == 1
+        assert result.reference_cache_hits[class_name] == DEFAULT_FORM_SUBMISSION_COUNT - 1
+    assert result.as_json()['reference_cache']['hits'] == result.reference_cache_hits
+
+
+@pytest.mark.django_db
+def test_it_only_fetches_form_submissions_for_the_form_version(setup, mock_get_table_odata, settings,
+                                                               expect_odk_form_submission_import_result):
+    settings.ODK_API_FORM_VERSION_FILTER = EventsImporter.FORM_VERSION_FILTER_METADATA
+    settings.ODK_API_FORM_SUBMISSION_PAGE_SIZE = 2
+    odk_form, odk_form_importer, event_form_submissions = setup(form_submission_count=10)
+    for index, event_form_submission in enumerate(event_form_submissions):
+        event_form_submission['__system']['submissionDate'] = '2025-01-01T00:00:{:02d}.000Z'.format(index)
+        if index not in [0, 1, 2, 8]:
+            event_form_submission['__system']['formVersion'] = 'other'
+    mock_get_table = mock_get_table_odata(event_form_submissions)
+
+    importer = EventsImporter(odk_form, odk_form_importer, import_start_date='2025-01-01T00:00:00.000Z',
+                              import_end_date='2025-01-02T00:00:00.000Z')
+    result = importer.execute()
+    expect_odk_form_submission_import_result(result, imported_models_count=4)
+
+    filters = [c.kwargs['filter'] for c in mock_get_table.call_args_list if not c.kwargs.get('select')]
+    assert filters == [
+        "__system/submissionDate ge '2025-01-01T00:00:08.000Z' and __system/submissionDate le '2025-01-01T00:00:08.000Z'",
+        "__system/submissionDate ge '2025-01-01T00:00:01.000Z' and __system/submissionDate le '2025-01-01T00:00:02.000Z'",
+        "__system/submissionDate ge '2025-01-01T00:00:01.000Z' and __system/submissionDate le '2025-01-01T00:00:01.000Z'",
+        "__system/submissionDate ge '2025-01-01T00:00:00.000Z' and __system/submissionDate le '2025-01-01T00:00:00.000Z'",
+    ]
+    assert importer.last_submission_date == TypeCaster.to_datetime('2025-01-01T00:00:09.000Z')
+    assert importer.last_submission_id == event_form_submissions[9]['__id']
+
+
+@pytest.mark.django_db
+def test_it_sets_the_last_submission_after_the_page_is_imported(setup, mock_get_table_odata, settings):
+    settings.ODK_API_FORM_VERSION_FILTER = EventsImporter.FORM_VERSION_FILTER_CLIENT
+    settings.ODK_API_FORM_SUBMISSION_PAGE_SIZE = 2
+    settings.ODK_API_FORM_SUBMISSION_PREFETCH_PAGES = 1
+    odk_form, odk_form_importer, event_form_submissions = setup(form_submission_count=5)
+    for index, event_form_submission in enumerate(event_form_submissions):
+        event_form_submission['__system']['submissionDate'] = '2025-01-01T00:00:{:02d}.000Z'.format(index)
+    mock_get_table_odata(event_form_submissions)
+
+    importer = EventsImporter(odk_form, odk_form_importer, import_start_date='2025-01-01T00:00:00.000Z',
+                              import_end_date='2025-01-02T00:00:00.000Z')
+    pages = importer.get_form_submission_pages()
+    try:
+        first_page = next(pages)
+        # The next page can be prefetched but the first page is not imported yet.
+        assert importer.last_submission_date is None
+
+        second_page = next(pages)
+        newest_submission = max(first_page, key=lambda f: f['__system']['submissionDate'])
+        assert importer.last_submission_id == newest_submission['__id']
+        assert newest_submission not in second_page
+    finally:
+        pages.close()
+
+
+@pytest.mark.django_db
+def test_it_pages_form_submissions_by_submission_date(setup, mock_get_table_odata, settings,
+                                                      expect_odk_form_submission_import_result):
+    settings.ODK_API_FORM_VERSION_FILTER = EventsImporter.FORM_VERSION_FILTER_CLIENT
+    settings.ODK_API_FORM_SUBMISSION_PAGE_SIZE = 2
+    odk_form, odk_form_importer, event_form_submissions = setup(form_submission_count=7)
+    # Form submissions with the same submission dates across pages.
+    for index, seconds in enumerate([0, 1, 1, 1, 1, 2, 3]):
+        event_form_submissions[index]['__system']['submissionDate'] = '2025-01-01T00:00:{:02d}.000Z'.format(seconds)
+    mock_get_table = mock_get_table_odata(event_form_submissions)
+
+    importer = EventsImporter(odk_form, odk_form_importer, import_start_date='2025-01-01T00:00:00.000Z',
+                              import_end_date='2025-01-02T00:00:00.000Z')
+    result = importer.execute()
+    expect_odk_form_submission_import_result(result, imported_models_count=7)
+    assert Event.objects.count() == 7
+    # Only the form submissions with the same submission date as the end of the previous page are skipped.
+    pages = [(c.kwargs['filter'][-25:-1], c.kwargs['skip']) for c in mock_get_table.call_args_list]
+    assert pages == [
+        ('2025-01-02T00:00:00.000Z', None),
+        ('2025-01-01T00:00:02.000Z', 1),
+        ('2025-01-01T00:00:02.000Z', 3),
+        ('2025-01-01T00:00:02.000Z', 5),
+    ]
+    for call in mock_get_table.call_args_list:
+        assert call.kwargs.get('count') is None
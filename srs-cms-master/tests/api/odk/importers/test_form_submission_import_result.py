@@ -0,0 +1,89 @@
+import builtins
+import json
+import os
+import pytest
+from api.odk.importers.form_submissions.form_submission_import_result import FromSubmissionImportResult
+from api.models import Province
+from tests.factories.factories import ProvinceFactory
+
+
+@pytest.fixture
+def provinces(db):
+    return [ProvinceFactory() for _ in range(5)]
+
+
+def test_it_counts_imported_models_and_keeps_samples(provinces):
+    result = FromSubmissionImportResult(max_samples=2)
+    result.add_imported_model(provinces)
+    result.add_imported_model(provinces[0])
+    assert result.imported_models_count == 5
+    assert result.imported_model_counts == {Province.__name__: 5}
+    assert result.imported_models == provinces[:2]
+
+    json_result = result.as_json()
+    assert json_result['imported_models_count'] == 5
+    assert len(json_result['imported_models']) == 2
+
+
+def test_it_counts_imported_data_and_keeps_samples():
+    result = FromSubmissionImportResult(max_samples=1)
+    form_submissions = [{'__id': 'uuid:1'}, {'__id': 'uuid:2'}, {'__id': 'uuid:1'}]
+    result.add_imported_data(form_submissions)
+    assert result.imported_data_count == 2
+    assert result.imported_data == [{'__id': 'uuid:1'}]
+
+
+def test_it_merges_counts(provinces):
+    result = FromSubmissionImportResult(max_samples=10)
+    result.add_imported_model(provinces[:3])
+    result.add_imported_data({'__id': 'uuid:1'})
+
+    other_result = FromSubmissionImportResult(max_samples=10)
+    other_result.add_imported_model(provinces[2:])
+    other_result.add_imported_data([{'__id': 'uuid:1'}, {'__id': 'uuid:2'}])
+
+    result.merge(other_result)
+    assert result.imported_models_count == 5
+    assert result.imported_models == provinces
+    assert result.imported_data_count == 2
+    assert result.imported_data == [{'__id': 'uuid:1'}, {'__id': 'uuid:2'}]
+
+
+def test_it_spills_to_file(provinces, tmp_path):
+    result = FromSubmissionImportResult(max_samples=0, spill_dir=str(tmp_path))
+    result.add_imported_model(provinces)
+    result.add_imported_data({'__id': 'uuid:1'})
+    assert result.imported_models == []
+    assert result.imported_data == []
+
+    assert result.spill_file == os.path.join(str(tmp_path), FromSubmissionImportResult.SPILL_FILE_NAME)
+    with open(result.spill_file) as f:
+        records = [json.loads(line) for line in f]
+    assert records[:5] == [{'model': Province.__name__, 'id': str(p.pk)} for p in provinces]
+    assert records[5] == {'data': {'__id': 'uuid:1'}}
+
+
+def test_it_keeps_the_first_and_last_info_messages(provinces):
+    result = FromSubmissionImportResult(max_log_lines=4)
+    for index in range(10):
+        result.info('Message {}'.format(index), console=False)
+    # The imported models are only printed.
+    result.add_imported_model(provinces, console=True)
+    assert result.info_log == ['Message 0', 'Message 1', '... 6 messages not kept ...', 'Message 8', 'Message 9']
+    assert result.as_json()['info_log_dropped_count'] == 6
+
+    other_result = FromSubmissionImportResult(max_log_lines=4)
+    other_result.merge(result)
+    assert other_result.info_log == result.info_log
+
+
+def test_it_keeps_the_spill_file_open(provinces, tmp_path, mocker):
+    result = FromSubmissionImportResult(spill_dir=str(tmp_path))
+    spy_open = mocker.spy(builtins, 'open')
+    result.add_imported_model(provinces)
+    result.add_imported_data([{'__id': 'uuid:1'}, {'__id': 'uuid:2'}])
+    result.close()
+    assert spy_open.call_count == 1
+
+    with open(result.spill_file) as f:
+        assert len(f.readlines()) == 7
@@ -1,9 +1,16 @@
 import pytest
 import os
+import json
 import tempfile
+from api.common import TypeCaster
 from datetime import datetime
-from api.models import OdkProject, Event, Death, Baby, Household, HouseholdMember, VerbalAutopsy
+from django.urls import reverse
+from api.models import BackgroundJob, OdkProject, OdkFormImporterJob, Event, Death, Baby, Household, HouseholdMember, VerbalAutopsy
+from api.odk.importers.form_submissions.deaths_importer import DeathsImporter
+from api.odk.importers.form_submissions.events_importer import EventsImporter
+from api.odk.importers.form_submissions.form_submission_import_result import FromSubmissionImportResult
 from api.odk.importers.form_submissions.form_submission_importer import FromSubmissionImporter
+from api.odk.importers.form_submissions.form_submission_importer_base import FromSubmissionImporterBase
 from api.odk.importers.form_submissions.form_submission_importer_factory import FromSubmissionImporterFactory
 from tests.factories.factories import OdkProjectFactory, FormSubmissionFactory, ProvinceFactory, DeathFactory
 
@@ -117,6 +124,142 @@ def test_it_imports_all_projects_and_forms(setup, expect_odk_form_submission_imp
     )
 
 
+@pytest.mark.django_db
+def test_it_bulk_imports_all_projects_and_forms(setup, expect_odk_form_submission_import_result):
+    setup()
+    importer = FromSubmissionImporter(bulk_import=True)
+    odk_import_result = importer.execute()
+    expect_odk_form_submission_import_result(
+        odk_import_result,
+        error_count=0,
+        imported_model_types=[Event, Death, Baby, Household, HouseholdMember, VerbalAutopsy]
+    )
+
+    importer = FromSubmissionImporter(bulk_import=True)
+    odk_import_result = importer.execute()
+    expect_odk_form_submission_import_result(odk_import_result, imported_models_count=0, error_count=0)
+
+
+@pytest.mark.django_db
+def test_it_copy_imports_all_projects_and_forms(setup, expect_odk_form_submission_import_result):
+    setup()
+    importer = FromSubmissionImporter(engine=FromSubmissionImporterBase.ENGINE_COPY)
+    odk_import_result = importer.execute()
+    expect_odk_form_submission_import_result(
+        odk_import_result,
+        error_count=0,
+        imported_model_types=[Event, Death, Baby, Household, HouseholdMember, VerbalAutopsy]
+    )
+
+    importer = FromSubmissionImporter(engine=FromSubmissionImporterBase.ENGINE_COPY)
+    odk_import_result = importer.execute()
+    expect_odk_form_submission_import_result(odk_import_result, imported_models_count=0, error_count=0)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('demux', [True, False])
+def test_it_demultiplexes_each_page_to_the_child_importers(setup, expect_odk_form_submission_import_result,
+                                                           settings, mocker, demux):
+    settings.ODK_IMPORT_DEMUX = demux
+    setup()
+    get_importer = mocker.spy(FromSubmissionImporterFactory, 'get_importer')
+    get_form_submission_pages = mocker.spy(FromSubmissionImporterBase, 'get_form_submission_pages')
+
+    odk_import_result = FromSubmissionImporter(bulk_import=True).execute()
+    expect_odk_form_submission_import_result(
+        odk_import_result,
+        error_count=0,
+        imported_model_types=[Event, Death, Baby, Household, HouseholdMember, VerbalAutopsy]
+    )
+
+    if demux:
+        # Each form is fetched and walked once and each child importer is created once.
+        assert get_form_submission_pages.call_count == 3
+        assert len([c for c in get_importer.call_args_list
+                    if c.args[0].importer == FromSubmissionImporterFactory.ODK_DEATHS_IMPORTER_NAME]) == 1
+    else:
+        # The child importers walk the form submissions again.
+        assert get_form_submission_pages.call_count == 6
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('demux', [True, False])
+def test_it_continues_when_a_child_importer_fails(setup, settings, mocker, demux):
+    settings.ODK_IMPORT_DEMUX = demux
+    setup()
+    # The Deaths for the Verbal Autopsies.
+    death_ids = set(Death.objects.values_list('id', flat=True))
+    event_count = Event.objects.count()
+    mocker.patch.object(DeathsImporter, 'on_before_import_page', side_effect=Exception('Child importer failed'))
+
+    odk_import_result = FromSubmissionImporter(bulk_import=True).execute()
+    assert odk_import_result.errors
+    assert all('Child importer failed' in error for error in odk_import_result.errors)
+    # Only the failed child importer's models are not imported.
+    assert set(Death.objects.values_list('id', flat=True)) == death_ids
+    for model_class in [Event, Baby, Household, HouseholdMember, VerbalAutopsy]:
+        assert model_class.objects.exists(), model_class
+    assert Event.objects.count() == event_count + DEFAULT_FORM_SUBMISSION_COUNT * 3
+
+
+@pytest.mark.django_db
+def test_it_continues_when_the_primary_importer_fails_a_demultiplexed_page(setup, settings, mocker):
+    settings.ODK_IMPORT_DEMUX = True
+    setup()
+    mocker.patch.object(EventsImporter, 'on_before_import_page', side_effect=Exception('Primary importer failed'))
+    deaths_import_page = mocker.spy(DeathsImporter, 'import_page')
+
+    odk_import_result = FromSubmissionImporter(bulk_import=True).execute()
+    assert any('Error importing page: ' in error and 'Primary importer failed' in error
+               for error in odk_import_result.errors)
+    # The child importers still import the page.
+    assert deaths_import_page.call_count == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('demux', [True, False])
+def test_it_spills_the_child_importer_models(setup, settings, tmp_path, demux):
+    settings.ODK_IMPORT_DEMUX = demux
+    setup()
+
+    odk_import_result = FromSubmissionImporter(bulk_import=True, out_dir=str(tmp_path)).execute()
+    assert odk_import_result.errors == []
+    with open(tmp_path / FromSubmissionImportResult.SPILL_FILE_NAME) as f:
+        spilled_models = {json.loads(line).get('model') for line in f}
+    assert {Event.__name__, Death.__name__, Baby.__name__} <= spilled_models
+
+
+@pytest.mark.django_db(transaction=True)
+def test_it_imports_all_projects_and_forms_concurrently(setup, expect_odk_form_submission_import_result):
+    odk_project = setup()
+    importer = FromSubmissionImporter(workers=4)
+    odk_import_result = importer.execute()
+    expect_odk_form_submission_import_result(
+        odk_import_result,
+        error_count=0,
+        imported_model_types=[Event, Death, Baby, Household, HouseholdMember, VerbalAutopsy]
+    )
+
+    # Each OdkForm has its own job with only its results.
+    for odk_form in odk_project.odk_forms.all():
+        odk_form_importer = odk_form.get_primary_odk_form_importer(_importer_list=None)
+        odk_form_importer_job = odk_form_importer.odk_form_importer_jobs.get()
+        assert odk_form_importer_job.status == OdkFormImporterJob.STATUS_SUCCESSFUL
+        assert [f['id'] for f in odk_form_importer_job.result['imported_forms']] == [odk_form.id]
+
+
+@pytest.mark.django_db
+def test_it_imports_dependent_forms_in_later_stages(setup):
+    odk_project = setup()
+    odk_forms = list(odk_project.odk_forms.all())
+    stages = FromSubmissionImporter()._get_import_stages(odk_forms)
+
+    va_odk_form = odk_project.odk_forms.get(name=OdkProjectFactory.ODK_FORM_NAME_FOR_VERBAL_AUTOPSIES)
+    assert len(stages) == 2
+    assert va_odk_form not in stages[0]
+    assert stages[1] == [va_odk_form]
+
+
 @pytest.mark.django_db
 def test_it_imports_all_projects_and_forms_with_start_end_dates(setup, expect_odk_form_submission_import_result):
     setup()
@@ -143,6 +286,52 @@ def test_it_does_not_reimport_all_projects_and_forms(setup, expect_odk_form_subm
                                              error_count=0)
 
 
+@pytest.mark.django_db
+def test_it_resumes_from_the_last_imported_form_submission(mock_get_table_odata,
+                                                           expect_odk_form_submission_import_result):
+    ProvinceFactory(with_clusters=True,
+                    with_clusters__with_areas=True,
+                    with_clusters__with_staff=True)
+    odk_project = OdkProjectFactory(with_forms=True, with_forms__importers=True, with_forms__with_etl=True)
+    event_odk_form = odk_project.odk_forms.filter(name=OdkProjectFactory.ODK_FORM_NAME_FOR_EVENTS).first()
+    event_odk_form_importer = event_odk_form.get_odk_form_importer(
+        importer=FromSubmissionImporterFactory.ODK_EVENTS_IMPORTER_NAME
+    )
+
+    event_form_submissions = []
+    for index in range(3):
+        event_form_submission = FormSubmissionFactory.create_event(event_odk_form_importer.etl_document)
+        event_form_submission['__system']['submissionDate'] = '2025-01-01T00:00:0{}.000Z'.format(index)
+        event_form_submissions.append(event_form_submission)
+    mock_get_table_odata(event_form_submissions)
+
+    importer = FromSubmissionImporter(odk_forms=event_odk_form,
+                                      importers=FromSubmissionImporterFactory.ODK_EVENTS_IMPORTER_NAME)
+    odk_import_result = importer.execute()
+    expect_odk_form_submission_import_result(odk_import_result, imported_models_count=3, error_count=0)
+
+    odk_form_importer_job = event_odk_form_importer.odk_form_importer_jobs.get()
+    assert odk_form_importer_job.last_submission_id == event_form_submissions[2]['__id']
+    assert odk_form_importer_job.last_submission_date == TypeCaster.to_datetime('2025-01-01T00:00:02.000Z')
+
+    # A form submission with the same submission date as the last imported form submission.
+    event_form_submission = FormSubmissionFactory.create_event(event_odk_form_importer.etl_document)
+    event_form_submission['__system']['submissionDate'] = '2025-01-01T00:00:02.000Z'
+    event_form_submissions.append(event_form_submission)
+    mock_get_table = mock_get_table_odata(event_form_submissions)
+
+    importer = FromSubmissionImporter(odk_forms=event_odk_form,
+                                      importers=FromSubmissionImporterFactory.ODK_EVENTS_IMPORTER_NAME)
+    odk_import_result = importer.execute()
+    expect_odk_form_submission_import_result(odk_import_result, imported_models_count=1, error_count=0)
+    assert "Model already exists" not in ' '.join(odk_import_result.info_log)
+
+    odk_form_importer_job = event_odk_form_importer.odk_form_importer_jobs.order_by('-id').first()
+    assert odk_form_importer_job.import_start_date == TypeCaster.to_datetime('2025-01-01T00:00:02.000Z')
+    assert odk_form_importer_job.args['import_start_submission_id'] == event_form_submissions[2]['__id']
+    assert odk_form_importer_job.last_submission_date == TypeCaster.to_datetime('2025-01-01T00:00:02.000Z')
+
+
 @pytest.mark.django_db
 def test_it_imports_all_projects_and_forms_and_saves_submissions(setup, expect_odk_form_submission_import_result):
     setup()
@@ -219,3 +408,67 @@ def test_it_imports_specific_importers(setup, expect_odk_form_submission_import_
     importer = FromSubmissionImporter(odk_forms=odk_project_forms, importers=importers)
     odk_import_result = importer.execute()
     expect_odk_form_submission_import_result(odk_import_result, error_count=0)
+
+
+@pytest.mark.django_db
+def test_it_saves_only_the_counts_after_each_page(setup, mocker):
+    setup()
+    saved_results = []
+    save_progress = FromSubmissionImporter._save_odk_form_importer_job_progress
+
+    def _save_progress(self, odk_form_importer_job, importer):
+        save_progress(self, odk_form_importer_job, importer)
+        saved_results.append(OdkFormImporterJob.objects.get(id=odk_form_importer_job.id).result)
+
+    mocker.patch.object(FromSubmissionImporter, '_save_odk_form_importer_job_progress', _save_progress)
+    FromSubmissionImporter().execute()
+
+    assert saved_results
+    for saved_result in saved_results:
+        assert set(saved_result) == {'imported_models_count', 'imported_model_counts', 'imported_data_count',
+                                     'error_count', 'imported_page_count'}
+    # The full result is saved when the importer finishes.
+    for odk_form_importer_job in OdkFormImporterJob.objects.all():
+        assert 'info_log' in odk_form_importer_job.result
+
+
+@pytest.mark.django_db
+def test_admin_queues_the_import_for_the_workers(setup, admin_client, settings):
+    settings.BACKGROUND_JOBS_RUNNER = 'worker'
+    odk_project = setup()
+    response = admin_client.get(reverse('admin:odk_project_import_form_submissions', args=[odk_project.id]),
+                                follow=True)
+
+    background_job = BackgroundJob.objects.get()
+    assert background_job.status == BackgroundJob.STATUS_QUEUED
+    assert 'ODK Import queued for the background job workers.' in [str(m) for m in response.context['messages']]
+    assert not OdkFormImporterJob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_admin_imports_in_a_background_job(setup, admin_client, settings):
+    settings.BACKGROUND_JOBS_RUNNER = 'eager'
+    odk_project = setup()
+    response = admin_client.get(reverse('admin:odk_project_import_form_submissions', args=[odk_project.id]))
+
+    background_job = BackgroundJob.objects.get()
+    assert response.url == reverse('admin:api_backgroundjob_change', args=[background_job.id])
+    assert background_job.job_type == BackgroundJob.JOB_TYPE_ODK_IMPORT_FORM_SUBMISSIONS
+    assert background_job.status == BackgroundJob.STATUS_SUCCESSFUL, background_job.error_output
+    assert background_job.progress == 1
+    assert background_job.concurrency_key == BackgroundJob.concurrency_key_for(odk_project)
+    assert 'Form Submission import completed successfully.' in background_job.output
+    # Only the progress of each page and the stats are written to the output.
+    assert 'Page: 1 Imported Models:' in background_job.output
+    assert 'Imported Event:' not in background_job.output
+
+    odk_form_importer_jobs = OdkFormImporterJob.objects.all()
+    assert odk_form_importer_jobs.count() == odk_project.odk_forms.count()
+    for odk_form_importer_job in odk_form_importer_jobs:
+        assert odk_form_importer_job.background_job == background_job
+        assert odk_form_importer_job.status == OdkFormImporterJob.STATUS_SUCCESSFUL
+        assert odk_form_importer_job.result['imported_forms']
+
+    response = admin_client.get(response.url)
+    assert response.status_code == 200
+    assert b'http-equiv="refresh"' not in response.content
@@ -0,0 +1,49 @@
+import pytest
+from api.odk.importers.form_submissions.form_submission_page_fetcher import FormSubmissionPageFetcher
+
+PAGE_SIZE = 10
+
+
+def pages_from(records, fetched_offsets):
+    for offset in range(0, len(records) + 1, PAGE_SIZE):
+        fetched_offsets.append(offset)
+        page = records[offset:offset + PAGE_SIZE]
+        yield page
+        if len(page) < PAGE_SIZE:
+            break
+
+
+@pytest.mark.parametrize('prefetch_pages', [0, 1, 3])
+def test_it_fetches_all_pages(prefetch_pages):
+    records = list(range(35))
+    offsets = []
+    page_fetcher = FormSubmissionPageFetcher(pages_from(records, offsets), prefetch_pages=prefetch_pages)
+
+    pages = list(page_fetcher)
+    assert [r for page in pages for r in page] == records
+    assert offsets == [0, 10, 20, 30]
+    assert [t['count'] for t in page_fetcher.page_timings] == [10, 10, 10, 5]
+    for page_timing in page_fetcher.page_timings:
+        assert page_timing['fetch_seconds'] >= 0
+        assert page_timing['process_seconds'] >= 0
+
+
+def test_it_raises_fetch_errors():
+    def pages():
+        yield list(range(PAGE_SIZE))
+        raise ValueError('Fetch error')
+
+    page_fetcher = FormSubmissionPageFetcher(pages(), prefetch_pages=1)
+    with pytest.raises(ValueError):
+        for _ in page_fetcher:
+            pass
+
+
+def test_it_stops_fetching_when_closed():
+    offsets = []
+    page_fetcher = FormSubmissionPageFetcher(pages_from(list(range(1000)), offsets), prefetch_pages=2)
+    for page in page_fetcher:
+        break
+    page_fetcher.close()
+    # The current page, the prefetch queue and one page waiting on the queue.
+    assert len(offsets) <= 4
@@ -69,3 +69,19 @@ def test_it_does_not_import_duplicate_household_members(setup, expect_odk_form_s
     importer = HouseholdMembersImporter(odk_form, odk_form_importer)
     result = importer.execute()
     expect_odk_form_submission_import_result(result, imported_models_count=0)
+
+
+@pytest.mark.django_db
+def test_it_gets_the_households_once_per_page(setup, expect_odk_form_submission_import_result, mocker):
+    odk_form, odk_form_importer, event_form_submissions = setup()
+    resolve_parent_models = mocker.spy(HouseholdMembersImporter, 'resolve_parent_models')
+    get_model_or_try_execute_importer = mocker.spy(HouseholdMembersImporter, 'get_model_or_try_execute_importer')
+
+    importer = HouseholdMembersImporter(odk_form, odk_form_importer, bulk_import=True)
+    result = importer.execute()
+    expect_odk_form_submission_import_result(result, imported_models_count=DEFAULT_FORM_SUBMISSION_COUNT * 2)
+
+    # The Households for the page are found and imported together, not looked up for each HouseholdMember.
+    assert importer.imported_page_count == 1
+    assert resolve_parent_models.call_count == importer.imported_page_count
+    assert get_model_or_try_execute_importer.call_count == 0
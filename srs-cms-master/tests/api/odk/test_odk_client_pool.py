@@ -0,0 +1,75 @@
+import gc
+import pytest
+from api.odk import OdkConfig, OdkClientPool
+
+
+@pytest.fixture
+def odk_config():
+    OdkClientPool.clear()
+    yield OdkConfig(base_url="https://odk.example.com", username="test_user", password="test_password")
+    OdkClientPool.clear()
+
+
+def test_it_reuses_the_client(odk_config):
+    started_stats = OdkClientPool.stats()
+    client = OdkClientPool.get_client(odk_config)
+    assert OdkClientPool.get_client(odk_config) is client
+    assert OdkClientPool.get_client(OdkConfig(base_url=odk_config.base_url,
+                                              username=odk_config.username,
+                                              password=odk_config.password)) is client
+    assert OdkClientPool.stats_since(started_stats)[OdkClientPool.STAT_CLIENT_CONSTRUCTIONS] == 1
+
+
+def test_it_shares_the_session_between_projects(odk_config):
+    started_stats = OdkClientPool.stats()
+    client = OdkClientPool.get_client(odk_config)
+    project_client = OdkClientPool.get_client(odk_config, project_id=2)
+    assert project_client is not client
+    assert project_client.project_id == 2
+    assert project_client.session is client.session
+    assert OdkClientPool.get_client(odk_config, project_id=2) is project_client
+    assert OdkClientPool.stats_since(started_stats)[OdkClientPool.STAT_CLIENT_CONSTRUCTIONS] == 2
+
+    other_client = OdkClientPool.get_client(OdkConfig(base_url="https://other.example.com",
+                                                      username=odk_config.username,
+                                                      password=odk_config.password))
+    assert other_client.session is not client.session
+
+
+def test_it_logs_in_once(odk_config, mocker):
+    mock_get_token = mocker.patch("pyodk._endpoints.auth.AuthService.get_token", return_value='token')
+    started_stats = OdkClientPool.stats()
+    client = OdkClientPool.get_client(odk_config)
+    project_client = OdkClientPool.get_client(odk_config, project_id=2)
+
+    assert client.session.auth.login() == 'Bearer token'
+    assert project_client.session.auth.login() == 'Bearer token'
+    assert OdkClientPool.stats_since(started_stats)[OdkClientPool.STAT_LOGINS] == 1
+    assert mock_get_token.call_count == 1
+
+
+def test_it_replaces_expired_sessions(odk_config, settings):
+    settings.ODK_CLIENT_MAX_AGE_SECONDS = 0
+    client = OdkClientPool.get_client(odk_config)
+    assert OdkClientPool.get_client(odk_config) is not client
+
+
+def test_it_closes_expired_sessions_once_they_are_not_used(odk_config, settings, mocker):
+    settings.ODK_CLIENT_MAX_AGE_SECONDS = 0
+    client = OdkClientPool.get_client(odk_config)
+    close = mocker.spy(client.session, 'close')
+
+    # The expired session is not closed while the client is still used.
+    OdkClientPool.get_client(odk_config)
+    assert close.call_count == 0
+
+    del client
+    gc.collect()
+    OdkClientPool.get_client(odk_config)
+    assert close.call_count == 1
+
+
+def test_it_clears_the_pool(odk_config):
+    client = OdkClientPool.get_client(odk_config)
+    OdkClientPool.clear()
+    assert OdkClientPool.get_client(odk_config) is not client
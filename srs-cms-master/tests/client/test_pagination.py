@@ -0,0 +1,54 @@
+import datetime
+import pytest
+from api.models import Death
+from client.pagination import KeysetPaginator
+from tests.factories.factories import DeathFactory, EventFactory
+
+
+@pytest.fixture
+def deaths(db):
+    event = EventFactory()
+    dods = [datetime.date(2024, 1, 3), None, datetime.date(2024, 1, 1), datetime.date(2024, 1, 3),
+            None, datetime.date(2024, 1, 2), datetime.date(2024, 1, 1)]
+    return [DeathFactory(event=event, deceased_dod=dod) for dod in dods]
+
+
+def sorted_deaths(deaths):
+    return sorted(deaths, key=lambda d: (d.deceased_dod is None, d.deceased_dod or datetime.date.min, d.id))
+
+
+@pytest.mark.parametrize('page_size', [1, 2, 3, 7, 10])
+def test_it_pages_forward_and_back(deaths, page_size):
+    paginator = KeysetPaginator(Death.objects.all(), [('deceased_dod', False), ('id', False)], page_size)
+
+    pages = [paginator.page()]
+    assert not pages[0].has_previous()
+    while pages[-1].has_next():
+        pages.append(paginator.page(pages[-1].next_cursor))
+    assert [d.id for page in pages for d in page] == [d.id for d in sorted_deaths(deaths)]
+    assert all(len(page) == page_size for page in pages[:-1])
+
+    previous_pages = [pages[-1]]
+    while previous_pages[-1].has_previous():
+        previous_pages.append(paginator.page(previous_pages[-1].previous_cursor))
+    assert [[d.id for d in page] for page in reversed(previous_pages)] == [[d.id for d in page] for page in pages]
+
+
+def test_it_pages_descending(deaths):
+    paginator = KeysetPaginator(Death.objects.all(), [('deceased_dod', True), ('id', False)], 3)
+    page = paginator.page()
+    ids = [d.id for d in page]
+    while page.has_next():
+        page = paginator.page(page.next_cursor)
+        ids += [d.id for d in page]
+
+    dated = sorted([d for d in deaths if d.deceased_dod], key=lambda d: (-d.deceased_dod.toordinal(), d.id))
+    undated = sorted([d for d in deaths if d.deceased_dod is None], key=lambda d: d.id)
+    assert ids == [d.id for d in dated + undated]
+
+
+@pytest.mark.parametrize('cursor', [None, '', 'not-a-cursor', KeysetPaginator.encode_cursor('x', [1]),
+                                    KeysetPaginator.encode_cursor(KeysetPaginator.NEXT, [1])])
+def test_it_gets_the_first_page_for_invalid_cursors(deaths, cursor):
+    paginator = KeysetPaginator(Death.objects.all(), [('deceased_dod', False), ('id', False)], 3)
+    assert [d.id for d in paginator.page(cursor)] == [d.id for d in sorted_deaths(deaths)[:3]]
@@ -1 +1,126 @@
 import pytest
+from django.urls import reverse
+from api.models import Death
+from tests.factories.factories import DeathFactory, AreaFactory, StaffFactory
+
+
+@pytest.fixture
+def deaths(db):
+    return (DeathFactory.create_batch(3, death_status=Death.DeathStatus.NEW_DEATH) +
+            DeathFactory.create_batch(2, death_status=Death.DeathStatus.VA_SCHEDULED) +
+            DeathFactory.create_batch(1, death_status=Death.DeathStatus.VA_COMPLETED))
+
+
+def test_deaths_home_counts(deaths, admin_client):
+    response = admin_client.get(reverse('deaths_home'))
+    assert response.status_code == 200
+    assert response.context['new_deaths_total'] == 3
+    assert response.context['scheduled_deaths_total'] == 2
+    assert response.context['completed_deaths_total'] == 1
+
+
+def test_deaths_home_counts_are_filtered(deaths, admin_client):
+    province = deaths[0].event.cluster.province
+    response = admin_client.get(reverse('deaths_home'), {'province': province.id})
+    assert response.status_code == 200
+    assert response.context['new_deaths_total'] == 1
+    assert response.context['scheduled_deaths_total'] == 0
+    assert response.context['completed_deaths_total'] == 0
+
+
+def set_search_names(deaths, death, deceased_name):
+    # Give every death fixed names so only the searched death can match the query.
+    for other_death in deaths:
+        other_death.event.household_head_name = 'Thabo Nkosi'
+        other_death.event.respondent_name = 'Lerato Dube'
+        other_death.event.save()
+        other_death.deceased_name = deceased_name if other_death == death else 'Sipho Khumalo'
+        other_death.save()
+
+
+def test_deaths_home_search(deaths, admin_client):
+    death = deaths[3]
+    set_search_names(deaths, death, 'Zanele Mokoena')
+
+    response = admin_client.get(reverse('deaths_home'), {'q': 'Mokoena'})
+    assert response.status_code == 200
+    assert list(response.context['scheduled_deaths'].object_list) == [death]
+    assert response.context['scheduled_deaths_total'] == 1
+    assert response.context['new_deaths_total'] == 0
+
+
+def test_deaths_home_search_matches_misspellings(deaths, admin_client):
+    death = deaths[3]
+    set_search_names(deaths, death, 'Zanele Mokoena')
+
+    # The word similarity of 'Mokena' (0.5) is below the default %> threshold (0.6)
+    # but above DEATH_SEARCH_WORD_SIMILARITY_THRESHOLD so the death is still found.
+    response = admin_client.get(reverse('deaths_home'), {'q': 'Mokena'})
+    assert response.status_code == 200
+    assert response.context['scheduled_deaths'].object_list[0] == death
+
+
+# The session, user, provinces, status counts and one query per death list page, independent of the page size.
+DEATHS_HOME_QUERY_BUDGET = 7
+
+
+@pytest.mark.parametrize('paging_size', [10, 100])
+def test_deaths_home_query_budget(db, admin_client, django_assert_max_num_queries, paging_size):
+    # Share the related models so the factories do not run out of unique codes.
+    area = AreaFactory()
+    event_kwargs = {'event__cluster': area.cluster,
+                    'event__area': area,
+                    'event__event_staff': StaffFactory(cluster=area.cluster, province=area.cluster.province)}
+    DeathFactory.create_batch(paging_size, death_status=Death.DeathStatus.NEW_DEATH, **event_kwargs)
+    DeathFactory.create_batch(paging_size, death_status=Death.DeathStatus.VA_SCHEDULED,
+                              va_staff=event_kwargs['event__event_staff'], **event_kwargs)
+    DeathFactory.create_batch(paging_size, death_status=Death.DeathStatus.VA_COMPLETED, **event_kwargs)
+
+    with django_assert_max_num_queries(DEATHS_HOME_QUERY_BUDGET):
+        response = admin_client.get(reverse('deaths_home'), {'paging_size': paging_size})
+    assert response.status_code == 200
+    assert response.context['new_deaths_page_total'] == paging_size
+    assert response.context['scheduled_deaths_page_total'] == paging_size
+    assert response.context['completed_deaths_page_total'] == paging_size
+
+
+def test_deaths_home_keyset_pagination(deaths, admin_client, settings):
+    settings.DEATH_LIST_PAGINATION = 'keyset'
+    new_deaths = sorted(deaths[:3], key=lambda d: d.id)
+
+    response = admin_client.get(reverse('deaths_home'), {'paging_size': 2})
+    assert response.status_code == 200
+    page = response.context['new_deaths']
+    assert list(page) == new_deaths[:2]
+    assert response.context['new_deaths_total'] == 3
+
+    response = admin_client.get(reverse('deaths_home'), {'paging_size': 2, 'new_deaths_page': page.next_cursor})
+    assert response.status_code == 200
+    assert list(response.context['new_deaths']) == new_deaths[2:]
+    assert not response.context['new_deaths'].has_next()
+
+
+def test_deaths_home_approximate_counts(deaths, admin_client, settings):
+    settings.DEATH_LIST_PAGINATION = 'keyset'
+    settings.DEATH_LIST_APPROXIMATE_COUNT_THRESHOLD = 1
+    response = admin_client.get(reverse('deaths_home'), {'start_date': '2000-01-01', 'end_date': '2100-01-01'})
+    assert response.status_code == 200
+    assert response.context['counts_are_approximate'] is True
+
+    settings.DEATH_LIST_APPROXIMATE_COUNT_THRESHOLD = 0
+    response = admin_client.get(reverse('deaths_home'), {'start_date': '2000-01-01', 'end_date': '2100-01-01'})
+    assert response.context['counts_are_approximate'] is False
+
+
+def test_deaths_home_offset_pages_are_not_approximate(deaths, admin_client, settings, mocker):
+    settings.DEATH_LIST_PAGINATION = 'offset'
+    settings.DEATH_LIST_APPROXIMATE_COUNT_THRESHOLD = 1
+    Death.objects.update(deceased_dod='2020-01-01')
+    mocker.patch.object(Death.objects, 'estimated_count', return_value=1000)
+    response = admin_client.get(reverse('deaths_home'), {'start_date': '2000-01-01', 'end_date': '2100-01-01',
+                                                         'paging_size': 2, 'new_deaths_page': 50})
+    assert response.status_code == 200
+    assert response.context['counts_are_approximate'] is False
+    assert response.context['new_deaths_total'] == 3
+    assert response.context['new_deaths_paginator'].num_pages == 2
+    assert response.context['new_deaths'].number == 2
@@ -1,6 +1,8 @@
+import re
 import pytest
 from api.dev.seeds.seed_loader import SeedLoader
 from api.models import OdkProject
+from api.common import TypeCaster
 
 
 @pytest.fixture(autouse=True)
@@ -32,10 +34,10 @@ def expect_odk_form_submission_import_result():
             assert len(odk_import_result.imported_forms) == imported_forms_count
 
         if imported_models_count is not None:
-            assert len(odk_import_result.imported_models) == imported_models_count
+            assert odk_import_result.imported_models_count == imported_models_count
 
         if imported_data_count is not None:
-            assert len(odk_import_result.imported_data) == imported_data_count
+            assert odk_import_result.imported_data_count == imported_data_count
 
         if error_count is not None:
             assert len(odk_import_result.errors) == error_count, 'Errors: {}'.format(odk_import_result.errors)
@@ -75,15 +77,21 @@ def mock_get_table_dynamic(mocker, seed_loader):
     """Mocks the pyodk submissions.get_table method and returns the correct form submissions."""
 
     def _m(events=[], deaths=[], babies=[], households=[], household_members=[], verbal_autopsies=[]):
+        # Load the form names up front, get_table can be called from the page fetcher thread which
+        # does not have access to the test database transaction.
+        odk_form_names = {}
+        for odk_project in OdkProject.objects.prefetch_related('odk_forms'):
+            for odk_form in odk_project.odk_forms.all():
+                odk_form_names[(odk_project.project_id, odk_form.xml_form_id)] = odk_form.name
+
         def mocked_get_table(*args, form_id=None, project_id=None, **kwargs):
-            odk_project = OdkProject.objects.get(project_id=project_id)
-            odk_form = odk_project.odk_forms.get(xml_form_id=form_id)
+            odk_form_name = odk_form_names.get((project_id, form_id))
             value = []
-            if odk_form.name == "Events":
+            if odk_form_name == "Events":
                 value = events + deaths + babies
-            elif odk_form.name == "Households":
+            elif odk_form_name == "Households":
                 value = households + household_members
-            elif odk_form.name == "Verbal Autopsies":
+            elif odk_form_name == "Verbal Autopsies":
                 value = verbal_autopsies
             return {"value": value}
 
@@ -92,3 +100,78 @@ def mock_get_table_dynamic(mocker, seed_loader):
         return mock_client
 
     yield _m
+
+
+@pytest.fixture
+def mock_get_table_odata(mocker):
+    """
+    Mocks the pyodk submissions.get_table method and applies the OData filter on __system/submissionDate,
+    skip, top, and select parameters like ODK Central. Form submissions are returned newest first.
+    """
+
+    def _m(mocked_form_submissions=[]):
+        form_submissions = sorted(mocked_form_submissions,
+                                  key=lambda f: (f['__system']['submissionDate'], f['__id']),
+                                  reverse=True)
+
+        def mocked_get_table(*args, skip=None, top=None, select=None, filter=None, **kwargs):
+            value = form_submissions
+            if filter:
+                start_date, end_date = re.findall(r"'([^']*)'", filter)
+                start_date = TypeCaster.to_datetime(start_date)
+                end_date = TypeCaster.to_datetime(end_date)
+                value = [f for f in value
+                         if start_date <= TypeCaster.to_datetime(f['__system']['submissionDate']) <= end_date]
+            value = value[skip or 0:]
+            if top is not None:
+                value = value[:top]
+            if select:
+                value = [{k: f[k] for k in select.split(',')} for f in value]
+            return {"value": value}
+
+        mock_client = mocker.patch("pyodk._endpoints.submissions.SubmissionService.get_table",
+                                   side_effect=mocked_get_table)
+        return mock_client
+
+    yield _m
+
+
+@pytest.fixture
+def mock_entities(mocker):
+    """Mocks the pyodk entities methods with in memory Entity Lists."""
+    entities = {}
+    entity_list_names = {}
+
+    def _create_many(data, entity_list_name=None, **kwargs):
+        for record in data:
+            uuid = f"uuid-{entity_list_name}-{record['label']}"
+            entities[uuid] = dict(record)
+            entity_list_names[uuid] = entity_list_name
+        return True
+
+    def _merge(data, entity_list_name=None, **kwargs):
+        for uuid in [u for u, name in entity_list_names.items() if name == entity_list_name]:
+            _delete(uuid)
+        _create_many(data, entity_list_name=entity_list_name)
+
+    def _get_table(entity_list_name=None, skip=None, top=None, **kwargs):
+        rows = [{'__id': uuid, **e} for uuid, e in entities.items() if entity_list_names[uuid] == entity_list_name]
+        skip = skip or 0
+        return {'value': rows[skip:skip + top] if top else rows[skip:]}
+
+    def _update(uuid, label=None, data=None, **kwargs):
+        entities[uuid].update(data, label=label)
+
+    def _delete(uuid, **kwargs):
+        entities.pop(uuid)
+        entity_list_names.pop(uuid)
+        return True
+
+    mocks = {
+        name: mocker.patch(f'pyodk._endpoints.entities.EntityService.{name}', side_effect=side_effect)
+        for name, side_effect in [('merge', _merge), ('create_many', _create_many), ('get_table', _get_table),
+                                  ('update', _update), ('delete', _delete)]
+    }
+    mocks['entities'] = entities
+    mocks['entity_list_names'] = entity_list_names
+    yield mocks